@@ -0,0 +1,310 @@
+import argparse
+import logging
+import os
+import time
+import numpy as np
+from bars import close_events
+from config import AI_TIMEFRAME, DEFAULT_SYMBOLS, EXECUTION_BOOK_PATH, EXECUTION_MODEL, EXECUTION_TAKER_FEE, INITIAL_BALANCE
+from data_loader import load_ticks, timestamp_seconds
+from execution import create_execution
+import metrics
+from portfolio import Portfolio
+from tick_store import TickStore
+from trading_ai import ACTIONS, ACTION_CODES, BUY, HOLD, SELL, TradingAI
+
+
+class BacktestResult:
+    def __init__(self, symbols, decisions, position_sizes, equity, portfolio, ticks, elapsed):
+        self.symbols = symbols
+        self.decisions = decisions
+        self.position_sizes = position_sizes
+        self.equity = equity
+        self.portfolio = portfolio
+        self.ticks = ticks
+        self.elapsed = elapsed
+
+    @property
+    def trade_log(self):
+        return self.portfolio.get_trade_log()
+
+    @property
+    def final_equity(self):
+        return float(self.equity[-1]) if len(self.equity) else self.portfolio.balance
+
+    @property
+    def profit_loss(self):
+        return self.final_equity - self.portfolio.initial_balance
+
+    @property
+    def max_drawdown(self):
+        if not len(self.equity):
+            return 0.0
+        peaks = np.maximum.accumulate(self.equity)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drawdowns = np.where(peaks > 0, (peaks - self.equity) / peaks, 0.0)
+        return float(drawdowns.max())
+
+    def decision_names(self):
+        return np.array(ACTIONS)[self.decisions]
+
+    def summary(self):
+        return {
+            "ticks": self.ticks,
+            "symbols": len(self.symbols),
+            "trades": self.trade_log.total,
+            "fees": self.trade_log.total_fees,
+            "final_balance": float(self.portfolio.balance),
+            "final_equity": self.final_equity,
+            "profit_loss": self.profit_loss,
+            "max_drawdown": self.max_drawdown,
+            "elapsed_sec": self.elapsed,
+            "ticks_per_sec": self.ticks / self.elapsed if self.elapsed > 0 else float("inf"),
+        }
+
+
+def frames_to_arrays(frames, symbols):
+    n, m = len(frames), len(symbols)
+    index = {sym: j for j, sym in enumerate(symbols)}
+    arrays = {field: np.zeros((n, m)) for field in ("price", "volume", "bid", "ask")}
+    arrays["present"] = np.zeros((n, m), dtype=bool)
+    for t, frame in enumerate(frames):
+        for symbol, data in frame.items():
+            j = index.get(symbol)
+            if j is None: continue
+            arrays["present"][t, j] = True
+            for field in ("price", "volume", "bid", "ask"):
+                arrays[field][t, j] = data[field]
+    return arrays
+
+
+def compute_signals(ai, prices, volumes, present):
+    """Precompute, per tick and symbol, whether TradingAI has a full history
+    and what its RSI/EMA signal would be, ignoring stop-loss/take-profit
+    (those depend on the portfolio path and are checked while simulating)."""
+    n, m = prices.shape
+    limit = ai.history_limit
+    valid = present & (prices > 0) & (volumes > 0)
+    ready = np.zeros((n, m), dtype=bool)
+    signals = {}
+
+    for j in range(m):
+        rows = np.flatnonzero(valid[:, j])
+        at = rows[limit - 1:]
+        ready[at, j] = True
+        if not len(at):
+            continue
+        p = prices[rows, j]
+        ema, rsi, volatility = (series[limit - 1:] for series in ai.indicator_series(p))
+        current = p[limit - 1:]
+
+        with np.errstate(invalid="ignore"):
+            candidates = np.flatnonzero((ema != 0) & (rsi != 0) & (
+                ((rsi < ai.rsi_buy_below) & (current > ema)) | ((rsi > ai.rsi_sell_above) & (current < ema))
+            ))
+        for k in candidates:
+            decision, pos_size, _ = ai.evaluate_signal(float(current[k]), float(ema[k]), float(rsi[k]), float(volatility[k]))
+            if decision != "HOLD":
+                signals[(int(at[k]), j)] = (ACTION_CODES[decision], pos_size)
+
+    return ready, signals
+
+
+def _forward_fill(values, mask):
+    idx = np.where(mask, np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    filled = np.take_along_axis(values, idx, axis=0)
+    filled[~np.logical_or.accumulate(mask, axis=0)] = 0.0
+    return filled
+
+
+def _next_event(t, n, signal_rows, held, prices, ready, ai, portfolio, symbols):
+    k = np.searchsorted(signal_rows, t)
+    upper = int(signal_rows[k]) if k < len(signal_rows) else n
+    for j in held:
+        if upper <= t: break
+        avg = portfolio.avg_buy_price.get(symbols[j])
+        if not avg or avg <= 0: continue
+        seg = prices[t:upper, j]
+        hits = np.flatnonzero(ready[t:upper, j] & ((seg <= avg * ai.stop_loss) | (seg >= avg * ai.take_profit)))
+        if len(hits):
+            upper = t + int(hits[0])
+    return upper
+
+
+def _quote_source(arrays, execution):
+    # Builds the tick dict an execution model fills against, only for models
+    # that read it; the default last-price model gets None at no cost.
+    if not execution.needs_quotes:
+        return lambda t, j: None
+    times = None
+    if execution.needs_time and "timestamps" in arrays:
+        times = timestamp_seconds(arrays["timestamps"])
+        if times is None:
+            logging.warning("Backtest timestamps are not times; fills use the newest L2 snapshot.")
+
+    def quote(t, j):
+        tick = {field: float(arrays[field][t, j]) for field in ("price", "volume", "bid", "ask")}
+        if times is not None:
+            tick["time"] = float(times[t])
+        return tick
+    return quote
+
+
+def _bar_closes(arrays, timeframe):
+    # With a timeframe the AI sees a symbol only on the tick that closes one
+    # of its bars, with the bar in place of the tick, as in TradingEngine.
+    times = timestamp_seconds(arrays["timestamps"]) if "timestamps" in arrays else None
+    if times is None:
+        logging.warning("Backtest timestamps are not times; bars assume one snapshot per second.")
+        times = np.arange(len(arrays["price"]), dtype=np.float64)
+    return close_events(arrays, times, timeframe)
+
+
+def run_backtest(data, symbols=None, risk_level="moderate", initial_balance=INITIAL_BALANCE, ai=None, portfolio=None,
+                 execution=None, timeframe=None):
+    symbols = list(symbols or DEFAULT_SYMBOLS)
+    if isinstance(data, str):
+        data = load_ticks(data)
+    if isinstance(data, list):
+        arrays = frames_to_arrays(data, symbols)
+    elif isinstance(data, dict):
+        arrays = data
+    else:
+        arrays = data.aligned(symbols)
+    ai = ai or TradingAI(risk_level)
+    portfolio = portfolio or Portfolio(initial_balance, execution)
+    timeframe = timeframe or ai.timeframe
+
+    started = time.perf_counter()
+    # Equity is marked on every tick either way.
+    marks = _forward_fill(arrays["price"], arrays["present"] & (arrays["price"] > 0))
+    if timeframe:
+        with metrics.STAGE_SECONDS.time("bars"):
+            arrays = _bar_closes(arrays, timeframe)
+    prices, volumes, present = arrays["price"], arrays["volume"], arrays["present"]
+    n, m = prices.shape
+    quotes = _quote_source(arrays, portfolio.execution)
+    with metrics.STAGE_SECONDS.time("signals"):
+        ready, signals = compute_signals(ai, prices, volumes, present)
+    signal_rows = np.array(sorted({t for t, _ in signals}), dtype=np.int64)
+
+    decisions = np.zeros((n, m), dtype=np.int8)
+    position_sizes = np.zeros((n, m))
+    index = {sym: j for j, sym in enumerate(symbols)}
+    initial_cash = portfolio.balance
+    initial_qty = np.array([portfolio.holdings.get(sym, 0) for sym in symbols], dtype=float)
+    event_rows, event_balance, event_qty = [], [], []
+
+    t = 0
+    while t < n:
+        held = [index[sym] for sym in portfolio.holdings if sym in index]
+        t = _next_event(t, n, signal_rows, held, prices, ready, ai, portfolio, symbols)
+        if t >= n: break
+
+        for j, symbol in enumerate(symbols):
+            if not ready[t, j]: continue
+            price = float(prices[t, j])
+            avg_buy_price = portfolio.avg_buy_price.get(symbol)
+            if avg_buy_price and avg_buy_price > 0 and ai.should_exit(price, avg_buy_price):
+                decision, pos_size = SELL, 1.0
+            else:
+                decision, pos_size = signals.get((t, j), (HOLD, 0))
+            decisions[t, j] = decision
+            position_sizes[t, j] = pos_size
+
+            if decision == BUY and pos_size > 0:
+                portfolio.buy(symbol, price, pos_size, quotes(t, j))
+            elif decision == SELL and pos_size > 0:
+                qty_held = portfolio.holdings.get(symbol, 0)
+                if qty_held > 0:
+                    portfolio.sell(symbol, price, qty_held * pos_size, quotes(t, j))
+
+        event_rows.append(t)
+        event_balance.append(portfolio.balance)
+        event_qty.append([portfolio.holdings.get(sym, 0) for sym in symbols])
+        t += 1
+
+    segment = np.searchsorted(np.array(event_rows, dtype=np.int64), np.arange(n), side="right")
+    balance = np.array([initial_cash] + event_balance)
+    qty = np.vstack([initial_qty] + [np.array(q, dtype=float) for q in event_qty])
+    equity = balance[segment] + (qty[segment] * marks).sum(axis=1)
+
+    elapsed = time.perf_counter() - started
+    if metrics.enabled():
+        # Rows skipped between events are all HOLDs, so one pass at the end
+        # counts the same decisions the engine would, for every ready tick.
+        metrics.DECISIONS.inc_codes(decisions[ready], ACTIONS)
+        metrics.STAGE_SECONDS.observe(elapsed, "backtest")
+    return BacktestResult(symbols, decisions, position_sizes, equity, portfolio, n, elapsed)
+
+
+def write_trade_log(result, filename):
+    result.trade_log.export(filename)
+
+
+def _parse_time(parser, value):
+    if not value:
+        return None
+    seconds = timestamp_seconds([value])
+    if seconds is None:
+        parser.error(f"Cannot read {value!r} as epoch seconds or a date")
+    return float(seconds[0])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a headless backtest over a CSV of price snapshots.")
+    parser.add_argument("csv", help="CSV with timestamp,symbol,price,volume,bid,ask columns, or a tick store directory")
+    parser.add_argument("--start", help="Tick store only: first timestamp to replay (epoch seconds or a date)")
+    parser.add_argument("--end", help="Tick store only: replay up to, not including, this timestamp")
+    parser.add_argument("--risk", default="aggressive", choices=["aggressive", "moderate", "conservative"])
+    parser.add_argument("--balance", type=float, default=INITIAL_BALANCE)
+    parser.add_argument("--symbols", help="Comma-separated symbols (default: config.DEFAULT_SYMBOLS)")
+    parser.add_argument("--trades", help="Write the trade log to this CSV file")
+    parser.add_argument("--execution", default=EXECUTION_MODEL, choices=["last", "quote", "book"],
+                        help="Fill model: last price, bid/ask with fees and slippage, or L2 depth from --book")
+    parser.add_argument("--book", default=EXECUTION_BOOK_PATH, help="L2 snapshot file (JSON lines) for --execution book")
+    parser.add_argument("--timeframe", default=AI_TIMEFRAME,
+                        help="Decide once per bar of this timeframe (e.g. 1m) instead of on every tick")
+    parser.add_argument("--fee", type=float, default=EXECUTION_TAKER_FEE, help="Taker fee as a fraction of notional")
+    parser.add_argument("--no-cache", action="store_true", help="Re-parse the CSV instead of using the .npz cache")
+    parser.add_argument("--verbose", action="store_true", help="Log every simulated fill")
+    parser.add_argument("--metrics", action="store_true", help="Time each stage and count decisions, fills and skips")
+    parser.add_argument("--metrics-dump", help="Also write the metrics to this file in Prometheus text format")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+    symbols = args.symbols.split(",") if args.symbols else None
+
+    load_started = time.perf_counter()
+    if os.path.isdir(args.csv):
+        start, end = (_parse_time(parser, value) for value in (args.start, args.end))
+        data = TickStore(args.csv).aligned(symbols or DEFAULT_SYMBOLS, start, end)
+        loaded = f"{int(data['present'].sum())} ticks from the tick store"
+    else:
+        data = load_ticks(args.csv, use_cache=not args.no_cache)
+        loaded = f"{data.n_times} snapshots ({len(data)} ticks)"
+    load_elapsed = time.perf_counter() - load_started
+
+    try:
+        execution = create_execution(args.execution, args.book, taker_fee=args.fee)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if args.metrics or args.metrics_dump:
+        metrics.enable()
+    result = run_backtest(data, symbols, args.risk, args.balance, execution=execution, timeframe=args.timeframe)
+    summary = result.summary()
+    print(f"Loaded {loaded} in {load_elapsed:.3f}s")
+    print(f"Simulated {summary['ticks']} ticks x {summary['symbols']} symbols in {summary['elapsed_sec']:.3f}s "
+          f"({summary['ticks_per_sec']:,.0f} ticks/s)")
+    print(f"Trades: {summary['trades']} | Balance: ${summary['final_balance']:,.2f} | "
+          f"Equity: ${summary['final_equity']:,.2f} | P&L: ${summary['profit_loss']:,.2f} | Fees: ${summary['fees']:,.2f}")
+    if args.metrics or args.metrics_dump:
+        print(f"Metrics: {metrics.summary()}")
+        if args.metrics_dump:
+            metrics.dump(args.metrics_dump)
+    if args.trades:
+        write_trade_log(result, args.trades)
+
+
+if __name__ == "__main__":
+    main()
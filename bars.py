@@ -0,0 +1,182 @@
+import numpy as np
+from config import AI_EMA_MODE, AI_EMA_SPAN, AI_HISTORY_LIMIT, AI_RSI_MODE, AI_RSI_PERIOD, BAR_HISTORY, BAR_TIMEFRAMES
+from indicators import BatchIndicatorSet
+from ohlcv_cache import timeframe_seconds
+from ring_buffer import BatchRingBuffer
+
+# A bar is the ticks of one symbol within one timeframe-aligned interval.
+# `volume`, `bid` and `ask` are those of its last tick (ticker volume is a
+# rolling 24h figure, so it is not summed), and `ticks` counts the ticks.
+BAR_FIELDS = ("time", "open", "high", "low", "close", "volume", "bid", "ask", "ticks")
+TIME, OPEN, HIGH, LOW, CLOSE, VOLUME, BID, ASK, TICKS = range(len(BAR_FIELDS))
+
+
+def bar_snapshot(symbols, bars):
+    # Closed bars as a get_prices()-style snapshot, so TradingAI and the
+    # execution models take them like ticks: price is the close, the quote
+    # is the closing tick's.
+    columns = bars.T.tolist()
+    return {symbol: {"price": row[CLOSE], "volume": row[VOLUME], "bid": row[BID], "ask": row[ASK],
+                     "bar_time": row[TIME], "open": row[OPEN], "high": row[HIGH], "low": row[LOW], "ticks": row[TICKS]}
+            for symbol, row in zip(symbols, columns)}
+
+
+class BarAggregator:
+    """Streams ticks into OHLCV bars for several timeframes at once. The bars
+    being built for every symbol and timeframe sit in one (lanes,
+    timeframes, fields) array, so a tick costs the same few array operations
+    however many timeframes there are; only the timeframes where a bar
+    closes do more, appending it to their ring of the last `capacity` bars
+    and pushing its close into that timeframe's streaming indicators.
+    Memory is fixed per symbol and timeframe."""
+
+    def __init__(self, timeframes=BAR_TIMEFRAMES, capacity=BAR_HISTORY, ema_span=AI_EMA_SPAN,
+                 rsi_period=AI_RSI_PERIOD, volatility_window=AI_HISTORY_LIMIT, ema_mode=AI_EMA_MODE,
+                 rsi_mode=AI_RSI_MODE):
+        self.timeframes = sorted(set(timeframes), key=timeframe_seconds)
+        self.seconds = np.array([timeframe_seconds(tf) for tf in self.timeframes], dtype=np.int64)
+        self.indicator_settings = (ema_span, rsi_period, volatility_window, ema_mode, rsi_mode)
+        self.current = np.zeros((0, len(self.timeframes), len(BAR_FIELDS)))
+        # Interval number of each open bar; -1 while a lane has none.
+        self.bucket = np.zeros((0, len(self.timeframes)), dtype=np.int64)
+        self.history = [BatchRingBuffer(capacity, len(BAR_FIELDS)) for _ in self.timeframes]
+        self.indicator_sets = [BatchIndicatorSet(*self.indicator_settings) for _ in self.timeframes]
+        self.lanes = {}
+        self.free_lanes = []
+
+    @property
+    def size(self):
+        return len(self.bucket)
+
+    def lanes_for(self, symbols):
+        new = [symbol for symbol in symbols if symbol not in self.lanes]
+        if len(new) > len(self.free_lanes):
+            lanes = max(self.size + len(new) - len(self.free_lanes), 2 * self.size)
+            self.free_lanes.extend(range(self.size, lanes))
+            current = np.zeros((lanes,) + self.current.shape[1:])
+            current[:self.size] = self.current
+            bucket = np.full((lanes, len(self.timeframes)), -1, dtype=np.int64)
+            bucket[:self.size] = self.bucket
+            self.current, self.bucket = current, bucket
+            for history, indicators in zip(self.history, self.indicator_sets):
+                history.resize(lanes)
+                indicators.resize(lanes)
+        for symbol in new:
+            self.lanes[symbol] = self.free_lanes.pop(0)
+        return np.array([self.lanes[symbol] for symbol in symbols], dtype=np.int64)
+
+    def _reset_lanes(self, lanes):
+        self.bucket[lanes] = -1
+        for history, indicators in zip(self.history, self.indicator_sets):
+            history.reset(lanes)
+            indicators.reset(lanes)
+
+    def remove_symbol(self, symbol):
+        lane = self.lanes.pop(symbol, None)
+        if lane is not None:
+            self._reset_lanes(np.array([lane]))
+            self.free_lanes.append(lane)
+
+    def reset(self):
+        # Drops every bar, e.g. before replaying data from another period.
+        self._reset_lanes(np.arange(self.size))
+        self.lanes = {}
+        self.free_lanes = list(range(self.size))
+
+    def update(self, timestamp, prices):
+        # Feeds one snapshot ({symbol: {price, volume, bid, ask}}) taken at
+        # `timestamp` (epoch seconds). A symbol's bar closes on its first
+        # tick in a later interval; a tick from an earlier one (a clock step
+        # back) goes into the open bar. Returns {timeframe: (symbols, bars)}
+        # for the timeframes where bars closed, bars being (fields, symbols).
+        if not self.timeframes:
+            return {}
+        symbols = [symbol for symbol, data in prices.items() if (data["price"] or 0) > 0]
+        if not symbols:
+            return {}
+        lanes = self.lanes_for(symbols)
+        ticks = np.array([(prices[s]["price"], prices[s]["volume"], prices[s]["bid"], prices[s]["ask"])
+                          for s in symbols], dtype=np.float64)[:, None, :]
+        price = ticks[:, :, 0]
+        buckets = (timestamp // self.seconds).astype(np.int64)
+        lane_buckets = self.bucket[lanes]
+        current = self.current[lanes]
+        starting = lane_buckets < buckets
+
+        closed = {}
+        if starting.any():
+            closing = starting & (lane_buckets >= 0)
+            for i in np.flatnonzero(closing.any(axis=0)).tolist():
+                mask = closing[:, i]
+                bars = current[mask, i].T
+                self.history[i].append(lanes[mask], bars)
+                self.indicator_sets[i].update(lanes[mask], bars[CLOSE])
+                closed[self.timeframes[i]] = ([symbols[k] for k in np.flatnonzero(mask).tolist()], bars)
+            k, tf = np.nonzero(starting)
+            current[k, tf, TIME] = buckets[tf] * self.seconds[tf]
+            current[k, tf, OPEN] = current[k, tf, HIGH] = current[k, tf, LOW] = price[k, 0]
+            current[k, tf, TICKS] = 0
+            self.bucket[lanes] = np.where(starting, buckets, lane_buckets)
+
+        np.maximum(current[:, :, HIGH], price, out=current[:, :, HIGH])
+        np.minimum(current[:, :, LOW], price, out=current[:, :, LOW])
+        current[:, :, CLOSE:ASK + 1] = ticks
+        current[:, :, TICKS] += 1
+        self.current[lanes] = current
+        return closed
+
+    def bars(self, timeframe, symbol, n=None):
+        # The last n finished bars of a symbol, (fields, n), oldest first.
+        lane = self.lanes.get(symbol)
+        if lane is None:
+            return np.zeros((len(BAR_FIELDS), 0))
+        return self.history[self.timeframes.index(timeframe)].window(lane, n)
+
+    def indicators(self, timeframe, symbols):
+        # (ema, rsi, volatility) arrays over each symbol's finished bars, as
+        # TradingAI's indicators would give fed the same closes; NaN until a
+        # value is ready and for unknown symbols. O(1) per symbol, since the
+        # indicators stream as bars close.
+        indicators = self.indicator_sets[self.timeframes.index(timeframe)]
+        known = [k for k, symbol in enumerate(symbols) if symbol in self.lanes]
+        out = np.full((3, len(symbols)), np.nan)
+        if known:
+            lanes = np.array([self.lanes[symbols[k]] for k in known], dtype=np.int64)
+            out[:, known] = indicators.values(lanes)
+        return out[0], out[1], out[2]
+
+
+def close_events(arrays, times, timeframe):
+    # The batch twin of BarAggregator for backtests: given tick grids (like
+    # TickData.aligned()) and each row's epoch seconds, returns grids of the
+    # same shape where a cell is present only on the tick that closes a bar
+    # for that symbol, holding the closed bar. Feeding these rows in order
+    # matches what BarAggregator.update() returns tick by tick.
+    step = timeframe_seconds(timeframe)
+    buckets = (np.asarray(times, dtype=np.float64) // step).astype(np.int64)
+    n, m = arrays["price"].shape
+    out = {name: np.zeros((n, m)) for name in ("price", "volume", "bid", "ask", "open", "high", "low", "ticks")}
+    out["present"] = np.zeros((n, m), dtype=bool)
+    out["bar_time"] = np.zeros((n, m))
+    for j in range(m):
+        rows = np.flatnonzero(arrays["present"][:, j] & (arrays["price"][:, j] > 0))
+        # Running max, so a step back in time stays in the open bar as above.
+        b = np.maximum.accumulate(buckets[rows])
+        change = np.flatnonzero(b[1:] > b[:-1]) + 1
+        if not len(change):
+            continue
+        starts = np.concatenate(([0], change[:-1]))
+        last = rows[change - 1]
+        events = rows[change]
+        price = arrays["price"][rows[:change[-1]], j]
+        out["present"][events, j] = True
+        for name in ("price", "volume", "bid", "ask"):
+            out[name][events, j] = arrays[name][last, j]
+        out["open"][events, j] = price[starts]
+        out["high"][events, j] = np.maximum.reduceat(price, starts)
+        out["low"][events, j] = np.minimum.reduceat(price, starts)
+        out["ticks"][events, j] = change - starts
+        out["bar_time"][events, j] = b[starts] * step
+    if "timestamps" in arrays:
+        out["timestamps"] = arrays["timestamps"]
+    return out
@@ -0,0 +1,275 @@
+# Times each stage of the tick-to-decision path on synthetic random walks:
+#
+#     python -m benchmarks.run --sizes small,medium --out before.json
+#     python -m benchmarks.run --sizes small,medium --baseline before.json
+#
+# Every stage reports ticks/sec, p50/p99 latency per tick (per load for the
+# CSV stages) and the peak memory traced while it ran. With --baseline,
+# stages that got slower by more than --threshold are flagged and the exit
+# status is 1.
+import argparse
+import atexit
+import datetime
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from exchange_api import get_prices
+from portfolio import Portfolio
+from trading_ai import TradingAI
+from benchmarks.synthetic import SIZES, random_walk, snapshots, symbol_names, tickers, write_csv
+
+STAGES = ("parse", "decide", "fill", "valuation", "render", "csv_load", "csv_cached")
+RENDER_SYMBOLS = 10
+RENDER_TICKS = 500
+CSV_REPEATS = 3
+
+
+class Workload:
+    def __init__(self, name, symbols, ticks, history, seed=0):
+        self.name = name
+        self.history = history
+        self.symbols = symbol_names(symbols)
+        self.arrays = random_walk(self.symbols, ticks, seed)
+        self.snapshots = snapshots(self.arrays, self.symbols)
+
+    @property
+    def ticks(self):
+        return len(self.snapshots)
+
+
+class FakeExchange:
+    # Stands in for the ccxt client: fetch_tickers returns the prepared tick.
+    has = {"fetchTickers": True}
+
+    def __init__(self):
+        self.current = {}
+
+    def fetch_tickers(self, symbols):
+        return self.current
+
+
+def stage_parse(workload):
+    client = FakeExchange()
+
+    def step(item):
+        client.current = item
+        get_prices(workload.symbols, client=client)
+    return step, [tickers(snapshot) for snapshot in workload.snapshots]
+
+
+def stage_decide(workload):
+    ai = TradingAI("moderate")
+    ai.history_limit = workload.history
+    avg_buy_prices = {}
+    return lambda snapshot: ai.decide_batch(snapshot, avg_buy_prices), workload.snapshots
+
+
+def stage_fill(workload):
+    # One buy and one partial sell per tick, rotating through the symbols,
+    # against the configured execution model.
+    portfolio = Portfolio(1e9)
+    symbols = workload.symbols
+
+    def step(item):
+        t, snapshot = item
+        symbol = symbols[t % len(symbols)]
+        quote = snapshot[symbol]
+        portfolio.buy(symbol, quote["price"], 0.0001, quote)
+        portfolio.sell(symbol, quote["price"], portfolio.holdings.get(symbol, 0) * 0.5, quote)
+    return step, list(enumerate(workload.snapshots))
+
+
+def stage_valuation(workload):
+    # Marks a portfolio holding every symbol and reads P&L and holdings.
+    portfolio = Portfolio(1e12)
+    for symbol, data in workload.snapshots[0].items():
+        portfolio.buy(symbol, data["price"], 1.0 / len(workload.symbols), data)
+
+    def step(snapshot):
+        portfolio.mark(snapshot)
+        portfolio.get_holdings_detail()
+        return portfolio.profit_loss
+    return step, workload.snapshots
+
+
+def stage_render(workload):
+    # LiveChart off-screen, redrawn on every tick (the worst case; the UI
+    # redraws at most every CHART_REFRESH_MS).
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    from ui.sci_fi_ui import LiveChart
+    chart = LiveChart()
+    chart.timer.stop()
+    chart.resize(600, 400)
+    chart.draw()
+    symbols = workload.symbols[:RENDER_SYMBOLS]
+    frames = [{symbol: snapshot[symbol] for symbol in symbols} for snapshot in workload.snapshots[:RENDER_TICKS]]
+
+    def step(item):
+        t, prices = item
+        chart.update_plot(t, prices, 1000.0 + t, float(t))
+        chart.refresh()
+        app.processEvents()
+    return step, list(enumerate(frames))
+
+
+def _csv_stage(workload, cached):
+    from data_loader import load_ticks
+    directory = tempfile.mkdtemp(prefix="bench-")
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    path = os.path.join(directory, f"{workload.name}.csv")
+    write_csv(path, workload.arrays, workload.symbols)
+    if cached:
+        load_ticks(path, cache_dir=directory)
+
+    def step(item):
+        load_ticks(path, use_cache=cached, cache_dir=directory)
+    return step, list(range(CSV_REPEATS))
+
+
+STAGE_SETUP = {
+    "parse": stage_parse,
+    "decide": stage_decide,
+    "fill": stage_fill,
+    "valuation": stage_valuation,
+    "render": stage_render,
+    "csv_load": lambda workload: _csv_stage(workload, cached=False),
+    "csv_cached": lambda workload: _csv_stage(workload, cached=True),
+}
+
+
+def _timed(step, items):
+    latencies = np.empty(len(items))
+    perf_counter = time.perf_counter
+    started = perf_counter()
+    for i, item in enumerate(items):
+        t = perf_counter()
+        step(item)
+        latencies[i] = perf_counter() - t
+    return perf_counter() - started, latencies
+
+
+def run_stage(workload, stage, memory=True):
+    step, items = STAGE_SETUP[stage](workload)
+    elapsed, latencies = _timed(step, items)
+    peak = None
+    if memory:
+        # A second, traced pass on fresh state: tracing slows everything
+        # down, so it is kept out of the timings.
+        step, items = STAGE_SETUP[stage](workload)
+        tracemalloc.start()
+        _timed(step, items)
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    # For the CSV stages one item is a whole file, so throughput counts
+    # rows; elsewhere one item is one tick.
+    rows = len(workload.symbols) * workload.ticks if stage.startswith("csv") else 1
+    p50, p99 = np.percentile(latencies, (50, 99))
+    return {
+        "size": workload.name,
+        "symbols": len(workload.symbols),
+        "ticks": workload.ticks,
+        "history": workload.history,
+        "stage": stage,
+        "items": len(items),
+        "seconds": float(elapsed),
+        "ticks_per_sec": float(len(items) * rows / elapsed) if elapsed > 0 else float("inf"),
+        "p50_us": float(p50) * 1e6,
+        "p99_us": float(p99) * 1e6,
+        "peak_mb": peak,
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    # Regressions: throughput down, or p99 latency up, by more than threshold.
+    previous = {(r["size"], r["stage"]): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        old = previous.get((r["size"], r["stage"]))
+        if old is None:
+            continue
+        if r["ticks_per_sec"] < old["ticks_per_sec"] * (1 - threshold):
+            regressions.append(f"{r['size']}/{r['stage']}: {old['ticks_per_sec']:,.0f} -> "
+                               f"{r['ticks_per_sec']:,.0f} ticks/s")
+        if r["p99_us"] > old["p99_us"] * (1 + threshold):
+            regressions.append(f"{r['size']}/{r['stage']}: p99 {old['p99_us']:,.1f} -> {r['p99_us']:,.1f} us")
+    return regressions
+
+
+def print_results(results):
+    print(f"{'size':<8} {'stage':<11} {'ticks/s':>12} {'p50 us':>10} {'p99 us':>10} {'peak MB':>8}")
+    for r in results:
+        peak = f"{r['peak_mb']:.2f}" if r["peak_mb"] is not None else "-"
+        print(f"{r['size']:<8} {r['stage']:<11} {r['ticks_per_sec']:>12,.0f} {r['p50_us']:>10,.1f} "
+              f"{r['p99_us']:>10,.1f} {peak:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the tick-to-decision hot path on synthetic data.")
+    parser.add_argument("--sizes", default="small,medium", help=f"Comma-separated, from: {', '.join(SIZES)}")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated stages to run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced pass that measures peak memory")
+    parser.add_argument("--out", default="benchmark.json", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against an earlier results file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before flagging, e.g. 0.25")
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(logging.ERROR)
+
+    stages = args.stages.split(",")
+    unknown = [name for name in args.sizes.split(",") if name not in SIZES] + \
+        [stage for stage in stages if stage not in STAGE_SETUP]
+    if unknown:
+        parser.error(f"Unknown size or stage: {', '.join(unknown)}")
+
+    results = []
+    for name in args.sizes.split(","):
+        workload = Workload(name, *SIZES[name], seed=args.seed)
+        for stage in stages:
+            try:
+                results.append(run_stage(workload, stage, memory=not args.no_memory))
+            except ImportError as e:
+                # The render stage needs PyQt5 and matplotlib.
+                logging.error(f"Skipping {name}/{stage}: {e}")
+    print_results(results)
+
+    report = {"environment": environment(), "seed": args.seed, "results": results}
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import csv
+import numpy as np
+
+# Named workloads: symbols x ticks x TradingAI history limit.
+SIZES = {
+    "small": (5, 2_000, 50),
+    "medium": (20, 10_000, 100),
+    "large": (100, 20_000, 200),
+}
+
+
+def symbol_names(count):
+    return [f"SYM{i:03d}/USDT" for i in range(count)]
+
+
+def random_walk(symbols, ticks, seed=0, volatility=0.004, spread=1e-4):
+    # Geometric random walks, one column per symbol, as (ticks, symbols)
+    # grids shaped like TickData.aligned(); the same seed always gives the
+    # same data.
+    rng = np.random.default_rng(seed)
+    start = rng.uniform(1.0, 50_000.0, len(symbols))
+    price = np.round(start * np.exp(np.cumsum(rng.normal(0.0, volatility, (ticks, len(symbols))), axis=0)), 6)
+    return {
+        "price": price,
+        "volume": rng.uniform(1e5, 1e6, (ticks, len(symbols))),
+        "bid": price * (1 - spread),
+        "ask": price * (1 + spread),
+        "present": np.ones((ticks, len(symbols)), dtype=bool),
+    }
+
+
+def snapshots(arrays, symbols):
+    # The same data as get_prices()-style {symbol: {price, volume, bid, ask}}
+    # dicts, one per tick.
+    columns = [arrays[field].tolist() for field in ("price", "volume", "bid", "ask")]
+    return [{symbol: {"price": columns[0][t][j], "volume": columns[1][t][j], "bid": columns[2][t][j],
+                      "ask": columns[3][t][j]} for j, symbol in enumerate(symbols)}
+            for t in range(len(columns[0]))]
+
+
+def tickers(snapshot):
+    # ccxt fetch_tickers() output for a snapshot, for timing get_prices.
+    return {symbol: {"symbol": symbol, "last": data["price"], "quoteVolume": data["volume"], "bid": data["bid"],
+                     "ask": data["ask"]} for symbol, data in snapshot.items()}
+
+
+def write_csv(path, arrays, symbols):
+    # A backtest CSV (timestamp,symbol,price,volume,bid,ask) of the grids.
+    with open(path, "w", newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp", "symbol", "price", "volume", "bid", "ask"])
+        for t, row in enumerate(zip(*(arrays[field].tolist() for field in ("price", "volume", "bid", "ask")))):
+            for j, symbol in enumerate(symbols):
+                writer.writerow([1_700_000_000 + t, symbol, row[0][j], row[1][j], row[2][j], row[3][j]])
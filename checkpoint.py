@@ -0,0 +1,281 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import numpy as np
+from config import CHECKPOINT_INTERVAL, CHECKPOINT_PATH
+from indicators import BatchIndicatorSet
+from ring_buffer import BatchRingBuffer
+
+# Bumped whenever the layout below changes; older files are ignored.
+CHECKPOINT_VERSION = 1
+
+# A checkpoint is one uncompressed .npz: the TradingAI lane histories and
+# indicator state as their raw arrays (keys like "ai.history.data" or
+# "ai.indicators.rsi.gains.total"), the engine's open and finished bars
+# and their indicators ("bars.current", "bars.history.1m.data",
+# "bars.indicators.1m.rsi.gains.total", ...), the ledger's resident fills,
+# and a "meta" JSON string with the portfolio and everything else.
+# Restoring puts the arrays back as they were, so indicators continue bit
+# for bit where the last session stopped instead of warming up for
+# AI_HISTORY_LIMIT ticks, and bars open before the restart close as usual.
+
+
+def _collect_arrays(obj, prefix, out):
+    for name, value in vars(obj).items():
+        if isinstance(value, np.ndarray):
+            out[f"{prefix}{name}"] = value.copy()
+        elif hasattr(value, "__dict__") and not callable(value):
+            _collect_arrays(value, f"{prefix}{name}.", out)
+
+
+def _assign_arrays(obj, prefix, arrays):
+    # Every array must land on an existing array attribute of the same dtype
+    # and rank; anything else means the checkpoint was made by different code.
+    expected = {}
+    _collect_arrays(obj, prefix, expected)
+    saved = {key for key in arrays if key.startswith(prefix)}
+    if saved != set(expected):
+        raise ValueError(f"checkpoint arrays under {prefix} do not match this version")
+    assigned = []
+    for key in sorted(saved):
+        value = arrays[key]
+        *path, name = key[len(prefix):].split(".")
+        target = obj
+        for part in path:
+            target = getattr(target, part, None)
+        current = getattr(target, name, None)
+        if not isinstance(current, np.ndarray) or current.dtype != value.dtype or current.ndim != value.ndim:
+            raise ValueError(f"checkpoint array {key} does not match this version")
+        assigned.append((target, name, value))
+    for target, name, value in assigned:
+        setattr(target, name, value)
+
+
+def _collect_bars(bars, out):
+    out["bars.current"] = bars.current.copy()
+    out["bars.bucket"] = bars.bucket.copy()
+    for timeframe, history, indicators in zip(bars.timeframes, bars.history, bars.indicator_sets):
+        _collect_arrays(history, f"bars.history.{timeframe}.", out)
+        _collect_arrays(indicators, f"bars.indicators.{timeframe}.", out)
+
+
+def _restore_bars(state, saved, bars):
+    if (saved["timeframes"] != bars.timeframes or saved["capacity"] != bars.history[0].capacity
+            or tuple(saved.get("indicator_settings", ())) != bars.indicator_settings):
+        logging.warning("Checkpoint bar settings differ from the current ones; bars will start afresh.")
+        return False
+    current, bucket = state["bars.current"], state["bars.bucket"]
+    if current.shape[1:] != bars.current.shape[1:] or bucket.dtype != bars.bucket.dtype:
+        logging.warning("Could not restore bars: checkpoint arrays do not match this version")
+        return False
+    histories, indicator_sets = [], []
+    for timeframe in bars.timeframes:
+        history = BatchRingBuffer(bars.history[0].capacity, bars.history[0].width)
+        indicators = BatchIndicatorSet(*bars.indicator_settings)
+        try:
+            _assign_arrays(history, f"bars.history.{timeframe}.", state)
+            _assign_arrays(indicators, f"bars.indicators.{timeframe}.", state)
+        except ValueError as e:
+            logging.warning(f"Could not restore bars: {e}")
+            return False
+        histories.append(history)
+        indicator_sets.append(indicators)
+    bars.current, bars.bucket, bars.history, bars.indicator_sets = current, bucket, histories, indicator_sets
+    bars.lanes = dict(saved["lanes"])
+    bars.free_lanes = list(saved["free_lanes"])
+    return True
+
+
+def capture(ai, portfolio, since=0, bars=None):
+    # Copies everything a restart needs. Runs on the thread that owns `ai`,
+    # `portfolio` and the engine's `bars` (the engine thread), between
+    # ticks; the copies are then safe to hand to another thread. Only ledger
+    # fills from index `since` on are copied (see Checkpointer).
+    arrays = {}
+    meta = {
+        "version": CHECKPOINT_VERSION,
+        "saved_at": time.time(),
+        "portfolio": {
+            "initial_balance": portfolio.initial_balance,
+            "balance": portfolio.balance,
+            "holdings": portfolio.holdings,
+            "avg_buy_price": portfolio.avg_buy_price,
+            "marks": portfolio.marks,
+            "realized_pnl": portfolio.realized_pnl,
+        },
+    }
+    if ai.batch_history is not None:
+        _collect_arrays(ai.batch_history, "ai.history.", arrays)
+        _collect_arrays(ai.batch_indicators, "ai.indicators.", arrays)
+        meta["ai"] = {
+            "indicator_key": list(ai.indicator_key()),
+            "lanes": ai.lanes,
+            "free_lanes": ai.free_lanes,
+        }
+    if bars is not None and bars.timeframes:
+        _collect_bars(bars, arrays)
+        meta["bars"] = {
+            "timeframes": bars.timeframes,
+            "capacity": bars.history[0].capacity,
+            "indicator_settings": list(bars.indicator_settings),
+            "lanes": bars.lanes,
+            "free_lanes": bars.free_lanes,
+        }
+    ledger = portfolio.get_trade_log()
+    start = max(since, ledger.total - len(ledger))
+    arrays["ledger.rows"] = ledger.tail(ledger.total - start)
+    meta["ledger"] = {"symbols": ledger.symbols, "total": ledger.total, "total_fees": ledger.total_fees}
+    # json.dumps copies the dicts too, and writes floats exactly (repr).
+    arrays["meta"] = np.array(json.dumps(meta))
+    return arrays
+
+
+def write(arrays, path):
+    # Written beside the target, synced and renamed over it, so a crash
+    # mid-write leaves the previous checkpoint intact.
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load(path):
+    # The arrays of a checkpoint file, with "meta" decoded, or None if there
+    # is no usable checkpoint.
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+        meta = json.loads(str(arrays.pop("meta")))
+    except (OSError, ValueError, KeyError) as e:
+        logging.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+        return None
+    if meta.get("version") != CHECKPOINT_VERSION:
+        logging.warning(f"Ignoring checkpoint {path}: version {meta.get('version')}, expected {CHECKPOINT_VERSION}")
+        return None
+    arrays["meta"] = meta
+    return arrays
+
+
+def restore(state, ai, portfolio, bars=None):
+    # Applies a load() result to a fresh TradingAI and Portfolio, and to the
+    # BarAggregator the engine will use (before the engine starts). The risk
+    # level stays as configured. The AI part is skipped if its indicator
+    # settings have changed since the checkpoint, since the saved state
+    # would not match; it then warms up as usual. Bars are likewise skipped
+    # if the timeframes have changed. Returns True if the AI state was
+    # restored.
+    meta = state["meta"]
+    p = meta["portfolio"]
+    portfolio.restore(p["initial_balance"], p["balance"], p["holdings"], p["avg_buy_price"], p["marks"],
+                      p["realized_pnl"])
+    ledger = meta["ledger"]
+    portfolio.get_trade_log().restore(state["ledger.rows"], ledger["symbols"], ledger["total"], ledger["total_fees"])
+    if bars is not None and bars.timeframes and "bars" in meta:
+        _restore_bars(state, meta["bars"], bars)
+
+    saved = meta.get("ai")
+    if saved is None:
+        return False
+    if tuple(saved["indicator_key"]) != ai.indicator_key():
+        logging.warning("Checkpoint indicator settings differ from the current ones; the AI will warm up again.")
+        return False
+    ai.lanes_for([])
+    history, indicators = ai.batch_history, ai.batch_indicators
+    try:
+        _assign_arrays(history, "ai.history.", state)
+        _assign_arrays(indicators, "ai.indicators.", state)
+    except ValueError as e:
+        logging.warning(f"Could not restore AI state: {e}")
+        ai.batch_history = ai.batch_indicators = None
+        return False
+    ai.lanes = dict(saved["lanes"])
+    ai.free_lanes = list(saved["free_lanes"])
+    return True
+
+
+def resume(path, ai, portfolio, bars=None):
+    # load() + restore(), logging what was picked up and how long it took.
+    started = time.perf_counter()
+    state = load(path)
+    if state is None:
+        return False
+    warm = restore(state, ai, portfolio, bars)
+    meta = state["meta"]
+    age = time.time() - meta["saved_at"]
+    logging.info(f"Resumed from {path} ({age:.0f}s old) in {(time.perf_counter() - started) * 1000:.1f} ms: "
+                 f"balance ${portfolio.balance:,.2f}, {len(portfolio.holdings)} holdings, "
+                 f"{meta['ledger']['total']} trades, " +
+                 (f"{len(ai.lanes)} symbols warm" if warm else "AI warming up"))
+    return True
+
+
+class Checkpointer:
+    """Periodic checkpoints from the engine thread. save() captures the state
+    on the caller's thread and hands it to a writer thread. The AI and
+    portfolio state is small; of the ledger only the fills since the last
+    save are copied, and the writer appends them to its own copy of the
+    resident rows. If the disk falls behind, captures are merged and only
+    the newest is written."""
+
+    def __init__(self, path=CHECKPOINT_PATH, interval=CHECKPOINT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.last_saved = time.monotonic()
+        self.pending = queue.Queue()
+        self.writer = None
+        self.generation = None
+        self.copied = 0
+        # Writer thread only: the ledger rows so far, and the ledger index
+        # just past the last of them.
+        self.rows = None
+        self.rows_end = 0
+        self.rows_generation = None
+
+    def due(self):
+        return time.monotonic() - self.last_saved >= self.interval
+
+    def save(self, ai, portfolio, bars=None):
+        self.last_saved = time.monotonic()
+        ledger = portfolio.get_trade_log()
+        if ledger.generation != self.generation:
+            self.generation = ledger.generation
+            self.copied = 0
+        start = max(self.copied, ledger.total - len(ledger))
+        arrays = capture(ai, portfolio, start, bars)
+        self.copied = ledger.total
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._write_loop, daemon=True, name="Checkpointer")
+            self.writer.start()
+        self.pending.put((arrays, self.generation, start, ledger.capacity))
+
+    def _merge_rows(self, arrays, generation, start, capacity):
+        new = arrays["ledger.rows"]
+        rows = new
+        if self.rows is not None and generation == self.rows_generation and start == self.rows_end:
+            rows = np.concatenate((self.rows, new))[-capacity:]
+        self.rows, self.rows_end, self.rows_generation = rows, start + len(new), generation
+        arrays["ledger.rows"] = rows
+
+    def _write_loop(self):
+        while True:
+            arrays, generation, start, capacity = self.pending.get()
+            try:
+                self._merge_rows(arrays, generation, start, capacity)
+                if self.pending.empty():
+                    write(arrays, self.path)
+            except OSError as e:
+                logging.error(f"Could not write checkpoint {self.path}: {e}")
+            finally:
+                self.pending.task_done()
+
+    def flush(self):
+        # Waits until the last save() is on disk.
+        if self.writer is not None:
+            self.pending.join()
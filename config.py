@@ -11,9 +11,34 @@ AI_RISK_POSITION_LIMITS = {
     "conservative": 0.2
 }
 AI_HISTORY_LIMIT = 14
+# "simple" keeps the original windowed mean / sum-of-moves RSI; "exponential"
+# and "wilder" switch to the classic recursive smoothers.
+AI_EMA_SPAN = 5
+AI_EMA_MODE = "simple"
+AI_RSI_PERIOD = 14
+AI_RSI_MODE = "simple"
+AI_RSI_BUY_BELOW = 35
+AI_RSI_SELL_ABOVE = 65
+AI_STOP_LOSS = 0.95
+AI_TAKE_PROFIT = 1.10
+# None decides on every tick. A timeframe such as "1m" decides once per bar
+# instead, on its close, and warm-starts from candles of that timeframe.
+AI_TIMEFRAME = None
+# decide_batch() steps snapshots with fewer symbols than this one symbol at
+# a time; below it NumPy's per-call overhead outweighs vectorizing.
+AI_BATCH_MIN_SYMBOLS = 16
 
 INITIAL_BALANCE = 1000.0
 
+PRICE_POLL_INTERVAL = 1.0
+PRICE_FEED_MAX_CONCURRENCY = 8
+PRICE_FEED_TIMEOUT = 5.0
+
+# "async" (concurrent REST polling), "rest" (one bulk poll per interval) or
+# "stream" (ticks pushed over a socket, e.g. by market_data.ReplayServer).
+MARKET_DATA_SOURCE = "async"
+MARKET_DATA_STREAM_ADDRESS = ("127.0.0.1", 9100)
+
 BINANCE_MARKET_RULES = {
     "BTC/USDT": {
         "price": {"precision": 2},
@@ -42,5 +67,110 @@ BINANCE_MARKET_RULES = {
     }
 }
 
+# Optional cached Binance exchange info (python market_rules.py <path> saves
+# it); its tick sizes, step sizes and minimums override the table above.
+MARKET_RULES_PATH = None
+
+# Backtest CSVs are parsed in chunks of this many rows and cached as .npz;
+# a cache dir of None keeps the cache next to the CSV.
+DATA_LOAD_CHUNK_ROWS = 1_000_000
+DATA_CACHE_DIR = None
+
+# Points kept per chart series, and the chart's redraw period (independent
+# of how fast ticks arrive).
+CHART_HISTORY = 100
+CHART_REFRESH_MS = 100
+
+# The trading engine thread handles up to ENGINE_MAX_BATCH queued ticks per
+# published state and keeps the last ENGINE_LATENCY_WINDOW latencies.
+ENGINE_MAX_BATCH = 256
+ENGINE_LATENCY_WINDOW = 1024
+
+# How simulated orders fill: "last" (last price, no fee), "quote" (buys at
+# the ask, sells at the bid, a fee and volume-based slippage) or "book"
+# (walk L2 snapshots from EXECUTION_BOOK_PATH, a JSON-lines file). Fees are
+# fractions of notional; slippage is EXECUTION_IMPACT * sqrt(order notional /
+# quoted volume), capped at EXECUTION_MAX_SLIPPAGE. "maker" liquidity fills
+# passively at the near side of the spread with the maker fee.
+EXECUTION_MODEL = "last"
+EXECUTION_TAKER_FEE = 0.001
+EXECUTION_MAKER_FEE = 0.001
+EXECUTION_LIQUIDITY = "taker"
+EXECUTION_IMPACT = 0.1
+EXECUTION_MAX_SLIPPAGE = 0.05
+EXECUTION_BOOK_PATH = None
+
+# simulation.py keeps a smaller decision log per strategy, since it runs
+# hundreds of them in one process.
+SIMULATION_DECISION_LOG_CAPACITY = 10_000
+
+# Seconds between summary lines from `python headless.py live`.
+HEADLESS_REPORT_INTERVAL = 10.0
+
+# Labels, holdings and the trade log repaint at most this many times a
+# second; ticks are processed as they arrive. Backtest replay feeds
+# BACKTEST_TICKS_PER_STEP snapshots every BACKTEST_TICK_INTERVAL_MS.
+UI_REFRESH_HZ = 10
+BACKTEST_TICK_INTERVAL_MS = 200
+BACKTEST_TICKS_PER_STEP = 1
+
+# Live snapshots can be recorded into a memory-mapped tick store (one
+# append-only file per symbol) and replayed later by backtest.py.
+TICK_STORE_DIR = "tick_store"
+TICK_STORE_RECORD = False
+
+# Decisions are kept in a fixed-size in-memory ring. HOLD records can be
+# sampled (keep 1 in N); set a spill path to stream the full log to CSV.
+DECISION_LOG_CAPACITY = 100_000
+DECISION_LOG_HOLD_SAMPLE = 1
+DECISION_LOG_SPILL_PATH = None
+DECISION_LOG_SPILL_CHUNK = 10_000
+
+# Fills are kept in a columnar ledger of at most TRADE_LEDGER_CAPACITY rows
+# in memory; set a journal path to also append every live fill (the
+# TradingEngine's, the UI's and headless runs', not backtests or
+# simulations) to a CSV, written in batches of TRADE_JOURNAL_CHUNK. The UI
+# trade list shows the newest UI_TRADE_LOG_ROWS fills.
+TRADE_LEDGER_CAPACITY = 100_000
+TRADE_JOURNAL_PATH = None
+TRADE_JOURNAL_CHUNK = 1_000
+UI_TRADE_LOG_ROWS = 1_000
+
+# Warm start: symbols are seeded with the closes of their newest
+# AI_HISTORY_LIMIT candles, so decisions start on the first live tick. Candles
+# are cached per symbol in OHLCV_CACHE_DIR (the newest OHLCV_CACHE_BARS) and
+# topped up from the exchange when online. Caches whose newest candle is
+# older than OHLCV_MAX_AGE seconds are not used.
+WARM_START = True
+OHLCV_TIMEFRAME = "1m"
+OHLCV_CACHE_DIR = "ohlcv_cache"
+OHLCV_CACHE_BARS = 500
+OHLCV_MAX_AGE = 3600.0
+
+# The trading engine aggregates ticks into OHLCV bars for AI_TIMEFRAME and
+# any extra BAR_TIMEFRAMES, e.g. ("1m", "1h"), keeping the newest BAR_HISTORY
+# finished bars per symbol and timeframe. With neither set, ticks skip bar
+# work entirely.
+BAR_TIMEFRAMES = ()
+BAR_HISTORY = 200
+
+# Paper-trading sessions can be checkpointed: AI histories and indicator
+# state, the portfolio and the resident trade ledger are saved to
+# CHECKPOINT_PATH every CHECKPOINT_INTERVAL seconds and on exit, and restored
+# at startup so trading resumes without a warm-up. None disables it.
+CHECKPOINT_PATH = None
+CHECKPOINT_INTERVAL = 30.0
+
+# Hot-path instrumentation (metrics.py): stage timers, counters and
+# histograms. Off by default; it can also be switched at runtime. When on, a
+# summary is logged every METRICS_LOG_INTERVAL seconds, the Prometheus text is
+# written to METRICS_DUMP_PATH if set, and served on
+# http://METRICS_HOST:METRICS_PORT/metrics if a port is set.
+METRICS_ENABLED = False
+METRICS_LOG_INTERVAL = 60.0
+METRICS_DUMP_PATH = None
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = None
+
 LOG_LEVEL = "INFO"
 LOG_FILE = "trade_log.log"
\ No newline at end of file
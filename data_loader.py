@@ -0,0 +1,249 @@
+import hashlib
+import logging
+import os
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from pandas.tseries.api import guess_datetime_format
+from config import DATA_CACHE_DIR, DATA_LOAD_CHUNK_ROWS
+
+FIELDS = ("price", "volume", "bid", "ask")
+CACHE_VERSION = 1
+
+
+class TickData:
+    """A backtest CSV held as typed columns: one row per tick, with the
+    timestamp and symbol stored as small integer codes into `timestamps`
+    (distinct, in time order) and `symbols` (in order of first appearance)."""
+
+    def __init__(self, timestamps, symbols, time_index, symbol_index, columns):
+        self.timestamps = timestamps
+        self.symbols = symbols
+        self.time_index = time_index
+        self.symbol_index = symbol_index
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.time_index)
+
+    @property
+    def n_times(self):
+        return len(self.timestamps)
+
+    def aligned(self, symbols=None):
+        # (n_times, n_symbols) grids shaped like frames_to_arrays() output;
+        # ticks for symbols not asked for are dropped.
+        symbols = list(symbols) if symbols is not None else list(self.symbols)
+        lookup = {sym: j for j, sym in enumerate(symbols)}
+        column_of = np.array([lookup.get(sym, -1) for sym in self.symbols], dtype=np.int64)
+        j = column_of[self.symbol_index] if len(self.symbols) else np.zeros(0, dtype=np.int64)
+        keep = j >= 0
+        t, j = self.time_index[keep], j[keep]
+
+        shape = (self.n_times, len(symbols))
+        arrays = {field: np.zeros(shape) for field in FIELDS}
+        arrays["present"] = np.zeros(shape, dtype=bool)
+        arrays["present"][t, j] = True
+        for field in FIELDS:
+            arrays[field][t, j] = self.columns[field][keep]
+        arrays["timestamps"] = self.timestamps
+        return arrays
+
+    def times(self):
+        # Epoch seconds per distinct timestamp, or 0, 1, 2, ... when the
+        # timestamps cannot be read as times.
+        seconds = timestamp_seconds(self.timestamps)
+        return seconds if seconds is not None else np.arange(self.n_times, dtype=np.float64)
+
+    def symbol_arrays(self, symbol):
+        rows = np.flatnonzero(self.symbol_index == self.symbols.index(symbol))
+        rows = rows[np.argsort(self.time_index[rows], kind="stable")]
+        return {"time_index": self.time_index[rows], **{field: self.columns[field][rows] for field in FIELDS}}
+
+    def frames(self):
+        # The list-of-dicts form ({symbol: {price, volume, bid, ask}} per
+        # timestamp) still used by the UI replay and the tick server.
+        order = np.argsort(self.time_index, kind="stable")
+        bounds = np.searchsorted(self.time_index[order], np.arange(self.n_times + 1)).tolist()
+        symbols = self.symbols
+        sym = self.symbol_index[order].tolist()
+        values = [self.columns[field][order].tolist() for field in FIELDS]
+        frames = []
+        for t in range(self.n_times):
+            frame = {}
+            for k in range(bounds[t], bounds[t + 1]):
+                frame[symbols[sym[k]]] = {field: values[f][k] for f, field in enumerate(FIELDS)}
+            frames.append(frame)
+        return frames
+
+
+def _read_chunks(path, chunk_rows):
+    header = pd.read_csv(path, nrows=0).columns
+    dtypes = {"timestamp": "category", "symbol": "category", **{field: np.float64 for field in FIELDS if field in header}}
+    # round_trip keeps prices bit-identical to float() on the same text.
+    reader = pd.read_csv(path, usecols=lambda name: name in dtypes, dtype=dtypes, chunksize=chunk_rows,
+                         float_precision="round_trip")
+    for chunk in reader:
+        yield chunk.reindex(columns=["timestamp", "symbol", *FIELDS])
+
+
+def timestamp_seconds(values):
+    # Epoch seconds for timestamps given as numbers or as dates in one format
+    # (ISO 8601 or whatever format the first value implies); None when they
+    # are neither and only their spelling is known.
+    values = pd.Index(np.asarray(values).astype(str))
+    if not len(values):
+        return np.zeros(0)
+    numeric = pd.to_numeric(values, errors="coerce")
+    if not numeric.isna().any():
+        return numeric.to_numpy(np.float64)
+    for fmt in ("ISO8601", guess_datetime_format(values[0])):
+        if fmt is None:
+            continue
+        parsed = pd.to_datetime(values, utc=True, format=fmt, errors="coerce")
+        if not parsed.isna().any():
+            return (parsed - pd.Timestamp(0, tz="UTC")).total_seconds().to_numpy(np.float64)
+    return None
+
+
+def _time_order(values):
+    # Sort distinct timestamps by what they mean, not how they spell; plain
+    # string order is only the fallback.
+    seconds = timestamp_seconds(values)
+    if seconds is None:
+        logging.warning("Timestamps are not numeric or dates in one format; ordering them as strings.")
+        return np.argsort(np.asarray(values).astype(str), kind="stable")
+    return np.argsort(seconds, kind="stable")
+
+
+def _count_lines(path, block_size=1 << 20):
+    lines = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            lines += block.count(b"\n")
+    return lines
+
+
+def parse_ticks(path, chunk_rows=DATA_LOAD_CHUNK_ROWS):
+    # Reads in chunks so only one chunk of raw text is in memory at a time;
+    # timestamps and symbols stay categorical, so what accumulates is a few
+    # numeric columns plus one integer code per tick. The numeric columns
+    # are sized from a line count up front and filled in place, so they are
+    # never held twice.
+    capacity = _count_lines(path) + 1
+    timestamps, symbols = [], []
+    columns = {field: np.empty(capacity) for field in FIELDS}
+    rows = 0
+    for chunk in _read_chunks(path, chunk_rows):
+        timestamps.append(chunk["timestamp"])
+        symbols.append(chunk["symbol"])
+        for field in FIELDS:
+            columns[field][rows:rows + len(chunk)] = chunk[field].fillna(0.0).to_numpy(np.float64)
+        rows += len(chunk)
+
+    if not timestamps:
+        empty = np.zeros(0, dtype=np.int64)
+        return TickData(np.array([], dtype=str), [], empty, empty, {field: np.zeros(0) for field in FIELDS})
+
+    ts = union_categoricals(timestamps, ignore_order=True)
+    sym = union_categoricals(symbols, ignore_order=True)
+    del timestamps, symbols
+    # Rows without a timestamp or symbol cannot be placed; skip them.
+    keep = (ts.codes >= 0) & (sym.codes >= 0)
+    order = _time_order(ts.categories)
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+
+    # Symbols keep the order they first appear in, like the old dict grouping.
+    sym_codes = sym.codes[keep].astype(np.int64)
+    first_seen = np.unique(sym_codes, return_index=True)[1]
+    sym_order = sym_codes[np.sort(first_seen)]
+    sym_rank = np.empty(len(sym.categories), dtype=np.int64)
+    sym_rank[sym_order] = np.arange(len(sym_order))
+
+    if keep.all():
+        columns = {field: column[:rows] for field, column in columns.items()}
+    else:
+        # One field at a time, so at most one extra column is alive.
+        for field in FIELDS:
+            columns[field] = columns[field][:rows][keep]
+
+    return TickData(
+        timestamps=np.array(ts.categories.astype(str).tolist())[order],
+        symbols=[str(s) for s in sym.categories[sym_order]],
+        time_index=rank[ts.codes[keep]],
+        symbol_index=sym_rank[sym_codes],
+        columns=columns,
+    )
+
+
+def file_digest(path, block_size=1 << 20):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(path, cache_dir=DATA_CACHE_DIR):
+    path = os.path.abspath(path)
+    if cache_dir is None:
+        return os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.npz")
+    tag = hashlib.sha1(path.encode()).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{os.path.basename(path)}.{tag}.npz")
+
+
+def _read_cache(path, target, stat):
+    if not os.path.exists(target):
+        return None
+    try:
+        with np.load(target, allow_pickle=False) as cached:
+            if int(cached["version"]) != CACHE_VERSION or int(cached["size"]) != stat.st_size:
+                return None
+            # Same mtime: trust it. Touched but same size: only if the content
+            # hash still matches, and then the cache is re-stamped with the
+            # new mtime so later loads skip the hash.
+            touched = int(cached["mtime_ns"]) != stat.st_mtime_ns
+            digest = str(cached["digest"])
+            if touched and digest != file_digest(path):
+                return None
+            data = TickData(cached["timestamps"], cached["symbols"].tolist(), cached["time_index"],
+                            cached["symbol_index"], {field: cached[field] for field in FIELDS})
+    except (OSError, ValueError, KeyError) as e:
+        logging.warning(f"Ignoring unreadable tick cache {target}: {e}")
+        return None
+    if touched:
+        _write_cache(path, target, stat, data, digest)
+    return data
+
+
+def _write_cache(path, target, stat, data, digest=None):
+    tmp = f"{target}.tmp"
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(tmp, "wb") as f:
+            np.savez(f, version=CACHE_VERSION, size=stat.st_size, mtime_ns=stat.st_mtime_ns,
+                     digest=digest or file_digest(path),
+                     timestamps=data.timestamps, symbols=np.array(data.symbols, dtype=str),
+                     time_index=data.time_index, symbol_index=data.symbol_index, **data.columns)
+        os.replace(tmp, target)
+    except OSError as e:
+        logging.warning(f"Could not write tick cache {target}: {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def load_ticks(path, use_cache=True, cache_dir=DATA_CACHE_DIR, chunk_rows=DATA_LOAD_CHUNK_ROWS):
+    if not use_cache:
+        return parse_ticks(path, chunk_rows)
+    stat = os.stat(path)
+    target = cache_path(path, cache_dir)
+    data = _read_cache(path, target, stat)
+    if data is None:
+        data = parse_ticks(path, chunk_rows)
+        _write_cache(path, target, stat, data)
+    return data
+
+
+def parse_backtest_csv(filename):
+    return load_ticks(filename).frames()
@@ -0,0 +1,176 @@
+import csv
+import datetime
+import math
+import os
+import time
+import numpy as np
+from config import DECISION_LOG_CAPACITY, DECISION_LOG_HOLD_SAMPLE, DECISION_LOG_SPILL_CHUNK
+
+ACTION_NAMES = ("HOLD", "BUY", "SELL")
+
+NO_REASON, INVALID_TICK, INSUFFICIENT_HISTORY, NO_SIGNAL, RSI_OVERSOLD, RSI_OVERBOUGHT = range(6)
+REASON_TEMPLATES = (
+    "",
+    "Invalid price/volume",
+    "Insufficient history",
+    "No strong signal.",
+    "RSI={value:.1f} (oversold), price > EMA",
+    "RSI={value:.1f} (overbought), price < EMA",
+)
+
+EXPORT_FIELDS = ["time", "symbol", "action", "price", "position_size_fraction", "reason"]
+
+
+def format_reason(code, value):
+    template = REASON_TEMPLATES[code]
+    return template.format(value=value) if "{" in template else template
+
+
+class DecisionLog:
+    # Fixed-capacity columnar store: one preallocated array per field, written
+    # as a ring. Timestamps are epoch seconds, actions/reasons/symbols are small
+    # integer codes, and nothing is turned into text until someone reads it.
+    def __init__(self, capacity=DECISION_LOG_CAPACITY, hold_sample_every=DECISION_LOG_HOLD_SAMPLE, spill_path=None,
+                 spill_chunk=DECISION_LOG_SPILL_CHUNK):
+        self.capacity = capacity
+        self.hold_sample_every = max(1, int(hold_sample_every))
+        self.time = np.zeros(capacity)
+        self.symbol = np.zeros(capacity, dtype=np.int32)
+        self.action = np.zeros(capacity, dtype=np.int8)
+        self.price = np.zeros(capacity)
+        self.size = np.zeros(capacity)
+        self.reason = np.zeros(capacity, dtype=np.int8)
+        self.value = np.full(capacity, np.nan)
+        self.symbols = []
+        self.symbol_ids = {}
+        self.total = 0
+        self.holds_seen = 0
+        self.spill_path = spill_path
+        self.spill_chunk = min(spill_chunk, capacity)
+        self.spilled = 0
+        if spill_path:
+            # Appends like the trade journal: earlier sessions stay in the file.
+            with open(spill_path, "a", newline='') as f:
+                if f.tell() == 0:
+                    csv.DictWriter(f, fieldnames=EXPORT_FIELDS).writeheader()
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def symbol_id(self, symbol):
+        sid = self.symbol_ids.get(symbol)
+        if sid is None:
+            sid = self.symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return sid
+
+    def append(self, symbol, action, price, size, reason, value=math.nan, timestamp=None):
+        if action == 0 and self.hold_sample_every > 1:
+            self.holds_seen += 1
+            if self.holds_seen % self.hold_sample_every:
+                return
+        i = self.total % self.capacity
+        self.time[i] = timestamp if timestamp is not None else time.time()
+        self.symbol[i] = self.symbol_id(symbol)
+        self.action[i] = action
+        self.price[i] = price
+        self.size[i] = size
+        self.reason[i] = reason
+        self.value[i] = value
+        self.total += 1
+        if self.spill_path and self.total - self.spilled >= self.spill_chunk:
+            self._spill()
+
+    def append_many(self, symbols, actions, prices, sizes, reasons, values, timestamp=None):
+        keep = np.ones(len(actions), dtype=bool)
+        if self.hold_sample_every > 1:
+            holds = np.flatnonzero(actions == 0)
+            keep[holds] = (self.holds_seen + np.arange(1, len(holds) + 1)) % self.hold_sample_every == 0
+            self.holds_seen += len(holds)
+        rows = np.flatnonzero(keep)
+        while len(rows):
+            # Never write more than the free run up to the spill point.
+            room = self.capacity if not self.spill_path else self.spill_chunk - (self.total - self.spilled)
+            part, rows = rows[:room], rows[room:]
+            idx = (self.total + np.arange(len(part))) % self.capacity
+            self.time[idx] = timestamp if timestamp is not None else time.time()
+            self.symbol[idx] = [self.symbol_id(symbols[k]) for k in part.tolist()]
+            self.action[idx] = actions[part]
+            self.price[idx] = prices[part]
+            self.size[idx] = sizes[part]
+            self.reason[idx] = reasons[part]
+            self.value[idx] = values[part]
+            self.total += len(part)
+            if self.spill_path and self.total - self.spilled >= self.spill_chunk:
+                self._spill()
+
+    def _positions(self, start, stop):
+        return np.arange(start, stop) % self.capacity
+
+    def _format_rows(self, positions):
+        times = self.time[positions].tolist()
+        symbols = self.symbol[positions].tolist()
+        actions = self.action[positions].tolist()
+        prices = self.price[positions].tolist()
+        sizes = self.size[positions].tolist()
+        reasons = self.reason[positions].tolist()
+        values = self.value[positions].tolist()
+        for k in range(len(times)):
+            yield {
+                "time": datetime.datetime.fromtimestamp(times[k]).strftime("%Y-%m-%d %H:%M:%S"),
+                "symbol": self.symbols[symbols[k]],
+                "action": ACTION_NAMES[actions[k]],
+                "price": prices[k],
+                "position_size_fraction": sizes[k],
+                "reason": format_reason(reasons[k], values[k]),
+            }
+
+    def records(self, last=None):
+        count = len(self) if last is None else min(last, len(self))
+        return list(self._format_rows(self._positions(self.total - count, self.total)))
+
+    def counts(self):
+        return {name: int(n) for name, n in zip(ACTION_NAMES, np.bincount(self.action[:len(self)], minlength=len(ACTION_NAMES)))}
+
+    def _write_header(self, path):
+        with open(path, "w", newline='') as f:
+            csv.DictWriter(f, fieldnames=EXPORT_FIELDS).writeheader()
+
+    def _write_rows(self, path, start, stop, chunk_size):
+        with open(path, "a", newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=EXPORT_FIELDS)
+            for chunk_start in range(start, stop, chunk_size):
+                writer.writerows(self._format_rows(self._positions(chunk_start, min(chunk_start + chunk_size, stop))))
+
+    def _spill(self):
+        self._write_rows(self.spill_path, self.spilled, self.total, self.spill_chunk)
+        self.spilled = self.total
+
+    def flush(self):
+        if self.spill_path and self.total > self.spilled:
+            self._spill()
+
+    def export(self, path, chunk_size=DECISION_LOG_SPILL_CHUNK):
+        # With a spill file every decision is on disk already, earlier
+        # sessions' included; otherwise only the rows still held in memory
+        # can be exported. Returns the number of rows written.
+        if self.spill_path:
+            if os.path.abspath(path) == os.path.abspath(self.spill_path):
+                raise ValueError(f"Cannot export the decision log onto its own spill file {path}")
+            self.flush()
+            self._write_header(path)
+            rows = 0
+            with open(self.spill_path, newline='') as src, open(path, "a", newline='') as dst:
+                next(src, None)
+                for line in src:
+                    dst.write(line)
+                    rows += 1
+            return rows
+        self._write_header(path)
+        self._write_rows(path, self.total - len(self), self.total, chunk_size)
+        return len(self)
+
+    def clear(self):
+        self.total = 0
+        self.spilled = 0
+        self.holds_seen = 0
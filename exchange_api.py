@@ -1,50 +1,93 @@
-import ccxt
 import logging
-from config import BINANCE_MARKET_RULES
+import time
+from config import BINANCE_MARKET_RULES, DEFAULT_SYMBOLS
+from market_rules import DEFAULT_SYMBOL_INFO, rule_for
+from metrics import FETCH_FAILURES, STAGE_SECONDS
 
-exchange = ccxt.binance({
-    'enableRateLimit': True,
-})
+_exchange = None
 
-def get_prices(symbols=None):
+def get_exchange():
+    # ccxt costs ~0.4 s to import, so the client is only built on first use;
+    # quantization and the rest of this module never need it.
+    global _exchange
+    if _exchange is None:
+        import ccxt
+        _exchange = ccxt.binance({
+            'enableRateLimit': True,
+        })
+    return _exchange
+
+def __getattr__(name):
+    if name == "exchange":
+        return get_exchange()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+last_fetch_stats = {}
+
+def parse_ticker(ticker):
+    return {
+        "price": ticker['last'],
+        "volume": ticker['quoteVolume'],
+        "bid": ticker['bid'],
+        "ask": ticker['ask']
+    }
+
+def supports_bulk_fetch(client):
+    return hasattr(client, 'fetch_tickers') and getattr(client, 'has', {}).get('fetchTickers', True) is not False
+
+def get_prices(symbols=None, client=None):
+    client = client or get_exchange()
+    symbols = list(DEFAULT_SYMBOLS if symbols is None else symbols)
     data = {}
+    stats = {"bulk_latency": None, "fallback_latency": {}, "failed": []}
+    started = time.perf_counter()
+
+    if len(symbols) > 1 and supports_bulk_fetch(client):
+        try:
+            tickers = client.fetch_tickers(symbols) or {}
+        except Exception as e:
+            tickers = {}
+            FETCH_FAILURES.inc(label="rest_bulk")
+            logging.warning(f"Bulk ticker fetch failed for {len(symbols)} symbols, falling back per symbol: {e}")
+        # A missing or malformed ticker only sends its own symbol to the
+        # per-symbol fallback below.
+        for symbol in symbols:
+            ticker = tickers.get(symbol)
+            if ticker:
+                try:
+                    data[symbol] = parse_ticker(ticker)
+                except (KeyError, TypeError) as e:
+                    logging.warning(f"Malformed ticker for {symbol} in bulk fetch: {e!r}")
+        stats["bulk_latency"] = time.perf_counter() - started
+
     for symbol in symbols:
+        if symbol in data:
+            continue
+        call_started = time.perf_counter()
         try:
-            ticker = exchange.fetch_ticker(symbol)
-            price = ticker['last']
-            volume = ticker['quoteVolume']
-            bid = ticker['bid']
-            ask = ticker['ask']
-            data[symbol] = {
-                "price": price,
-                "volume": volume,
-                "bid": bid,
-                "ask": ask
-            }
+            data[symbol] = parse_ticker(client.fetch_ticker(symbol))
         except Exception as e:
+            stats["failed"].append(symbol)
+            FETCH_FAILURES.inc(label="rest")
             logging.warning(f"Failed to fetch ticker for {symbol}: {e}")
+        stats["fallback_latency"][symbol] = time.perf_counter() - call_started
+
+    stats["total_latency"] = time.perf_counter() - started
+    STAGE_SECONDS.observe(stats["total_latency"], "fetch")
+    last_fetch_stats.clear()
+    last_fetch_stats.update(stats)
+    logging.debug(f"Fetched {len(data)}/{len(symbols)} tickers in {stats['total_latency'] * 1000:.1f} ms "
+                  f"({len(stats['fallback_latency'])} per-symbol fallbacks)")
     return data
 
 def get_symbol_info(symbol):
-    return BINANCE_MARKET_RULES.get(symbol, {
-        "price": {"precision": 4},
-        "amount": {"precision": 6, "min": 0.00001},
-        "notional": {"min": 10.0}
-    })
+    return BINANCE_MARKET_RULES.get(symbol, DEFAULT_SYMBOL_INFO)
 
 def quantize_quantity(symbol, quantity):
-    rules = get_symbol_info(symbol)
-    precision = rules["amount"].get("precision", 6)
-    min_qty = rules["amount"].get("min", 0.0)
-    quantized = round(quantity, precision)
-    return max(quantized, min_qty)
+    return rule_for(symbol).quantize_quantity(quantity)
 
 def quantize_price(symbol, price):
-    rules = get_symbol_info(symbol)
-    precision = rules["price"].get("precision", 2)
-    return round(price, precision)
+    return rule_for(symbol).quantize_price(price)
 
 def check_min_notional(symbol, price, quantity):
-    rules = get_symbol_info(symbol)
-    min_notional = rules["notional"].get("min", 10.0)
-    return (price * quantity) >= min_notional
\ No newline at end of file
+    return price * quantity >= rule_for(symbol).min_notional
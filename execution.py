@@ -0,0 +1,160 @@
+import bisect
+import json
+import logging
+import numpy as np
+from config import EXECUTION_BOOK_PATH, EXECUTION_IMPACT, EXECUTION_LIQUIDITY, EXECUTION_MAKER_FEE, \
+    EXECUTION_MAX_SLIPPAGE, EXECUTION_MODEL, EXECUTION_TAKER_FEE
+
+BUY, SELL = "BUY", "SELL"
+
+
+class LastPriceExecution:
+    """Fills every order in full at the last traded price, with no fee. This
+    is how Portfolio always filled orders and remains the default.
+
+    Execution models answer two questions for Portfolio: estimate() is the
+    per-unit cost (fee included) used to size an order, and fill() is the
+    average price and the fee for a given quantity. `quote` is the tick dict
+    ({price, volume, bid, ask}, plus `time` in backtests) when the caller has
+    one; models must cope with it being None or missing fields."""
+
+    needs_quotes = False
+    needs_time = False
+
+    def estimate(self, side, symbol, price, quote=None):
+        return price
+
+    def fill(self, side, symbol, price, quantity, quote=None):
+        return price, 0.0
+
+
+class QuoteExecution(LastPriceExecution):
+    # Buys lift the ask and sells hit the bid (or the reverse for passive
+    # "maker" fills), the fee is a fraction of the notional, and market
+    # impact grows with the square root of the order's share of the quoted
+    # volume, capped at max_slippage.
+    needs_quotes = True
+
+    def __init__(self, taker_fee=EXECUTION_TAKER_FEE, maker_fee=EXECUTION_MAKER_FEE, impact=EXECUTION_IMPACT,
+                 max_slippage=EXECUTION_MAX_SLIPPAGE, liquidity=EXECUTION_LIQUIDITY):
+        self.maker = liquidity == "maker"
+        self.fee_rate = maker_fee if self.maker else taker_fee
+        self.impact = impact
+        self.max_slippage = max_slippage
+
+    def touch(self, side, price, quote):
+        if not quote:
+            return price
+        bid, ask = quote.get("bid") or 0.0, quote.get("ask") or 0.0
+        if bid <= 0 or ask < bid:
+            return price
+        return (ask if side == BUY else bid) if not self.maker else (bid if side == BUY else ask)
+
+    def estimate(self, side, symbol, price, quote=None):
+        touch = self.touch(side, price, quote)
+        return touch * (1 + self.fee_rate) if side == BUY else touch * (1 - self.fee_rate)
+
+    def slippage(self, notional, quote):
+        volume = (quote.get("volume") or 0.0) if quote else 0.0
+        if self.maker or self.impact <= 0 or volume <= 0:
+            return 0.0
+        return min(self.impact * (notional / volume) ** 0.5, self.max_slippage)
+
+    def fill(self, side, symbol, price, quantity, quote=None):
+        touch = self.touch(side, price, quote)
+        slip = self.slippage(touch * quantity, quote)
+        fill_price = touch * (1 + slip) if side == BUY else touch * (1 - slip)
+        return fill_price, fill_price * quantity * self.fee_rate
+
+
+class Book:
+    # One L2 snapshot side: level prices with running totals of quantity and
+    # notional, so filling any quantity is one binary search.
+    __slots__ = ("prices", "depth", "notional")
+
+    def __init__(self, levels):
+        levels = np.asarray(levels, dtype=np.float64).reshape(-1, 2)
+        self.prices = levels[:, 0]
+        self.depth = np.cumsum(levels[:, 1])
+        self.notional = np.cumsum(levels[:, 0] * levels[:, 1])
+
+    def average_price(self, quantity):
+        # Walks the levels; whatever the book cannot absorb fills at the last
+        # level's price.
+        if not len(self.prices):
+            return None
+        k = min(int(np.searchsorted(self.depth, quantity)), len(self.prices) - 1)
+        filled = self.depth[k - 1] if k else 0.0
+        cost = self.notional[k - 1] if k else 0.0
+        return float((cost + (quantity - filled) * self.prices[k]) / quantity)
+
+
+def load_books(path):
+    # JSON lines, one snapshot per line:
+    #   {"time": 1700000000.0, "symbol": "BTC/USDT", "bids": [[price, qty], ...], "asks": [[price, qty], ...]}
+    # with bids best (highest) first and asks best (lowest) first.
+    books = {}
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                snap = json.loads(line)
+                entry = (float(snap["time"]), Book(snap["bids"]), Book(snap["asks"]))
+            except (ValueError, KeyError, TypeError) as e:
+                logging.warning(f"Skipping L2 snapshot on line {number} of {path}: {e}")
+                continue
+            books.setdefault(snap["symbol"], []).append(entry)
+    for snapshots in books.values():
+        snapshots.sort(key=lambda entry: entry[0])
+    return {symbol: ([entry[0] for entry in snapshots], snapshots) for symbol, snapshots in books.items()}
+
+
+class BookExecution(QuoteExecution):
+    # Walks recorded L2 depth: the fill is the volume-weighted price of the
+    # levels the order consumes in the latest snapshot at or before the
+    # quote's `time` (the newest snapshot when there is no time). Symbols or
+    # times without a snapshot fall back to QuoteExecution.
+    needs_time = True
+
+    def __init__(self, books, **quote_options):
+        super().__init__(**quote_options)
+        self.books = load_books(books) if isinstance(books, str) else books
+
+    def snapshot(self, symbol, quote):
+        entry = self.books.get(symbol)
+        if entry is None:
+            return None
+        times, snapshots = entry
+        t = quote.get("time") if quote else None
+        k = len(times) if t is None else bisect.bisect_right(times, t)
+        return snapshots[k - 1] if k else None
+
+    def estimate(self, side, symbol, price, quote=None):
+        snap = self.snapshot(symbol, quote)
+        book = None if snap is None else snap[2] if side == BUY else snap[1]
+        if book is None or not len(book.prices):
+            return super().estimate(side, symbol, price, quote)
+        touch = float(book.prices[0])
+        return touch * (1 + self.fee_rate) if side == BUY else touch * (1 - self.fee_rate)
+
+    def fill(self, side, symbol, price, quantity, quote=None):
+        snap = self.snapshot(symbol, quote)
+        fill_price = None
+        if snap is not None and quantity > 0:
+            fill_price = (snap[2] if side == BUY else snap[1]).average_price(quantity)
+        if fill_price is None:
+            return super().fill(side, symbol, price, quantity, quote)
+        return fill_price, fill_price * quantity * self.fee_rate
+
+
+def create_execution(kind=EXECUTION_MODEL, book_path=EXECUTION_BOOK_PATH, **options):
+    if kind == "last":
+        return LastPriceExecution()
+    if kind == "quote":
+        return QuoteExecution(**options)
+    if kind == "book":
+        if not book_path:
+            raise ValueError("The book execution model needs an L2 snapshot file (EXECUTION_BOOK_PATH)")
+        return BookExecution(book_path, **options)
+    raise ValueError(f"Unknown execution model '{kind}'")
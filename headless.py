@@ -0,0 +1,157 @@
+import time
+
+STARTED = time.perf_counter()
+
+import argparse
+import logging
+import threading
+import metrics
+from checkpoint import Checkpointer, resume
+from config import AI_TIMEFRAME, CHECKPOINT_INTERVAL, CHECKPOINT_PATH, DEFAULT_SYMBOLS, HEADLESS_REPORT_INTERVAL, INITIAL_BALANCE, \
+    MARKET_DATA_SOURCE, MARKET_DATA_STREAM_ADDRESS, METRICS_DUMP_PATH, METRICS_LOG_INTERVAL, METRICS_PORT, \
+    OHLCV_TIMEFRAME, TICK_STORE_DIR, WARM_START
+from market_data import create_source
+from ohlcv_cache import load_histories
+from trading_ai import TradingAI
+from trading_engine import TradingEngine, bars_for, live_portfolio
+
+IMPORTED = time.perf_counter()
+
+
+class PaperTrader:
+    """GUI-less live loop: a market data source feeding a TradingEngine, with
+    a one-line summary logged every `report_interval` seconds."""
+
+    def __init__(self, source, engine, report_interval=HEADLESS_REPORT_INTERVAL, store=None):
+        self.source = source
+        self.engine = engine
+        self.report_interval = report_interval
+        self.store = store
+        self.state = None
+        self.first_tick_at = None
+        self.trades = 0
+        self.last_report = time.monotonic()
+        engine.on_state = self.on_state
+
+    def on_state(self, state):
+        if self.first_tick_at is None and state.points:
+            self.first_tick_at = time.perf_counter()
+            logging.info(f"First decision {(self.first_tick_at - STARTED) * 1000:.0f} ms after start")
+        self.state = state
+        self.trades += len(state.new_trades)
+        if time.monotonic() - self.last_report >= self.report_interval:
+            self.last_report = time.monotonic()
+            self.report()
+
+    def report(self):
+        state = self.state
+        if state is None:
+            return
+        metrics = self.engine.metrics()
+        latency = f"p50 {metrics['latency_p50_ms']:.2f} ms, p99 {metrics['latency_p99_ms']:.2f} ms" \
+            if "latency_p50_ms" in metrics else "n/a"
+        logging.info(f"{metrics['ticks']} ticks | balance ${state.balance:,.2f} | P&L ${state.profit:,.2f} | "
+                     f"{self.trades} trades | queue {metrics['queue_depth']} | latency {latency}")
+
+    def run(self, duration=None):
+        self.engine.start()
+        self.engine.set_trading(True)
+        if duration:
+            timer = threading.Timer(duration, self.source.stop)
+            timer.daemon = True
+            timer.start()
+        try:
+            for prices in self.source:
+                if self.store is not None:
+                    self.store.append_snapshot(prices)
+                self.engine.submit_tick(prices)
+        except KeyboardInterrupt:
+            self.source.stop()
+        finally:
+            self.engine.stop()
+            self.report()
+        return self.state
+
+
+def run_live(args):
+    symbols = args.symbols.split(",") if args.symbols else list(DEFAULT_SYMBOLS)
+    address = (args.host, args.port) if args.port else MARKET_DATA_STREAM_ADDRESS
+    ai, portfolio = TradingAI(args.risk), live_portfolio(args.balance)
+    ai.timeframe = args.timeframe
+    bars = bars_for(ai)
+    checkpointer = None
+    if args.checkpoint:
+        resume(args.checkpoint, ai, portfolio, bars)
+        checkpointer = Checkpointer(args.checkpoint, args.checkpoint_interval)
+    engine = TradingEngine(ai, portfolio, symbols=symbols, checkpointer=checkpointer, bars=bars)
+    if args.warm_start:
+        # Queued ahead of the first tick; symbols the checkpoint already
+        # warmed are left alone.
+        engine.seed_history(load_histories(symbols, ai.history_limit, ai.timeframe or OHLCV_TIMEFRAME,
+                                           online=not args.offline_warm_start))
+    store = None
+    if args.record:
+        from tick_store import TickStore
+        store = TickStore(args.record)
+    trader = PaperTrader(create_source(args.source, symbols, address), engine, args.report, store)
+    if args.metrics:
+        metrics.enable()
+    reporter, server = metrics.start(args.metrics_port, args.metrics_dump, args.metrics_interval)
+    logging.info(f"Paper trading {len(symbols)} symbols from the {args.source} source "
+                 f"(imports took {(IMPORTED - STARTED) * 1000:.0f} ms)")
+    try:
+        trader.run(args.duration)
+    finally:
+        reporter.stop()
+        if server is not None:
+            server.shutdown()
+    if store is not None:
+        store.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the simulator without the GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    live = commands.add_parser("live", help="Paper-trade live prices")
+    live.add_argument("--source", default=MARKET_DATA_SOURCE, choices=["async", "rest", "stream"])
+    live.add_argument("--host", default=MARKET_DATA_STREAM_ADDRESS[0], help="Stream source host")
+    live.add_argument("--port", type=int, help="Stream source port (default: config.MARKET_DATA_STREAM_ADDRESS)")
+    live.add_argument("--symbols", help="Comma-separated symbols (default: config.DEFAULT_SYMBOLS)")
+    live.add_argument("--risk", default="aggressive", choices=["aggressive", "moderate", "conservative"])
+    live.add_argument("--balance", type=float, default=INITIAL_BALANCE)
+    live.add_argument("--timeframe", default=AI_TIMEFRAME,
+                      help="Decide once per bar of this timeframe (e.g. 1m) instead of on every tick")
+    live.add_argument("--duration", type=float, help="Stop after this many seconds (default: until Ctrl-C)")
+    live.add_argument("--report", type=float, default=HEADLESS_REPORT_INTERVAL, help="Seconds between summaries")
+    live.add_argument("--record", nargs="?", const=TICK_STORE_DIR, help="Also record ticks into this tick store")
+    live.add_argument("--no-warm-start", dest="warm_start", action="store_false", default=WARM_START,
+                      help="Wait for live ticks instead of seeding histories from cached candles")
+    live.add_argument("--offline-warm-start", action="store_true",
+                      help="Seed from the candle cache on disk without fetching newer candles")
+    live.add_argument("--checkpoint", default=CHECKPOINT_PATH,
+                      help="Resume from this checkpoint file if it exists, and keep saving the session to it")
+    live.add_argument("--checkpoint-interval", type=float, default=CHECKPOINT_INTERVAL,
+                      help="Seconds between checkpoints")
+    live.add_argument("--metrics", action="store_true", help="Collect stage timings and counters (see metrics.py)")
+    live.add_argument("--metrics-port", type=int, default=METRICS_PORT,
+                      help="Serve metrics on http://127.0.0.1:PORT/metrics; POST /enable or /disable toggles them")
+    live.add_argument("--metrics-dump", default=METRICS_DUMP_PATH, help="Write metrics to this file (Prometheus text)")
+    live.add_argument("--metrics-interval", type=float, default=METRICS_LOG_INTERVAL,
+                      help="Seconds between metrics summaries and dumps")
+
+    commands.add_parser("backtest", help="Run backtest.py (same arguments)", add_help=False)
+
+    args, rest = parser.parse_known_args(argv)
+    if args.command == "backtest":
+        import backtest
+        backtest.main(rest)
+    else:
+        if rest:
+            parser.error(f"unrecognized arguments: {' '.join(rest)}")
+        run_live(args)
+    print(f"Cold start: imports {(IMPORTED - STARTED) * 1000:.0f} ms, total run {time.perf_counter() - STARTED:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
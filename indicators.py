@@ -0,0 +1,656 @@
+import math
+import numpy as np
+
+# Streaming indicators: each update() is O(1) regardless of the window length.
+# The *_series functions compute the same indicators over a whole price array
+# with NumPy, performing the identical floating-point operations in the same
+# order (running sums are cumulative sums), so they agree with the streaming
+# classes bit for bit. The backtester relies on that to match the live path.
+# Running sums are re-derived exactly with math.fsum every RESYNC_PERIODS
+# windows so rounding drift cannot build up over long sessions.
+
+RESYNC_PERIODS = 64
+
+
+class RollingSum:
+    def __init__(self, window):
+        if window <= 0:
+            raise ValueError("RollingSum window must be positive")
+        self.window = window
+        self.values = [0.0] * window
+        self.pos = 0
+        self.count = 0
+        self.total = 0.0
+        self.pushes = 0
+        self.resync_every = window * RESYNC_PERIODS
+
+    def push(self, x):
+        if self.count < self.window:
+            self.values[self.pos] = x
+            self.total += x
+            self.count += 1
+            old = None
+        else:
+            old = self.values[self.pos]
+            self.values[self.pos] = x
+            self.total += x - old
+        self.pos = self.pos + 1 if self.pos + 1 < self.window else 0
+        self.pushes += 1
+        if self.pushes % self.resync_every == 0:
+            self.total = math.fsum(self.values)
+        return old
+
+    @property
+    def ready(self):
+        return self.count >= self.window
+
+
+class SimpleMovingAverage:
+    def __init__(self, span):
+        self.window = RollingSum(span)
+
+    def update(self, x):
+        self.window.push(x)
+
+    @property
+    def value(self):
+        return self.window.total / self.window.window if self.window.ready else None
+
+
+class ExponentialMovingAverage:
+    def __init__(self, span):
+        self.span = span
+        self.alpha = 2.0 / (span + 1)
+        self.seed = RollingSum(span)
+        self.ema = None
+
+    def update(self, x):
+        if self.ema is not None:
+            self.ema += self.alpha * (x - self.ema)
+            return
+        self.seed.push(x)
+        if self.seed.ready:
+            self.ema = self.seed.total / self.span
+
+    @property
+    def value(self):
+        return self.ema
+
+
+class RollingRSI:
+    # RSI over the last `period` prices using plain sums of gains and losses,
+    # i.e. the original TradingAI definition. Counts of non-zero gains/losses
+    # are kept exactly so an all-up or all-down window gives exactly 100 / 0.
+    def __init__(self, period):
+        if period < 2:
+            raise ValueError("RSI period must be at least 2")
+        self.period = period
+        self.gains = RollingSum(period - 1)
+        self.losses = RollingSum(period - 1)
+        self.gain_count = 0
+        self.loss_count = 0
+        self.prev = None
+
+    def update(self, x):
+        if self.prev is not None:
+            delta = x - self.prev
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            old_gain = self.gains.push(gain)
+            old_loss = self.losses.push(loss)
+            self.gain_count += (gain > 0) - (old_gain is not None and old_gain > 0)
+            self.loss_count += (loss > 0) - (old_loss is not None and old_loss > 0)
+        self.prev = x
+
+    @property
+    def value(self):
+        if not self.gains.ready:
+            return None
+        if self.loss_count == 0:
+            return 100.0
+        gains = self.gains.total if self.gain_count else 0.0
+        rs = gains / self.losses.total
+        return 100 - 100 / (1 + rs)
+
+
+class WilderRSI:
+    def __init__(self, period):
+        self.period = period
+        self.seed_gains = RollingSum(period)
+        self.seed_losses = RollingSum(period)
+        self.avg_gain = None
+        self.avg_loss = None
+        self.prev = None
+
+    def update(self, x):
+        if self.prev is not None:
+            delta = x - self.prev
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            if self.avg_gain is not None:
+                self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+                self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+            else:
+                self.seed_gains.push(gain)
+                self.seed_losses.push(loss)
+                if self.seed_gains.ready:
+                    self.avg_gain = self.seed_gains.total / self.period
+                    self.avg_loss = self.seed_losses.total / self.period
+        self.prev = x
+
+    @property
+    def value(self):
+        if self.avg_gain is None:
+            return None
+        if self.avg_loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+
+
+class RollingVolatility:
+    # Population standard deviation over a sliding window (np.std semantics),
+    # updated with Welford's algorithm generalised to remove the oldest value.
+    def __init__(self, window):
+        self.window = RollingSum(window)
+        self.m2 = 0.0
+
+    def update(self, x):
+        w = self.window
+        if w.ready:
+            mean_old = w.total / w.window
+            old = w.push(x)
+            mean_new = w.total / w.window
+            self.m2 += (x - old) * ((x - mean_new) + (old - mean_old))
+            if w.pushes % w.resync_every == 0:
+                self.m2 = math.fsum((v - mean_new) * (v - mean_new) for v in w.values)
+        else:
+            mean_old = w.total / w.count if w.count else 0.0
+            w.push(x)
+            mean_new = w.total / w.count
+            self.m2 += (x - mean_old) * (x - mean_new)
+
+    @property
+    def value(self):
+        if not self.window.ready:
+            return None
+        return math.sqrt(max(self.m2, 0.0) / self.window.window)
+
+
+class IndicatorSet:
+    def __init__(self, ema_span=5, rsi_period=14, volatility_window=14, ema_mode="simple", rsi_mode="simple"):
+        self.ema = ExponentialMovingAverage(ema_span) if ema_mode == "exponential" else SimpleMovingAverage(ema_span)
+        self.rsi = WilderRSI(rsi_period) if rsi_mode == "wilder" else RollingRSI(rsi_period)
+        self.volatility = RollingVolatility(volatility_window)
+
+    def update(self, price):
+        self.ema.update(price)
+        self.rsi.update(price)
+        self.volatility.update(price)
+
+    def values(self):
+        return self.ema.value, self.rsi.value, self.volatility.value
+
+
+def _cumsum_with_resyncs(inc, every, resync_value):
+    # np.cumsum is strictly sequential, so each stretch between resync points
+    # reproduces the streaming `total += inc` updates exactly.
+    out = np.empty(len(inc))
+    start, carry = 0, None
+    for end in list(range(every - 1, len(inc), every)) + [len(inc) - 1]:
+        if end < start:
+            break
+        if carry is None:
+            out[start:end + 1] = np.cumsum(inc[start:end + 1])
+        else:
+            out[start:end + 1] = np.cumsum(np.concatenate(([carry], inc[start:end + 1])))[1:]
+        if (end + 1) % every == 0:
+            out[end] = resync_value(end, out)
+        carry = out[end]
+        start = end + 1
+    return out
+
+
+def rolling_sum_series(x, window):
+    x = np.asarray(x, dtype=np.float64)
+    d = x.copy()
+    d[window:] -= x[:-window]
+    return _cumsum_with_resyncs(d, window * RESYNC_PERIODS, lambda t, out: math.fsum(x[t - window + 1:t + 1]))
+
+
+def _rolling_count_series(mask, window):
+    c = mask.astype(np.int64)
+    c[window:] -= mask[:-window]
+    return np.cumsum(c)
+
+
+def sma_series(x, span):
+    out = rolling_sum_series(x, span) / span
+    out[:span - 1] = np.nan
+    return out
+
+
+def rsi_series(x, period):
+    x = np.asarray(x, dtype=np.float64)
+    w = period - 1
+    out = np.full(len(x), np.nan)
+    if len(x) < period:
+        return out
+    deltas = np.diff(x)
+    gains = np.where(deltas > 0, deltas, 0.0)
+    losses = np.where(deltas < 0, -deltas, 0.0)
+    gain_sum = rolling_sum_series(gains, w)
+    loss_sum = rolling_sum_series(losses, w)
+    gain_count = _rolling_count_series(deltas > 0, w)
+    loss_count = _rolling_count_series(deltas < 0, w)
+    gain_sum = np.where(gain_count > 0, gain_sum, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(loss_count > 0, 100 - 100 / (1 + gain_sum / loss_sum), 100.0)
+    out[period - 1:] = rsi[w - 1:]
+    return out
+
+
+def volatility_series(x, window):
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n < window:
+        return out
+    total = rolling_sum_series(x, window)
+    prev_total = np.concatenate(([0.0], total[:-1]))
+    counts = np.minimum(np.arange(1, n + 1), window).astype(np.float64)
+    prev_counts = np.concatenate(([1.0], counts[:-1]))
+    mean_old = prev_total / prev_counts
+    mean_new = total / counts
+    inc = (x - mean_old) * (x - mean_new)
+    old = x[:-window]
+    tail = x[window:]
+    inc[window:] = (tail - old) * ((tail - mean_new[window:]) + (old - mean_old[window:]))
+
+    def resync(t, out):
+        values = x[t - window + 1:t + 1] - mean_new[t]
+        return math.fsum(values * values)
+
+    m2 = _cumsum_with_resyncs(inc, window * RESYNC_PERIODS, resync)
+    out[window - 1:] = np.sqrt(np.maximum(m2[window - 1:], 0.0) / window)
+    return out
+
+
+def indicator_series(prices, ema_span=5, rsi_period=14, volatility_window=14, ema_mode="simple", rsi_mode="simple"):
+    prices = np.asarray(prices, dtype=np.float64)
+    if ema_mode == "simple" and rsi_mode == "simple":
+        return sma_series(prices, ema_span), rsi_series(prices, rsi_period), volatility_series(prices, volatility_window)
+    # Recursive smoothers have no exact closed form; replay them instead.
+    indicators = IndicatorSet(ema_span, rsi_period, volatility_window, ema_mode, rsi_mode)
+    out = np.full((3, len(prices)), np.nan)
+    for t, price in enumerate(prices.tolist()):
+        indicators.update(price)
+        for k, value in enumerate(indicators.values()):
+            if value is not None:
+                out[k, t] = value
+    return out[0], out[1], out[2]
+
+
+# Lane-wise counterparts of the streaming classes: one lane per symbol, all
+# lanes stored in shared arrays and updated together. update(lanes, x) only
+# touches the given lane indices, and every lane goes through exactly the
+# floating-point steps its scalar twin would, so results are identical.
+# update_one(lane, x) and value_one(lane) do the same for a single lane with
+# Python floats, for snapshots too small to repay NumPy's per-call overhead.
+
+def _grow(array, lanes, fill):
+    if array.shape[0] >= lanes:
+        return array
+    grown = np.full((lanes,) + array.shape[1:], fill, dtype=array.dtype)
+    grown[:array.shape[0]] = array
+    return grown
+
+
+class BatchRollingSum:
+    def __init__(self, window, lanes=0):
+        if window <= 0:
+            raise ValueError("RollingSum window must be positive")
+        self.window = window
+        self.resync_every = window * RESYNC_PERIODS
+        self.values = np.zeros((lanes, window))
+        self.pos = np.zeros(lanes, dtype=np.int64)
+        self.count = np.zeros(lanes, dtype=np.int64)
+        self.total = np.zeros(lanes)
+        self.pushes = np.zeros(lanes, dtype=np.int64)
+
+    def resize(self, lanes):
+        self.values = _grow(self.values, lanes, 0.0)
+        self.pos = _grow(self.pos, lanes, 0)
+        self.count = _grow(self.count, lanes, 0)
+        self.total = _grow(self.total, lanes, 0.0)
+        self.pushes = _grow(self.pushes, lanes, 0)
+
+    def reset(self, lanes):
+        self.values[lanes] = 0.0
+        self.pos[lanes] = self.count[lanes] = self.pushes[lanes] = 0
+        self.total[lanes] = 0.0
+
+    def push(self, lanes, x):
+        # Slots a lane has not filled yet still hold the 0.0 they were reset
+        # to, so `x - old` is exactly x until the window is full and one
+        # expression covers both of RollingSum's branches.
+        pos = self.pos[lanes]
+        count = self.count[lanes]
+        old = self.values[lanes, pos]
+        self.values[lanes, pos] = x
+        self.total[lanes] += x - old
+        self.count[lanes] = np.minimum(count + 1, self.window)
+        self.pos[lanes] = (pos + 1) % self.window
+        pushes = self.pushes[lanes] + 1
+        self.pushes[lanes] = pushes
+        resync = lanes[pushes % self.resync_every == 0]
+        for lane in resync.tolist():
+            self.total[lane] = math.fsum(self.values[lane])
+        return old, count >= self.window, resync
+
+    def push_one(self, lane, x):
+        pos = self.pos.item(lane)
+        full = self.count.item(lane) >= self.window
+        old = self.values.item(lane, pos)
+        self.values[lane, pos] = x
+        self.total[lane] = self.total.item(lane) + (x - old)
+        if not full:
+            self.count[lane] += 1
+        self.pos[lane] = pos + 1 if pos + 1 < self.window else 0
+        pushes = self.pushes.item(lane) + 1
+        self.pushes[lane] = pushes
+        resync = pushes % self.resync_every == 0
+        if resync:
+            self.total[lane] = math.fsum(self.values[lane])
+        return old, full, resync
+
+    def ready(self, lanes):
+        return self.count[lanes] >= self.window
+
+    def ready_one(self, lane):
+        return self.count.item(lane) >= self.window
+
+
+class BatchSimpleMovingAverage:
+    def __init__(self, span, lanes=0):
+        self.window = BatchRollingSum(span, lanes)
+
+    def resize(self, lanes):
+        self.window.resize(lanes)
+
+    def reset(self, lanes):
+        self.window.reset(lanes)
+
+    def update(self, lanes, x):
+        self.window.push(lanes, x)
+
+    def value(self, lanes):
+        return np.where(self.window.ready(lanes), self.window.total[lanes] / self.window.window, np.nan)
+
+    def update_one(self, lane, x):
+        self.window.push_one(lane, x)
+
+    def value_one(self, lane):
+        return self.window.total.item(lane) / self.window.window if self.window.ready_one(lane) else math.nan
+
+
+class BatchExponentialMovingAverage:
+    def __init__(self, span, lanes=0):
+        self.span = span
+        self.alpha = 2.0 / (span + 1)
+        self.seed = BatchRollingSum(span, lanes)
+        self.ema = np.full(lanes, np.nan)
+
+    def resize(self, lanes):
+        self.seed.resize(lanes)
+        self.ema = _grow(self.ema, lanes, np.nan)
+
+    def reset(self, lanes):
+        self.seed.reset(lanes)
+        self.ema[lanes] = np.nan
+
+    def update(self, lanes, x):
+        seeded = ~np.isnan(self.ema[lanes])
+        running = lanes[seeded]
+        self.ema[running] += self.alpha * (x[seeded] - self.ema[running])
+        seeding = lanes[~seeded]
+        self.seed.push(seeding, x[~seeded])
+        done = seeding[self.seed.ready(seeding)]
+        self.ema[done] = self.seed.total[done] / self.span
+
+    def value(self, lanes):
+        return self.ema[lanes]
+
+    def update_one(self, lane, x):
+        ema = self.ema.item(lane)
+        if not math.isnan(ema):
+            self.ema[lane] = ema + self.alpha * (x - ema)
+            return
+        self.seed.push_one(lane, x)
+        if self.seed.ready_one(lane):
+            self.ema[lane] = self.seed.total.item(lane) / self.span
+
+    def value_one(self, lane):
+        return self.ema.item(lane)
+
+
+def _split_moves(delta):
+    return np.where(delta > 0, delta, 0.0), np.where(delta < 0, -delta, 0.0)
+
+
+class BatchRollingRSI:
+    def __init__(self, period, lanes=0):
+        if period < 2:
+            raise ValueError("RSI period must be at least 2")
+        self.period = period
+        self.gains = BatchRollingSum(period - 1, lanes)
+        self.losses = BatchRollingSum(period - 1, lanes)
+        self.gain_count = np.zeros(lanes, dtype=np.int64)
+        self.loss_count = np.zeros(lanes, dtype=np.int64)
+        self.prev = np.full(lanes, np.nan)
+
+    def resize(self, lanes):
+        self.gains.resize(lanes)
+        self.losses.resize(lanes)
+        self.gain_count = _grow(self.gain_count, lanes, 0)
+        self.loss_count = _grow(self.loss_count, lanes, 0)
+        self.prev = _grow(self.prev, lanes, np.nan)
+
+    def reset(self, lanes):
+        self.gains.reset(lanes)
+        self.losses.reset(lanes)
+        self.gain_count[lanes] = self.loss_count[lanes] = 0
+        self.prev[lanes] = np.nan
+
+    def update(self, lanes, x):
+        has_prev = ~np.isnan(self.prev[lanes])
+        moving = lanes[has_prev]
+        gain, loss = _split_moves(x[has_prev] - self.prev[moving])
+        old_gain, full, _ = self.gains.push(moving, gain)
+        old_loss, _, _ = self.losses.push(moving, loss)
+        self.gain_count[moving] += (gain > 0).astype(np.int64) - (full & (old_gain > 0))
+        self.loss_count[moving] += (loss > 0).astype(np.int64) - (full & (old_loss > 0))
+        self.prev[lanes] = x
+
+    def value(self, lanes):
+        gains = np.where(self.gain_count[lanes] > 0, self.gains.total[lanes], 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(self.loss_count[lanes] > 0, 100 - 100 / (1 + gains / self.losses.total[lanes]), 100.0)
+        return np.where(self.gains.ready(lanes), rsi, np.nan)
+
+    def update_one(self, lane, x):
+        prev = self.prev.item(lane)
+        if not math.isnan(prev):
+            delta = x - prev
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            old_gain, full, _ = self.gains.push_one(lane, gain)
+            old_loss, _, _ = self.losses.push_one(lane, loss)
+            self.gain_count[lane] += (gain > 0) - (full and old_gain > 0)
+            self.loss_count[lane] += (loss > 0) - (full and old_loss > 0)
+        self.prev[lane] = x
+
+    def value_one(self, lane):
+        if not self.gains.ready_one(lane):
+            return math.nan
+        if self.loss_count.item(lane) == 0:
+            return 100.0
+        gains = self.gains.total.item(lane) if self.gain_count.item(lane) else 0.0
+        return 100 - 100 / (1 + gains / self.losses.total.item(lane))
+
+
+class BatchWilderRSI:
+    def __init__(self, period, lanes=0):
+        self.period = period
+        self.seed_gains = BatchRollingSum(period, lanes)
+        self.seed_losses = BatchRollingSum(period, lanes)
+        self.avg_gain = np.full(lanes, np.nan)
+        self.avg_loss = np.full(lanes, np.nan)
+        self.prev = np.full(lanes, np.nan)
+
+    def resize(self, lanes):
+        self.seed_gains.resize(lanes)
+        self.seed_losses.resize(lanes)
+        self.avg_gain = _grow(self.avg_gain, lanes, np.nan)
+        self.avg_loss = _grow(self.avg_loss, lanes, np.nan)
+        self.prev = _grow(self.prev, lanes, np.nan)
+
+    def reset(self, lanes):
+        self.seed_gains.reset(lanes)
+        self.seed_losses.reset(lanes)
+        self.avg_gain[lanes] = self.avg_loss[lanes] = self.prev[lanes] = np.nan
+
+    def update(self, lanes, x):
+        has_prev = ~np.isnan(self.prev[lanes])
+        moving, moved = lanes[has_prev], x[has_prev]
+        gain, loss = _split_moves(moved - self.prev[moving])
+        seeded = ~np.isnan(self.avg_gain[moving])
+        running = moving[seeded]
+        p = self.period
+        self.avg_gain[running] = (self.avg_gain[running] * (p - 1) + gain[seeded]) / p
+        self.avg_loss[running] = (self.avg_loss[running] * (p - 1) + loss[seeded]) / p
+        seeding = moving[~seeded]
+        self.seed_gains.push(seeding, gain[~seeded])
+        self.seed_losses.push(seeding, loss[~seeded])
+        done = seeding[self.seed_gains.ready(seeding)]
+        self.avg_gain[done] = self.seed_gains.total[done] / p
+        self.avg_loss[done] = self.seed_losses.total[done] / p
+        self.prev[lanes] = x
+
+    def value(self, lanes):
+        avg_gain, avg_loss = self.avg_gain[lanes], self.avg_loss[lanes]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+
+    def update_one(self, lane, x):
+        prev = self.prev.item(lane)
+        if not math.isnan(prev):
+            delta = x - prev
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            p = self.period
+            avg_gain = self.avg_gain.item(lane)
+            if not math.isnan(avg_gain):
+                self.avg_gain[lane] = (avg_gain * (p - 1) + gain) / p
+                self.avg_loss[lane] = (self.avg_loss.item(lane) * (p - 1) + loss) / p
+            else:
+                self.seed_gains.push_one(lane, gain)
+                self.seed_losses.push_one(lane, loss)
+                if self.seed_gains.ready_one(lane):
+                    self.avg_gain[lane] = self.seed_gains.total.item(lane) / p
+                    self.avg_loss[lane] = self.seed_losses.total.item(lane) / p
+        self.prev[lane] = x
+
+    def value_one(self, lane):
+        avg_gain, avg_loss = self.avg_gain.item(lane), self.avg_loss.item(lane)
+        if math.isnan(avg_loss):
+            return math.nan
+        if avg_loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+class BatchRollingVolatility:
+    def __init__(self, window, lanes=0):
+        self.window = BatchRollingSum(window, lanes)
+        self.m2 = np.zeros(lanes)
+
+    def resize(self, lanes):
+        self.window.resize(lanes)
+        self.m2 = _grow(self.m2, lanes, 0.0)
+
+    def reset(self, lanes):
+        self.window.reset(lanes)
+        self.m2[lanes] = 0.0
+
+    def update(self, lanes, x):
+        w = self.window
+        mean_old = w.total[lanes] / np.maximum(w.count[lanes], 1)
+        old, full, resync = w.push(lanes, x)
+        mean_new = w.total[lanes] / w.count[lanes]
+        self.m2[lanes] += np.where(
+            full,
+            (x - old) * ((x - mean_new) + (old - mean_old)),
+            (x - mean_old) * (x - mean_new),
+        )
+        for lane in resync.tolist():
+            self._resync(lane)
+
+    def _resync(self, lane):
+        w = self.window
+        mean = w.total[lane] / w.window
+        values = w.values[lane] - mean
+        self.m2[lane] = math.fsum(values * values)
+
+    def value(self, lanes):
+        w = self.window
+        return np.where(w.ready(lanes), np.sqrt(np.maximum(self.m2[lanes], 0.0) / w.window), np.nan)
+
+    def update_one(self, lane, x):
+        w = self.window
+        count = w.count.item(lane)
+        mean_old = w.total.item(lane) / max(count, 1)
+        old, full, resync = w.push_one(lane, x)
+        mean_new = w.total.item(lane) / w.count.item(lane)
+        m2 = self.m2.item(lane)
+        if full:
+            self.m2[lane] = m2 + (x - old) * ((x - mean_new) + (old - mean_old))
+        else:
+            self.m2[lane] = m2 + (x - mean_old) * (x - mean_new)
+        if resync:
+            self._resync(lane)
+
+    def value_one(self, lane):
+        w = self.window
+        return math.sqrt(max(self.m2.item(lane), 0.0) / w.window) if w.ready_one(lane) else math.nan
+
+
+class BatchIndicatorSet:
+    def __init__(self, ema_span=5, rsi_period=14, volatility_window=14, ema_mode="simple", rsi_mode="simple"):
+        ema_cls = BatchExponentialMovingAverage if ema_mode == "exponential" else BatchSimpleMovingAverage
+        rsi_cls = BatchWilderRSI if rsi_mode == "wilder" else BatchRollingRSI
+        self.ema = ema_cls(ema_span)
+        self.rsi = rsi_cls(rsi_period)
+        self.volatility = BatchRollingVolatility(volatility_window)
+        self.parts = (self.ema, self.rsi, self.volatility)
+
+    def resize(self, lanes):
+        for part in self.parts:
+            part.resize(lanes)
+
+    def reset(self, lanes):
+        for part in self.parts:
+            part.reset(lanes)
+
+    def update(self, lanes, prices):
+        for part in self.parts:
+            part.update(lanes, prices)
+
+    def values(self, lanes):
+        return self.ema.value(lanes), self.rsi.value(lanes), self.volatility.value(lanes)
+
+    def update_one(self, lane, price):
+        for part in self.parts:
+            part.update_one(lane, price)
+
+    def values_one(self, lane):
+        return self.ema.value_one(lane), self.rsi.value_one(lane), self.volatility.value_one(lane)
@@ -1,4 +1,4 @@
-from ui.sci_fi_ui import launch_ui
+import sys
 import logging
 from config import LOG_LEVEL, LOG_FILE
 
@@ -10,6 +10,13 @@ logging.basicConfig(level=getattr(logging, LOG_LEVEL.upper()),
                     ])
 
 if __name__ == "__main__":
-    logging.info("Starting AI Crypto Simulator (Pure Simulation Mode).")
-    launch_ui()
-    logging.info("AI Crypto Simulator finished.")
\ No newline at end of file
+    if sys.argv[1:2] == ["--headless"]:
+        # e.g. `python main.py --headless live --duration 60`; never imports PyQt5.
+        from headless import main
+        main(sys.argv[2:])
+    else:
+        # Imported here so the GUI stack (PyQt5, matplotlib) is only loaded for the GUI.
+        from ui.sci_fi_ui import launch_ui
+        logging.info("Starting AI Crypto Simulator (Pure Simulation Mode).")
+        launch_ui()
+        logging.info("AI Crypto Simulator finished.")
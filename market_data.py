@@ -0,0 +1,280 @@
+import abc
+import argparse
+import asyncio
+import json
+import logging
+import socket
+import socketserver
+import threading
+import time
+from config import DEFAULT_SYMBOLS, MARKET_DATA_SOURCE, MARKET_DATA_STREAM_ADDRESS, PRICE_POLL_INTERVAL
+from exchange_api import get_prices
+from price_feed import AsyncPriceFeed
+
+TICK_FIELDS = ("price", "volume", "bid", "ask")
+
+
+class MarketDataSource(abc.ABC):
+    """Push-based price source: iterating it yields snapshots shaped like
+    get_prices() output ({symbol: {price, volume, bid, ask}}) as they arrive.
+    Streaming sources yield one symbol per snapshot, i.e. tick by tick.
+    Subclasses implement snapshots() as a generator that returns once
+    `stopped` is set."""
+
+    def __init__(self):
+        self.stopped = threading.Event()
+        self.ticks = 0
+        self.started_at = None
+
+    def __iter__(self):
+        self.started_at = time.perf_counter()
+        for snapshot in self.snapshots():
+            if self.stopped.is_set():
+                break
+            self.ticks += len(snapshot)
+            yield snapshot
+
+    @abc.abstractmethod
+    def snapshots(self):
+        # Yields snapshots until the source is stopped or runs dry.
+        raise NotImplementedError
+
+    def stop(self):
+        self.stopped.set()
+
+    def throughput(self):
+        if not self.started_at:
+            return 0.0
+        elapsed = time.perf_counter() - self.started_at
+        return self.ticks / elapsed if elapsed > 0 else 0.0
+
+
+class RestPollingSource(MarketDataSource):
+    def __init__(self, symbols=None, interval=PRICE_POLL_INTERVAL, client=None):
+        super().__init__()
+        self.symbols = symbols if symbols is not None else list(DEFAULT_SYMBOLS)
+        self.interval = interval
+        self.client = client
+
+    def snapshots(self):
+        while not self.stopped.is_set():
+            started = time.monotonic()
+            try:
+                prices = get_prices(self.symbols, client=self.client)
+                if prices:
+                    yield prices
+            except Exception as e:
+                logging.warning(f"REST price poll failed: {e}")
+            self.stopped.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+
+class AsyncPollingSource(MarketDataSource):
+    def __init__(self, symbols=None, client=None, **feed_options):
+        super().__init__()
+        self.feed = AsyncPriceFeed(symbols, client=client, **feed_options)
+
+    def snapshots(self):
+        loop = asyncio.new_event_loop()
+        stream = self.feed.snapshots()
+        try:
+            while not self.stopped.is_set():
+                try:
+                    yield loop.run_until_complete(stream.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(stream.aclose())
+            loop.close()
+
+    def stop(self):
+        super().stop()
+        self.feed.stop()
+
+
+def decode_tick(message):
+    tick = json.loads(message)
+    return {tick["symbol"]: {field: float(tick.get(field, 0)) for field in TICK_FIELDS}}
+
+
+def encode_tick(symbol, data, timestamp=None):
+    tick = {"symbol": symbol, **{field: data[field] for field in TICK_FIELDS}}
+    if timestamp is not None:
+        tick["timestamp"] = timestamp
+    return (json.dumps(tick) + "\n").encode()
+
+
+class StreamingSource(MarketDataSource):
+    """Reads ticks pushed by a producer, either from an in-process queue
+    (already decoded snapshot dicts) or from a TCP socket carrying one JSON
+    tick per line, as sent by ReplayServer."""
+
+    def __init__(self, tick_queue=None, address=None, reconnect_delay=1.0):
+        super().__init__()
+        if (tick_queue is None) == (address is None):
+            raise ValueError("StreamingSource needs exactly one of tick_queue or address")
+        self.tick_queue = tick_queue
+        self.address = address
+        self.reconnect_delay = reconnect_delay
+        self.sock = None
+
+    def snapshots(self):
+        if self.tick_queue is not None:
+            yield from self._read_queue()
+        else:
+            yield from self._read_socket()
+
+    def _read_queue(self):
+        while not self.stopped.is_set():
+            snapshot = self.tick_queue.get()
+            if snapshot is None:
+                break
+            yield snapshot
+
+    def _read_socket(self):
+        while not self.stopped.is_set():
+            try:
+                self.sock = socket.create_connection(self.address)
+                with self.sock, self.sock.makefile("rb") as stream:
+                    for line in stream:
+                        if line.strip():
+                            yield decode_tick(line)
+            except OSError as e:
+                if not self.stopped.is_set():
+                    logging.warning(f"Tick stream {self.address} unavailable: {e}")
+            finally:
+                self.sock = None
+            if not self.stopped.wait(self.reconnect_delay):
+                logging.info(f"Reconnecting to tick stream {self.address}")
+
+    def stop(self):
+        super().stop()
+        if self.tick_queue is not None:
+            self.tick_queue.put(None)
+        sock = self.sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def create_source(kind=MARKET_DATA_SOURCE, symbols=None, address=MARKET_DATA_STREAM_ADDRESS):
+    if kind == "stream":
+        return StreamingSource(address=tuple(address))
+    if kind == "rest":
+        return RestPollingSource(symbols)
+    if kind == "async":
+        return AsyncPollingSource(symbols)
+    raise ValueError(f"Unknown market data source {kind!r}")
+
+
+class ReplayServer:
+    """Local stand-in for an exchange WebSocket: replays a backtest CSV to every
+    client that connects, one JSON tick per line, at `rate` ticks per second
+    (None sends as fast as the socket accepts)."""
+
+    def __init__(self, csv_path, host="127.0.0.1", port=0, rate=None, loop=False):
+        from data_loader import parse_backtest_csv  # pandas; not needed by the live sources
+        self.frames = parse_backtest_csv(csv_path)
+        self.rate = rate
+        self.loop = loop
+        self.server = socketserver.ThreadingTCPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def address(self):
+        return self.server.server_address
+
+    def _make_handler(self):
+        replay = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                sent, started = replay.stream(self.wfile)
+                elapsed = time.perf_counter() - started
+                logging.info(f"Replayed {sent} ticks to {self.client_address} in {elapsed:.2f}s "
+                             f"({sent / elapsed if elapsed > 0 else 0:,.0f} ticks/s)")
+
+        return Handler
+
+    def stream(self, wfile):
+        sent = 0
+        started = time.perf_counter()
+        try:
+            while True:
+                for index, frame in enumerate(self.frames):
+                    for symbol, data in frame.items():
+                        if self.rate:
+                            delay = started + sent / self.rate - time.perf_counter()
+                            if delay > 0:
+                                time.sleep(delay)
+                        wfile.write(encode_tick(symbol, data, index))
+                        sent += 1
+                if not self.loop:
+                    break
+            wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        return sent, started
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def measure_throughput(source, max_ticks=None, consumer=None):
+    count = 0
+    started = time.perf_counter()
+    for snapshot in source:
+        if consumer is not None:
+            consumer(snapshot)
+        count += len(snapshot)
+        if max_ticks and count >= max_ticks:
+            source.stop()
+            break
+    elapsed = time.perf_counter() - started
+    return count, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a backtest CSV as a local tick stream and measure throughput.")
+    parser.add_argument("csv")
+    parser.add_argument("--rate", type=float, help="Ticks per second (default: unthrottled)")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--serve", action="store_true", help="Keep serving instead of measuring one replay")
+    parser.add_argument("--decide", action="store_true", help="Run TradingAI.decide on every received tick")
+    args = parser.parse_args(argv)
+
+    server = ReplayServer(args.csv, port=args.port, rate=args.rate).start()
+    logging.info(f"Replay server listening on {server.address[0]}:{server.address[1]}")
+    if args.serve:
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            server.stop()
+        return
+
+    consumer = None
+    if args.decide:
+        from trading_ai import TradingAI
+        ai = TradingAI()
+
+        def consumer(snapshot):
+            for symbol, data in snapshot.items():
+                ai.decide(symbol, data["price"], data["volume"], data["ask"] - data["bid"])
+
+    total = sum(len(frame) for frame in server.frames)
+    source = StreamingSource(address=server.address)
+    count, elapsed = measure_throughput(source, total, consumer)
+    server.stop()
+    print(f"Received {count} ticks in {elapsed:.3f}s ({count / elapsed if elapsed > 0 else 0:,.0f} ticks/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import argparse
+import json
+import logging
+import math
+import os
+from decimal import Decimal
+import numpy as np
+from config import BINANCE_MARKET_RULES, MARKET_RULES_PATH
+
+VALID, ZERO_QUANTITY, BELOW_MIN_QUANTITY, BELOW_MIN_NOTIONAL = range(4)
+VIOLATIONS = ("valid", "zero quantity", "below minimum quantity", "below minimum notional")
+
+# Quantities within this fraction of a step above a multiple of it are taken
+# to be that multiple, so a float like 0.29 / 0.01 = 28.999999999999996 still
+# counts as 29 steps.
+STEP_TOLERANCE = 1e-9
+
+DEFAULT_SYMBOL_INFO = {
+    "price": {"precision": 4},
+    "amount": {"precision": 6, "min": 0.00001},
+    "notional": {"min": 10.0}
+}
+
+
+def decimal_units(step):
+    # A step size as an integer count of 10**-digits units: 0.01 -> (1, 100),
+    # 0.05 -> (5, 100), 10 -> (10, 1). Works from the decimal text, so there
+    # is no binary rounding in the step itself.
+    step = Decimal(str(step)).normalize()
+    digits = max(0, -step.as_tuple().exponent)
+    return int(step.scaleb(digits)), 10 ** digits
+
+
+class MarketRule:
+    """One symbol's trading rules, compiled. Prices are rounded to the
+    nearest whole tick and quantities floored to whole steps, both as integer
+    multiples of the step so the result is the exact decimal value (the
+    float you get from parsing it), not round()'s binary approximation."""
+
+    __slots__ = ("symbol", "tick_size", "tick_units", "price_scale", "step_size", "step_units", "qty_scale",
+                 "min_qty", "min_notional")
+
+    def __init__(self, symbol, tick_size, step_size, min_qty=0.0, min_notional=0.0):
+        self.symbol = symbol
+        self.tick_units, self.price_scale = decimal_units(tick_size)
+        self.step_units, self.qty_scale = decimal_units(step_size)
+        self.tick_size = self.tick_units / self.price_scale
+        self.step_size = self.step_units / self.qty_scale
+        self.min_qty = float(min_qty)
+        self.min_notional = float(min_notional)
+
+    @classmethod
+    def from_info(cls, symbol, info):
+        # BINANCE_MARKET_RULES style: decimal places for price and amount.
+        return cls(symbol, 10.0 ** -info["price"].get("precision", 2), 10.0 ** -info["amount"].get("precision", 6),
+                   info["amount"].get("min", 0.0), info["notional"].get("min", 10.0))
+
+    def price_ticks(self, price):
+        return round(price * self.price_scale / self.tick_units)
+
+    def quantity_steps(self, quantity):
+        return max(0, math.floor(quantity * self.qty_scale / self.step_units + STEP_TOLERANCE))
+
+    def quantize_price(self, price):
+        return self.price_ticks(price) * self.tick_units / self.price_scale
+
+    def quantize_quantity(self, quantity):
+        # Floors: an order never exceeds the budget or holding it was sized from.
+        return self.quantity_steps(quantity) * self.step_units / self.qty_scale
+
+    def validate(self, price, quantity):
+        if quantity <= 0:
+            return ZERO_QUANTITY
+        if quantity < self.min_qty:
+            return BELOW_MIN_QUANTITY
+        if price * quantity < self.min_notional:
+            return BELOW_MIN_NOTIONAL
+        return VALID
+
+
+class RuleTable:
+    # The same rules as parallel arrays, for quantizing and validating whole
+    # arrays of orders at once. Symbols without a rule use `default`.
+    def __init__(self, rules, default):
+        self.rules = dict(rules)
+        self.default = default
+        self.symbols = list(self.rules)
+        self.ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        table = list(self.rules.values()) + [default]
+        self.tick_units = np.array([r.tick_units for r in table], dtype=np.float64)
+        self.price_scale = np.array([r.price_scale for r in table], dtype=np.float64)
+        self.step_units = np.array([r.step_units for r in table], dtype=np.float64)
+        self.qty_scale = np.array([r.qty_scale for r in table], dtype=np.float64)
+        self.min_qty = np.array([r.min_qty for r in table])
+        self.min_notional = np.array([r.min_notional for r in table])
+
+    def __getitem__(self, symbol):
+        return self.rules.get(symbol, self.default)
+
+    def __contains__(self, symbol):
+        return symbol in self.rules
+
+    def rule_ids(self, symbols):
+        # A single symbol applies to every order.
+        missing = len(self.symbols)
+        if isinstance(symbols, str):
+            return self.ids.get(symbols, missing)
+        return np.array([self.ids.get(symbol, missing) for symbol in symbols], dtype=np.int64)
+
+    def quantize_prices(self, symbols, prices):
+        ids = self.rule_ids(symbols)
+        units, scale = self.tick_units[ids], self.price_scale[ids]
+        return np.rint(np.asarray(prices, dtype=np.float64) * scale / units) * units / scale
+
+    def quantize_quantities(self, symbols, quantities):
+        ids = self.rule_ids(symbols)
+        units, scale = self.step_units[ids], self.qty_scale[ids]
+        steps = np.floor(np.asarray(quantities, dtype=np.float64) * scale / units + STEP_TOLERANCE)
+        return np.maximum(steps, 0.0) * units / scale
+
+    def validate(self, symbols, prices, quantities):
+        # One violation code per order (VALID where it passes), checked in
+        # the same order as MarketRule.validate.
+        ids = self.rule_ids(symbols)
+        prices = np.asarray(prices, dtype=np.float64)
+        quantities = np.asarray(quantities, dtype=np.float64)
+        codes = np.full(np.broadcast(prices, quantities).shape, VALID, dtype=np.int8)
+        codes[prices * quantities < self.min_notional[ids]] = BELOW_MIN_NOTIONAL
+        codes[quantities < self.min_qty[ids]] = BELOW_MIN_QUANTITY
+        codes[quantities <= 0] = ZERO_QUANTITY
+        return codes
+
+
+def compile_rules(market_rules=BINANCE_MARKET_RULES):
+    return {symbol: MarketRule.from_info(symbol, info) for symbol, info in market_rules.items()}
+
+
+def parse_exchange_info(info):
+    # Binance /api/v3/exchangeInfo: PRICE_FILTER tickSize, LOT_SIZE stepSize
+    # and minQty, and NOTIONAL (or the older MIN_NOTIONAL) minNotional, all
+    # as decimal strings. Symbols are keyed "BASE/QUOTE" like the rest of the
+    # app.
+    rules = {}
+    for entry in info.get("symbols", []):
+        filters = {f.get("filterType"): f for f in entry.get("filters", [])}
+        price_filter, lot_size = filters.get("PRICE_FILTER"), filters.get("LOT_SIZE")
+        if not price_filter or not lot_size:
+            continue
+        notional = filters.get("NOTIONAL") or filters.get("MIN_NOTIONAL") or {}
+        symbol = f"{entry['baseAsset']}/{entry['quoteAsset']}"
+        try:
+            rules[symbol] = MarketRule(symbol, price_filter["tickSize"], lot_size["stepSize"], lot_size.get("minQty", 0),
+                                       notional.get("minNotional", 0))
+        except (ArithmeticError, KeyError, ValueError) as e:
+            logging.warning(f"Skipping market rules for {symbol}: {e}")
+    return rules
+
+
+def load_exchange_info(path):
+    with open(path) as f:
+        return parse_exchange_info(json.load(f))
+
+
+def load_rules(path=MARKET_RULES_PATH):
+    # Config rules first, then anything in the cached exchange-info file on
+    # top of them.
+    rules = compile_rules()
+    if path and os.path.exists(path):
+        try:
+            rules.update(load_exchange_info(path))
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not load market rules from {path}: {e}")
+    return RuleTable(rules, MarketRule.from_info(None, DEFAULT_SYMBOL_INFO))
+
+
+RULES = load_rules()
+
+
+def rule_for(symbol):
+    return RULES[symbol]
+
+
+def reload_rules(path=MARKET_RULES_PATH):
+    global RULES
+    RULES = load_rules(path)
+    return RULES
+
+
+def fetch_exchange_info(path, client=None):
+    # Saves Binance's exchange info so later runs load rules from disk.
+    from exchange_api import get_exchange
+    info = (client or get_exchange()).publicGetExchangeInfo()
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(info, f)
+    os.replace(tmp, path)
+    return parse_exchange_info(info)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download and cache Binance exchange info for market rules.")
+    parser.add_argument("path", nargs="?", default=MARKET_RULES_PATH or "exchange_info.json")
+    args = parser.parse_args(argv)
+    rules = fetch_exchange_info(args.path)
+    logging.info(f"Saved market rules for {len(rules)} symbols to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
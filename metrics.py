@@ -0,0 +1,325 @@
+import bisect
+import logging
+import os
+import threading
+import time
+import numpy as np
+from config import METRICS_DUMP_PATH, METRICS_ENABLED, METRICS_HOST, METRICS_LOG_INTERVAL, METRICS_PORT
+
+# Histogram bucket upper bounds in seconds: 1-2.5-5 steps from 1 us to 10 s.
+BUCKETS = tuple(m * 10.0 ** e for e in range(-6, 1) for m in (1.0, 2.5, 5.0)) + (10.0,)
+
+_enabled = METRICS_ENABLED
+_metrics = {}
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    # Takes effect immediately on every thread. While off, each instrumented
+    # call site costs one method call and a global lookup.
+    global _enabled
+    _enabled = bool(on)
+
+
+def disable():
+    enable(False)
+
+
+class Counter:
+    """A monotonically increasing count, optionally split by one label."""
+
+    def __init__(self, name, help, label=None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, label=""):
+        if not _enabled:
+            return
+        with self.lock:
+            self.values[label] = self.values.get(label, 0) + amount
+
+    def inc_codes(self, codes, names):
+        # Counts an array of small integer codes (e.g. decision actions) at
+        # once, labelled by names[code].
+        if not _enabled or not len(codes):
+            return
+        counts = np.bincount(codes, minlength=len(names)).tolist()
+        with self.lock:
+            for name, count in zip(names, counts):
+                if count:
+                    self.values[name] = self.values.get(name, 0) + count
+
+    def reset(self):
+        with self.lock:
+            self.values = {}
+
+    def snapshot(self):
+        with self.lock:
+            return sorted(self.values.items())
+
+    def samples(self):
+        values = self.snapshot()
+        if not values and not self.label:
+            values = [("", 0)]
+        for label, value in values:
+            yield self.name, label, value
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("histogram", "label", "started")
+
+    def __init__(self, histogram, label):
+        self.histogram = histogram
+        self.label = label
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, self.label)
+        return False
+
+
+class Histogram:
+    """Observations counted into fixed buckets, optionally split by one
+    label. Quantiles are interpolated within a bucket, so they are estimates
+    good to the bucket width."""
+
+    def __init__(self, name, help, label=None, buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, label=""):
+        if not _enabled:
+            return
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(label)
+            if series is None:
+                series = self.series[label] = _Histogram(len(self.buckets) + 1)
+            series.counts[i] += 1
+            series.sum += value
+            series.count += 1
+
+    def time(self, label=""):
+        # `with STAGE_SECONDS.time("decide"): ...` records the block's
+        # duration; while metrics are off nothing is timed.
+        return _Timer(self, label) if _enabled else _NULL_TIMER
+
+    def quantile(self, q, label=""):
+        series = self.series.get(label)
+        if series is None or not series.count:
+            return None
+        rank = q * series.count
+        seen = 0
+        for i, count in enumerate(series.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else lower
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def reset(self):
+        with self.lock:
+            self.series = {}
+
+    def labels(self):
+        with self.lock:
+            return sorted(self.series)
+
+    def samples(self):
+        bounds = [f"{bound:g}" for bound in self.buckets] + ["+Inf"]
+        with self.lock:
+            series_list = [(label, list(s.counts), s.sum, s.count) for label, s in sorted(self.series.items())]
+        for label, counts, total, count in series_list:
+            cumulative = 0
+            for bound, count_in_bucket in zip(bounds, counts):
+                cumulative += count_in_bucket
+                yield f"{self.name}_bucket", label, cumulative, bound
+            yield f"{self.name}_sum", label, total, None
+            yield f"{self.name}_count", label, count, None
+
+
+def counter(name, help, label=None):
+    return _metrics.setdefault(name, Counter(name, help, label))
+
+
+def histogram(name, help, label=None, buckets=BUCKETS):
+    return _metrics.setdefault(name, Histogram(name, help, label, buckets))
+
+
+def reset():
+    for metric in _metrics.values():
+        metric.reset()
+
+
+# The tick path, from fetch to screen. Stages: fetch (one get_prices call),
+# fetch_ticker (one async per-symbol request), mark, decide, fill, publish,
+# and render_<part> / render_chart on the GUI thread; backtest.py adds signals
+# and backtest (one whole run each).
+STAGE_SECONDS = histogram("trading_stage_seconds", "Time spent in one run of each stage of the tick path", "stage")
+TICK_LATENCY = histogram("trading_tick_latency_seconds", "Seconds from submit_tick until the tick's decisions were made")
+TICKS = counter("trading_ticks_total", "Snapshots processed by the trading engine")
+FETCH_FAILURES = counter("trading_fetch_failures_total", "Ticker requests that failed or timed out", "source")
+DECISIONS = counter("trading_decisions_total", "Decisions made by TradingAI, by action", "action")
+FILLS = counter("trading_fills_total", "Simulated orders filled, by side", "side")
+ORDERS_SKIPPED = counter("trading_orders_skipped_total", "Simulated orders rejected before filling, by reason",
+                         "reason")
+
+
+def _format_value(value):
+    return f"{value:.9g}" if isinstance(value, float) else str(value)
+
+
+def render():
+    # Prometheus text exposition format (version 0.0.4).
+    lines = []
+    for metric in _metrics.values():
+        kind = "histogram" if isinstance(metric, Histogram) else "counter"
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {kind}")
+        for sample in metric.samples():
+            name, label, value = sample[:3]
+            labels = [f'{metric.label}="{label}"'] if metric.label else []
+            if len(sample) > 3 and sample[3] is not None:
+                labels.append(f'le="{sample[3]}"')
+            lines.append(f"{name}{{{','.join(labels)}}} {_format_value(value)}" if labels
+                         else f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def dump(path):
+    # Written to a temporary file and renamed, so a reader (e.g. the
+    # node_exporter textfile collector) never sees half a file.
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+def summary():
+    # One line for the log: p50/p99 per stage, then the counters.
+    parts = []
+    for label in STAGE_SECONDS.labels():
+        parts.append(f"{label} p50 {STAGE_SECONDS.quantile(0.5, label) * 1000:.3f}/"
+                     f"p99 {STAGE_SECONDS.quantile(0.99, label) * 1000:.3f} ms")
+    if TICK_LATENCY.labels():
+        parts.append(f"tick latency p99 {TICK_LATENCY.quantile(0.99) * 1000:.3f} ms")
+    for metric in (DECISIONS, FILLS, ORDERS_SKIPPED, FETCH_FAILURES):
+        values = metric.snapshot()
+        if values:
+            counts = ", ".join(f"{label}={value}" for label, value in values)
+            parts.append(f"{metric.name.replace('trading_', '').replace('_total', '')} {counts}")
+    return " | ".join(parts) if parts else "no samples"
+
+
+class Reporter(threading.Thread):
+    """Logs summary() every `interval` seconds and, with a dump path, writes
+    the Prometheus text to it at the same time."""
+
+    def __init__(self, interval=METRICS_LOG_INTERVAL, dump_path=METRICS_DUMP_PATH):
+        super().__init__(daemon=True, name="MetricsReporter")
+        self.interval = interval
+        self.dump_path = dump_path
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.report()
+
+    def report(self):
+        if not _enabled:
+            return
+        logging.info(f"Metrics: {summary()}")
+        if self.dump_path:
+            try:
+                dump(self.dump_path)
+            except OSError as e:
+                logging.warning(f"Could not write metrics to {self.dump_path}: {e}")
+
+    def stop(self):
+        self.stopped.set()
+        self.report()
+
+
+def serve(port=METRICS_PORT, host=METRICS_HOST):
+    # GET /metrics returns render(); POST /enable and /disable switch
+    # collection on and off without a restart. Bound to localhost by default.
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            self._reply(render(), "text/plain; version=0.0.4; charset=utf-8")
+
+        def do_POST(self):
+            if self.path not in ("/enable", "/disable"):
+                self.send_error(404)
+                return
+            enable(self.path == "/enable")
+            self._reply(f"metrics {'enabled' if _enabled else 'disabled'}\n", "text/plain; charset=utf-8")
+
+        def _reply(self, text, content_type):
+            body = text.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logging.debug(f"Metrics endpoint: {format % args}")
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="MetricsServer").start()
+    logging.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+def start(port=METRICS_PORT, dump_path=METRICS_DUMP_PATH, interval=METRICS_LOG_INTERVAL):
+    # Everything the config asks for: the reporter thread, plus the endpoint
+    # when a port is set. Returns (reporter, server or None).
+    reporter = Reporter(interval, dump_path)
+    reporter.start()
+    server = None
+    if port is not None:
+        try:
+            server = serve(port)
+        except OSError as e:
+            logging.warning(f"Could not serve metrics on port {port}: {e}")
+    return reporter, server
@@ -0,0 +1,129 @@
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from config import AI_HISTORY_LIMIT, DEFAULT_SYMBOLS, OHLCV_CACHE_BARS, OHLCV_CACHE_DIR, OHLCV_MAX_AGE, \
+    OHLCV_TIMEFRAME, PRICE_FEED_MAX_CONCURRENCY
+
+# One .npy per symbol and timeframe, rows of closed candles in time order.
+TIME, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def timeframe_seconds(timeframe):
+    # ccxt timeframe strings: "1m" -> 60, "4h" -> 14400.
+    return int(timeframe[:-1]) * UNIT_SECONDS[timeframe[-1]]
+
+
+def cache_path(symbol, timeframe=OHLCV_TIMEFRAME, cache_dir=OHLCV_CACHE_DIR):
+    return os.path.join(cache_dir, f"{symbol.replace('/', '-')}_{timeframe}.npy")
+
+
+def read_bars(symbol, timeframe=OHLCV_TIMEFRAME, cache_dir=OHLCV_CACHE_DIR):
+    path = cache_path(symbol, timeframe, cache_dir)
+    try:
+        bars = np.load(path, allow_pickle=False)
+    except FileNotFoundError:
+        return np.zeros((0, 6))
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable OHLCV cache {path}: {e}")
+        return np.zeros((0, 6))
+    return bars if bars.ndim == 2 and bars.shape[1] == 6 else np.zeros((0, 6))
+
+
+def write_bars(symbol, bars, timeframe=OHLCV_TIMEFRAME, cache_dir=OHLCV_CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(symbol, timeframe, cache_dir)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, bars)
+    os.replace(tmp, path)
+
+
+def merge_bars(cached, fetched, keep=OHLCV_CACHE_BARS):
+    # Fetched candles replace cached ones with the same open time.
+    if not len(fetched):
+        return cached[-keep:]
+    bars = np.concatenate((cached[cached[:, TIME] < fetched[0, TIME]], fetched))
+    return bars[-keep:]
+
+
+def fetch_bars(client, symbol, timeframe=OHLCV_TIMEFRAME, since=None, limit=OHLCV_CACHE_BARS):
+    # Closed candles only: the one still forming would change under us.
+    rows = client.fetch_ohlcv(symbol, timeframe, since=since, limit=limit) or []
+    bars = np.array(rows, dtype=np.float64).reshape(-1, 6)
+    bars[:, TIME] /= 1000.0
+    return bars[bars[:, TIME] + timeframe_seconds(timeframe) <= time.time()]
+
+
+def refresh(symbols, timeframe=OHLCV_TIMEFRAME, client=None, cache_dir=OHLCV_CACHE_DIR, keep=OHLCV_CACHE_BARS):
+    # Tops up every symbol's cache from the exchange, asking only for candles
+    # after the newest cached one, with the requests in parallel. A symbol
+    # whose fetch fails keeps its cached candles. Returns {symbol: bars}.
+    if client is None:
+        from exchange_api import get_exchange
+        client = get_exchange()
+    step = timeframe_seconds(timeframe)
+
+    def update(symbol):
+        cached = read_bars(symbol, timeframe, cache_dir)
+        since = int((cached[-1, TIME] + step) * 1000) if len(cached) else int((time.time() - keep * step) * 1000)
+        try:
+            bars = merge_bars(cached, fetch_bars(client, symbol, timeframe, since, keep), keep)
+        except Exception as e:
+            logging.warning(f"Could not fetch {timeframe} candles for {symbol}: {e}")
+            return cached
+        if len(bars) != len(cached) or (len(bars) and bars[-1, TIME] != cached[-1, TIME]):
+            try:
+                write_bars(symbol, bars, timeframe, cache_dir)
+            except OSError as e:
+                logging.warning(f"Could not cache candles for {symbol}: {e}")
+        return bars
+
+    with ThreadPoolExecutor(max_workers=max(1, min(PRICE_FEED_MAX_CONCURRENCY, len(symbols)))) as pool:
+        return dict(zip(symbols, pool.map(update, symbols)))
+
+
+def load_histories(symbols, limit=AI_HISTORY_LIMIT, timeframe=OHLCV_TIMEFRAME, online=True, client=None,
+                   cache_dir=OHLCV_CACHE_DIR, max_age=OHLCV_MAX_AGE):
+    # {symbol: (closes, quote volumes)} of the newest `limit` candles, for
+    # TradingAI.seed_history(). Refreshed from the exchange when `online`,
+    # otherwise straight from disk. Symbols with no candles, or whose newest
+    # candle closed more than `max_age` seconds ago, are left out so they
+    # warm up on live ticks instead of stale history.
+    symbols = list(symbols)
+    bars = None
+    if online:
+        try:
+            bars = refresh(symbols, timeframe, client, cache_dir)
+        except Exception as e:
+            logging.warning(f"Could not refresh candles, using the cache as is: {e}")
+    if bars is None:
+        bars = {symbol: read_bars(symbol, timeframe, cache_dir) for symbol in symbols}
+    cutoff = time.time() - max_age - timeframe_seconds(timeframe)
+    histories = {}
+    for symbol, rows in bars.items():
+        if not len(rows) or rows[-1, TIME] < cutoff:
+            continue
+        rows = rows[-limit:]
+        # Tickers report quote volume; candles have base volume.
+        histories[symbol] = (rows[:, CLOSE], rows[:, CLOSE] * rows[:, VOLUME])
+    return histories
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download recent candles into the OHLCV warm-start cache.")
+    parser.add_argument("--symbols", help="Comma-separated symbols (default: config.DEFAULT_SYMBOLS)")
+    parser.add_argument("--timeframe", default=OHLCV_TIMEFRAME)
+    parser.add_argument("--cache-dir", default=OHLCV_CACHE_DIR)
+    args = parser.parse_args(argv)
+    symbols = args.symbols.split(",") if args.symbols else list(DEFAULT_SYMBOLS)
+    bars = refresh(symbols, args.timeframe, cache_dir=args.cache_dir)
+    for symbol, rows in bars.items():
+        print(f"{symbol}: {len(rows)} {args.timeframe} candles cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,57 @@
 import logging
 from config import INITIAL_BALANCE
-from exchange_api import quantize_quantity, quantize_price, check_min_notional
+from execution import BUY, SELL, create_execution
+from market_rules import BELOW_MIN_NOTIONAL, VALID, VIOLATIONS, rule_for
+from metrics import FILLS, ORDERS_SKIPPED
+from trade_ledger import BUY_SIDE, SELL_SIDE, TradeLedger
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+def _skip_reason(violation):
+    # Metric label for a rejected order: "below minimum quantity" -> "below_minimum_quantity".
+    return VIOLATIONS[violation].replace(" ", "_")
+
 class Portfolio:
-    def __init__(self, initial_balance=INITIAL_BALANCE):
+    def __init__(self, initial_balance=INITIAL_BALANCE, execution=None, trade_log=None):
         self.initial_balance = initial_balance
+        self.execution = execution or create_execution()
         self.balance = initial_balance
         self.holdings = {}
         self.avg_buy_price = {}
-        self.trade_log = []
-
-    def buy(self, symbol, price, position_fraction):
+        self.trade_log = trade_log if trade_log is not None else TradeLedger()
+        # Running mark-to-market: the last price seen per symbol, and per held
+        # symbol a (symbol, qty, value, gain, gain_pct) row at that price.
+        # Only symbols whose price moved, or that just traded, are revalued.
+        self.marks = {}
+        self.positions = {}
+        self.holdings_value = 0.0
+        self.unrealized_pnl = 0.0
+        self.realized_pnl = 0.0
+
+    def buy(self, symbol, price, position_fraction, quote=None):
+        # `quote` is the tick ({price, volume, bid, ask}) the execution model
+        # fills against; the last-price model ignores it.
+        rule = rule_for(symbol)
         max_investment_usd = self.balance * position_fraction
         
-        quantized_price = quantize_price(symbol, price)
+        unit_cost = rule.quantize_price(self.execution.estimate(BUY, symbol, price, quote))
 
-        qty_to_buy_raw = max_investment_usd / quantized_price if quantized_price > 0 else 0
+        qty_to_buy_raw = max_investment_usd / unit_cost if unit_cost > 0 else 0
         
-        qty_to_buy = quantize_quantity(symbol, qty_to_buy_raw)
+        qty_to_buy = rule.quantize_quantity(qty_to_buy_raw)
 
-        cost_of_trade = quantized_price * qty_to_buy
+        fill_price, fee = self.execution.fill(BUY, symbol, price, qty_to_buy, quote)
+        quantized_price = rule.quantize_price(fill_price)
+        cost_of_trade = quantized_price * qty_to_buy + fee
 
-        if not check_min_notional(symbol, quantized_price, qty_to_buy):
+        violation = rule.validate(quantized_price, qty_to_buy)
+        if violation == BELOW_MIN_NOTIONAL:
+            ORDERS_SKIPPED.inc(label="below_minimum_notional")
             logging.warning(f"SIMULATED BUY {symbol}: Investment of ${cost_of_trade:.2f} (qty={qty_to_buy:.8f}) is below simulated minimum notional. Skipping.")
             return False
 
-        if qty_to_buy <= 0 or cost_of_trade > self.balance:
+        if violation != VALID or cost_of_trade > self.balance:
+            ORDERS_SKIPPED.inc(label=_skip_reason(violation) if violation != VALID else "insufficient_funds")
             logging.warning(f"SIMULATED BUY {symbol}: Insufficient funds or invalid quantity ({qty_to_buy:.8f}) after quantization. Cost: ${cost_of_trade:.2f}, Balance: ${self.balance:,.2f}")
             return False
 
@@ -36,44 +60,45 @@ class Portfolio:
 
         new_total_qty = current_qty + qty_to_buy
         new_avg_price = (
-            (current_avg_price * current_qty + quantized_price * qty_to_buy) / new_total_qty
+            (current_avg_price * current_qty + cost_of_trade) / new_total_qty
             if new_total_qty > 0 else 0
         )
 
         self.holdings[symbol] = new_total_qty
         self.avg_buy_price[symbol] = new_avg_price
         self.balance -= cost_of_trade
+        self.marks[symbol] = price
+        self._revalue(symbol)
 
-        self.trade_log.append({
-            "action": "BUY",
-            "symbol": symbol,
-            "price": quantized_price,
-            "quantity": qty_to_buy,
-            "cost": cost_of_trade,
-            "balance_after": self.balance
-        })
+        self.trade_log.append(BUY_SIDE, symbol, quantized_price, qty_to_buy, quantized_price * qty_to_buy, fee,
+                              -cost_of_trade, self.balance)
+        FILLS.inc(label="BUY")
         logging.info(f"SIMULATED BUY {symbol}: Bought {qty_to_buy:.8f} at ${quantized_price:,.8f}. Remaining balance: ${self.balance:,.2f}")
         return True
 
-    def sell(self, symbol, price, quantity_to_sell_raw):
+    def sell(self, symbol, price, quantity_to_sell_raw, quote=None):
         qty_held = self.holdings.get(symbol, 0)
         if qty_held <= 0 or quantity_to_sell_raw <= 0:
             logging.debug(f"SIMULATED SELL {symbol}: No holdings or invalid quantity to sell.")
             return False
 
-        quantized_price = quantize_price(symbol, price)
+        rule = rule_for(symbol)
+        quantity_to_sell = rule.quantize_quantity(min(qty_held, quantity_to_sell_raw))
 
-        quantity_to_sell = quantize_quantity(symbol, min(qty_held, quantity_to_sell_raw))
-
-        if quantity_to_sell <= 0:
-            logging.warning(f"SIMULATED SELL {symbol}: Quantized quantity to sell is zero. Skipping.")
-            return False
-        
-        potential_revenue = quantized_price * quantity_to_sell
-        if not check_min_notional(symbol, quantized_price, quantity_to_sell):
+        fill_price, fee = self.execution.fill(SELL, symbol, price, quantity_to_sell, quote)
+        quantized_price = rule.quantize_price(fill_price)
+        potential_revenue = quantized_price * quantity_to_sell - fee
+        violation = rule.validate(quantized_price, quantity_to_sell)
+        if violation == BELOW_MIN_NOTIONAL:
+            ORDERS_SKIPPED.inc(label="below_minimum_notional")
             logging.warning(f"SIMULATED SELL {symbol}: Sale of {quantity_to_sell:.8f} at ${quantized_price:,.8f} (${potential_revenue:.2f}) is below simulated minimum notional. Skipping.")
             return False
+        if violation != VALID:
+            ORDERS_SKIPPED.inc(label=_skip_reason(violation))
+            logging.warning(f"SIMULATED SELL {symbol}: Quantized quantity {quantity_to_sell:.8f} is {VIOLATIONS[violation]}. Skipping.")
+            return False
             
+        self.realized_pnl += potential_revenue - self.avg_buy_price.get(symbol, 0) * quantity_to_sell
         new_qty = qty_held - quantity_to_sell
         if new_qty < 1e-9:
             new_qty = 0
@@ -83,38 +108,84 @@ class Portfolio:
             self.holdings[symbol] = new_qty
         
         self.balance += potential_revenue
+        self.marks[symbol] = price
+        self._revalue(symbol)
 
-        self.trade_log.append({
-            "action": "SELL",
-            "symbol": symbol,
-            "price": quantized_price,
-            "quantity": quantity_to_sell,
-            "revenue": potential_revenue,
-            "balance_after": self.balance
-        })
+        self.trade_log.append(SELL_SIDE, symbol, quantized_price, quantity_to_sell, quantized_price * quantity_to_sell,
+                              fee, potential_revenue, self.balance)
+        FILLS.inc(label="SELL")
         logging.info(f"SIMULATED SELL {symbol}: Sold {quantity_to_sell:.8f} at ${quantized_price:,.8f}. Current balance: ${self.balance:,.2f}")
         return True
 
-    def get_holdings_detail(self, current_prices):
-        details = []
-        for symbol, qty in self.holdings.items():
-            if qty <= 0:
-                continue
-            price_data = current_prices.get(symbol, {})
-            price = price_data.get('price', 0)
-            avg_price = self.avg_buy_price.get(symbol, 0)
-            value = qty * price
-            profit_loss = (price - avg_price) * qty if avg_price > 0 else 0
-            details.append((symbol, qty, value, profit_loss))
-        return details
-
-    def get_profit_loss(self, current_prices):
-        holdings_value = sum(
-            current_prices.get(sym, {}).get('price', 0) * qty
-            for sym, qty in self.holdings.items()
-        )
-        total_value = self.balance + holdings_value
-        return total_value - self.initial_balance
+    def _revalue(self, symbol):
+        old = self.positions.get(symbol)
+        if old is not None:
+            self.holdings_value -= old[2]
+            self.unrealized_pnl -= old[3]
+        qty = self.holdings.get(symbol, 0)
+        if qty <= 0:
+            self.positions.pop(symbol, None)
+            if not self.positions:
+                # Nothing held: drop whatever rounding the deltas left behind.
+                self.holdings_value = self.unrealized_pnl = 0.0
+            return
+        price = self.marks.get(symbol, 0)
+        avg_price = self.avg_buy_price.get(symbol, 0)
+        value = qty * price
+        gain = (price - avg_price) * qty if avg_price > 0 else 0
+        cost = value - gain
+        self.positions[symbol] = (symbol, qty, value, gain, gain / cost * 100 if cost != 0 else 0)
+        self.holdings_value += value
+        self.unrealized_pnl += gain
+
+    def mark(self, prices):
+        # Marks a snapshot ({symbol: {price, ...}}); pass only the symbols that
+        # ticked and the cost follows the snapshot, not the holdings.
+        for symbol, data in prices.items():
+            price = data.get('price', 0)
+            if self.marks.get(symbol) != price:
+                self.marks[symbol] = price
+                if symbol in self.positions:
+                    self._revalue(symbol)
+
+    @property
+    def equity(self):
+        return self.balance + self.holdings_value
+
+    @property
+    def profit_loss(self):
+        return self.equity - self.initial_balance
+
+    def get_holdings_detail(self, current_prices=None):
+        # (symbol, qty, value, gain, gain_pct) per position at the latest marks.
+        if current_prices:
+            self.mark(current_prices)
+        return list(self.positions.values())
+
+    def get_profit_loss(self, current_prices=None):
+        if current_prices:
+            self.mark(current_prices)
+        return self.profit_loss
+
+    def remove_symbol(self, symbol):
+        self.holdings.pop(symbol, None)
+        self.avg_buy_price.pop(symbol, None)
+        self.marks.pop(symbol, None)
+        self._revalue(symbol)
+
+    def restore(self, initial_balance, balance, holdings, avg_buy_price, marks, realized_pnl=0.0):
+        # Picks up a saved session (see checkpoint.py); positions are revalued
+        # at the saved marks.
+        self.initial_balance = initial_balance
+        self.balance = balance
+        self.holdings = dict(holdings)
+        self.avg_buy_price = dict(avg_buy_price)
+        self.marks = dict(marks)
+        self.realized_pnl = realized_pnl
+        self.positions.clear()
+        self.holdings_value = self.unrealized_pnl = 0.0
+        for symbol in self.holdings:
+            self._revalue(symbol)
 
     def get_trade_log(self):
         return self.trade_log
@@ -124,4 +195,7 @@ class Portfolio:
         self.holdings.clear()
         self.avg_buy_price.clear()
         self.trade_log.clear()
+        self.marks.clear()
+        self.positions.clear()
+        self.holdings_value = self.unrealized_pnl = self.realized_pnl = 0.0
         logging.info("Portfolio reset.")
\ No newline at end of file
@@ -0,0 +1,99 @@
+import asyncio
+import inspect
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import DEFAULT_SYMBOLS, PRICE_FEED_MAX_CONCURRENCY, PRICE_FEED_TIMEOUT, PRICE_POLL_INTERVAL
+from exchange_api import get_exchange, parse_ticker
+from metrics import FETCH_FAILURES, STAGE_SECONDS
+
+
+class AsyncPriceFeed:
+    def __init__(self, symbols=None, client=None, max_concurrency=PRICE_FEED_MAX_CONCURRENCY,
+                 request_timeout=PRICE_FEED_TIMEOUT, interval=PRICE_POLL_INTERVAL):
+        self.symbols = list(DEFAULT_SYMBOLS if symbols is None else symbols)
+        self.client = client or get_exchange()
+        self.max_concurrency = max_concurrency
+        self.request_timeout = request_timeout
+        self.interval = interval
+        self.running = True
+        self._loop = None
+        self._queue = None
+        self._executor = None
+
+    def _run_blocking(self, func, *args):
+        # Blocking clients run on the feed's own pool of max_concurrency
+        # threads. A call that times out keeps its thread until it returns,
+        # so later calls queue behind it instead of piling up more threads.
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="PriceFeed")
+        return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def _fetch(self, symbol, semaphore):
+        async with semaphore:
+            fetch = self.client.fetch_ticker
+            call = fetch(symbol) if inspect.iscoroutinefunction(fetch) else self._run_blocking(fetch, symbol)
+            try:
+                with STAGE_SECONDS.time("fetch_ticker"):
+                    ticker = await asyncio.wait_for(call, self.request_timeout)
+                return parse_ticker(ticker)
+            except asyncio.TimeoutError:
+                FETCH_FAILURES.inc(label="async_timeout")
+                logging.warning(f"Timed out fetching ticker for {symbol} after {self.request_timeout:.1f}s")
+            except Exception as e:
+                FETCH_FAILURES.inc(label="async")
+                logging.warning(f"Failed to fetch ticker for {symbol}: {e}")
+        return None
+
+    async def fetch_all(self):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(*(self._fetch(symbol, semaphore) for symbol in self.symbols))
+        return {symbol: data for symbol, data in zip(self.symbols, results) if data is not None}
+
+    async def _poll_symbol(self, symbol, semaphore, queue):
+        while self.running:
+            started = time.monotonic()
+            data = await self._fetch(symbol, semaphore)
+            if data is not None and self.running:
+                queue.put_nowait((symbol, data))
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    async def snapshots(self):
+        # Every symbol is polled on its own schedule, so a slow ticker never
+        # holds up the others; whatever has arrived is yielded as one snapshot.
+        self._loop = asyncio.get_running_loop()
+        self._queue = queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        workers = [asyncio.create_task(self._poll_symbol(symbol, semaphore, queue)) for symbol in self.symbols]
+        try:
+            while self.running:
+                item = await queue.get()
+                if item is None:
+                    break
+                snapshot = dict([item])
+                while not queue.empty():
+                    item = queue.get_nowait()
+                    if item is None:
+                        self.running = False
+                        break
+                    snapshot[item[0]] = item[1]
+                yield snapshot
+        finally:
+            self.running = False
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self._loop = self._queue = None
+            self.close()
+
+    def stop(self):
+        self.running = False
+        loop, queue = self._loop, self._queue
+        if loop is not None and queue is not None:
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    def close(self):
+        # Stuck fetches are abandoned rather than waited for.
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
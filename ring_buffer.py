@@ -0,0 +1,94 @@
+import numpy as np
+
+
+class RingBuffer:
+    # Fixed-capacity history of `width`-field rows stored column-major in one
+    # block. Every row is written twice, at slot i and i + capacity, so the most
+    # recent rows are always a single contiguous slice: window() never copies.
+    def __init__(self, capacity, width=1, dtype=np.float64):
+        if capacity <= 0:
+            raise ValueError("RingBuffer capacity must be positive")
+        self.capacity = capacity
+        self.width = width
+        self.data = np.zeros((width, 2 * capacity), dtype=dtype)
+        self.head = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, row):
+        head = self.head
+        self.data[:, head] = row
+        self.data[:, head + self.capacity] = row
+        self.head = head + 1 if head + 1 < self.capacity else 0
+        if self.size < self.capacity:
+            self.size += 1
+
+    def window(self, n=None):
+        n = self.size if n is None else min(n, self.size)
+        end = self.head + self.capacity
+        return self.data[:, end - n:end]
+
+    def column(self, field, n=None):
+        return self.window(n)[field]
+
+    def last(self):
+        if not self.size:
+            return None
+        return self.data[:, self.head + self.capacity - 1]
+
+    def clear(self):
+        self.head = 0
+        self.size = 0
+
+
+class BatchRingBuffer:
+    # One RingBuffer per lane (symbol) packed into a single (width, lanes,
+    # 2 * capacity) array so a whole snapshot is appended with one scatter.
+    def __init__(self, capacity, width=1, lanes=0, dtype=np.float64):
+        if capacity <= 0:
+            raise ValueError("RingBuffer capacity must be positive")
+        self.capacity = capacity
+        self.width = width
+        self.data = np.zeros((width, lanes, 2 * capacity), dtype=dtype)
+        self.head = np.zeros(lanes, dtype=np.int64)
+        self.size = np.zeros(lanes, dtype=np.int64)
+
+    @property
+    def lanes(self):
+        return len(self.head)
+
+    def resize(self, lanes):
+        if lanes <= self.lanes:
+            return
+        data = np.zeros((self.width, lanes, 2 * self.capacity), dtype=self.data.dtype)
+        data[:, :self.lanes] = self.data
+        self.data = data
+        self.head = np.concatenate((self.head, np.zeros(lanes - len(self.head), dtype=np.int64)))
+        self.size = np.concatenate((self.size, np.zeros(lanes - len(self.size), dtype=np.int64)))
+
+    def reset(self, lanes):
+        self.head[lanes] = 0
+        self.size[lanes] = 0
+
+    def append(self, lanes, rows):
+        head = self.head[lanes]
+        self.data[:, lanes, head] = rows
+        self.data[:, lanes, head + self.capacity] = rows
+        self.head[lanes] = np.where(head + 1 < self.capacity, head + 1, 0)
+        self.size[lanes] = np.minimum(self.size[lanes] + 1, self.capacity)
+
+    def append_one(self, lane, row):
+        head = self.head.item(lane)
+        self.data[:, lane, head] = row
+        self.data[:, lane, head + self.capacity] = row
+        self.head[lane] = head + 1 if head + 1 < self.capacity else 0
+        if self.size.item(lane) < self.capacity:
+            self.size[lane] += 1
+
+    def window(self, lane, n=None):
+        size = int(self.size[lane])
+        n = size if n is None else min(n, size)
+        end = int(self.head[lane]) + self.capacity
+        return self.data[:, lane, end - n:end]
@@ -0,0 +1,200 @@
+import argparse
+import logging
+import threading
+import time
+from config import DEFAULT_SYMBOLS, INITIAL_BALANCE, MARKET_DATA_SOURCE, MARKET_DATA_STREAM_ADDRESS, \
+    SIMULATION_DECISION_LOG_CAPACITY
+from decision_log import DecisionLog
+from market_data import create_source
+from portfolio import Portfolio
+from trading_ai import TradingAI
+from trading_engine import execute_decisions
+
+RISK_LEVELS = ("aggressive", "moderate", "conservative")
+
+
+class Strategy:
+    # One independent (TradingAI, Portfolio) pair. `elapsed` is the time spent
+    # on this strategy's own decisions and fills, excluding the indicator
+    # update it shares with the rest of its group.
+    def __init__(self, name, ai, portfolio):
+        self.name = name
+        self.ai = ai
+        self.portfolio = portfolio
+        self.elapsed = 0.0
+        self.ticks = 0
+
+    def result(self, prices):
+        return {
+            "name": self.name,
+            "risk": self.ai.risk,
+            "balance": self.portfolio.balance,
+            "profit_loss": self.portfolio.get_profit_loss(prices),
+            "realized_pnl": self.portfolio.realized_pnl,
+            "trades": self.portfolio.trade_log.total,
+            "us_per_tick": self.elapsed / self.ticks * 1e6 if self.ticks else 0.0,
+        }
+
+
+class SimulationHost:
+    """Runs many strategies against one price stream. Each snapshot is fetched
+    once and fanned out to every strategy; strategies whose AIs compute the
+    same indicators (equal indicator_key()) share one observe_batch() per
+    snapshot and only apply their own thresholds, sizing and exits."""
+
+    def __init__(self, symbols=None):
+        self.symbols = list(symbols) if symbols is not None else None
+        self.strategies = {}
+        self.groups = {}
+        self.latest_prices = {}
+        self.observe_elapsed = 0.0
+        self.ticks = 0
+        self.lock = threading.Lock()
+
+    def add_strategy(self, name, ai=None, portfolio=None, risk_level="moderate", initial_balance=INITIAL_BALANCE):
+        # The host decides on every snapshot and builds no bars, so AIs with
+        # a timeframe are refused; the ones it creates itself have none.
+        if ai is None:
+            ai = TradingAI(risk_level)
+            ai.decision_log = DecisionLog(capacity=SIMULATION_DECISION_LOG_CAPACITY)
+            ai.timeframe = None
+        elif ai.timeframe:
+            raise ValueError(f"Strategy '{name}' decides on {ai.timeframe} bars; the simulation host only supports ticks")
+        strategy = Strategy(name, ai, portfolio or Portfolio(initial_balance))
+        with self.lock:
+            if name in self.strategies:
+                raise ValueError(f"Strategy '{name}' already exists")
+            self.strategies[name] = strategy
+            key = ai.indicator_key()
+            group = self.groups.get(key)
+            if group is None:
+                # The observer only carries indicator state; copy the key's
+                # settings from the first AI that needs it.
+                observer = TradingAI(ai.risk)
+                observer.decision_log = DecisionLog(capacity=1)
+                observer.history_limit, observer.ema_span, observer.ema_mode, observer.rsi_period, \
+                    observer.rsi_mode, observer.timeframe = key
+                group = self.groups[key] = (observer, [])
+            group[1].append(strategy)
+        return strategy
+
+    def remove_strategy(self, name):
+        with self.lock:
+            strategy = self.strategies.pop(name)
+            key = strategy.ai.indicator_key()
+            members = self.groups[key][1]
+            members.remove(strategy)
+            if not members:
+                del self.groups[key]
+        return strategy
+
+    def on_prices(self, prices):
+        self.latest_prices = {**self.latest_prices, **prices}
+        self.ticks += 1
+        symbols = self.symbols if self.symbols is not None else list(prices)
+        snapshot = {symbol: prices[symbol] for symbol in symbols if symbol in prices}
+        if not snapshot:
+            return
+        with self.lock:
+            for observer, members in self.groups.values():
+                started = time.perf_counter()
+                view = observer.observe_batch(snapshot)
+                self.observe_elapsed += time.perf_counter() - started
+                for strategy in members:
+                    started = time.perf_counter()
+                    portfolio = strategy.portfolio
+                    decided, actions, sizes = strategy.ai.decide_from(view, portfolio.avg_buy_price)
+                    execute_decisions(portfolio, snapshot, decided, actions, sizes)
+                    strategy.elapsed += time.perf_counter() - started
+                    strategy.ticks += 1
+
+    def run(self, source, duration=None):
+        if duration:
+            timer = threading.Timer(duration, source.stop)
+            timer.daemon = True
+            timer.start()
+        try:
+            for prices in source:
+                self.on_prices(prices)
+        except KeyboardInterrupt:
+            source.stop()
+
+    def results(self):
+        with self.lock:
+            return [strategy.result(self.latest_prices) for strategy in self.strategies.values()]
+
+    def cost(self):
+        # Seconds per tick: the shared indicator updates and the sum over all
+        # strategies of their own work.
+        ticks = max(self.ticks, 1)
+        return self.observe_elapsed / ticks, sum(s.elapsed for s in self.strategies.values()) / ticks
+
+
+class ReplaySource:
+    # Replays a backtest CSV as a source; same iteration protocol as
+    # market_data.MarketDataSource.
+    def __init__(self, path):
+        from data_loader import load_ticks  # pandas, only for CSV replay
+        self.frames = load_ticks(path).frames()
+        self.stopped = threading.Event()
+
+    def __iter__(self):
+        for frame in self.frames:
+            if self.stopped.is_set():
+                break
+            yield frame
+
+    def stop(self):
+        self.stopped.set()
+
+
+def print_results(results, top=None):
+    results = sorted(results, key=lambda r: r["profit_loss"], reverse=True)[:top]
+    width = max([len("strategy")] + [len(r["name"]) for r in results])
+    print(f"{'strategy':<{width}}  {'risk':<12} {'balance':>12} {'P&L':>10} {'realized':>10} {'trades':>7} {'us/tick':>8}")
+    for r in results:
+        print(f"{r['name']:<{width}}  {r['risk']:<12} {r['balance']:>12,.2f} {r['profit_loss']:>10,.2f} {r['realized_pnl']:>10,.2f} "
+              f"{r['trades']:>7} {r['us_per_tick']:>8.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run several strategies side by side on one price feed.")
+    parser.add_argument("--csv", help="Replay this backtest CSV instead of a live source")
+    parser.add_argument("--source", default=MARKET_DATA_SOURCE, choices=["async", "rest", "stream"])
+    parser.add_argument("--host", default=MARKET_DATA_STREAM_ADDRESS[0], help="Stream source host")
+    parser.add_argument("--port", type=int, help="Stream source port (default: config.MARKET_DATA_STREAM_ADDRESS)")
+    parser.add_argument("--symbols", help="Comma-separated symbols (default: config.DEFAULT_SYMBOLS)")
+    parser.add_argument("--risk", default=",".join(RISK_LEVELS), help="Comma-separated risk levels, one strategy each")
+    parser.add_argument("--copies", type=int, default=1, help="Strategies per risk level")
+    parser.add_argument("--balance", type=float, default=INITIAL_BALANCE)
+    parser.add_argument("--duration", type=float, help="Stop a live run after this many seconds")
+    parser.add_argument("--top", type=int, help="Only print the best N strategies")
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    symbols = args.symbols.split(",") if args.symbols else list(DEFAULT_SYMBOLS)
+    host = SimulationHost(symbols)
+    for risk in args.risk.split(","):
+        for copy in range(args.copies):
+            name = risk if args.copies == 1 else f"{risk}-{copy + 1}"
+            host.add_strategy(name, risk_level=risk, initial_balance=args.balance)
+
+    if args.csv:
+        source = ReplaySource(args.csv)
+    else:
+        address = (args.host, args.port) if args.port else MARKET_DATA_STREAM_ADDRESS
+        source = create_source(args.source, symbols, address)
+
+    started = time.perf_counter()
+    host.run(source, args.duration)
+    elapsed = time.perf_counter() - started
+
+    print_results(host.results(), args.top)
+    shared, own = host.cost()
+    print(f"{len(host.strategies)} strategies, {host.ticks} ticks in {elapsed:.2f}s | per tick: "
+          f"shared indicators {shared * 1e6:.0f} us, strategies {own * 1e6:.0f} us "
+          f"({own / max(len(host.strategies), 1) * 1e6:.1f} us each)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import argparse
+import itertools
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from config import DEFAULT_SYMBOLS, INITIAL_BALANCE
+from backtest import run_backtest
+from data_loader import load_ticks
+from trading_ai import TradingAI
+
+# Everything run_backtest() may read: bid/ask for the quote and book
+# execution models, timestamps for bars when AI_TIMEFRAME is set.
+SHARED_FIELDS = ("price", "volume", "bid", "ask", "present", "timestamps")
+
+# TradingAI attributes a grid may override. "risk_level" picks the preset and
+# "max_position" overrides the preset's position cap.
+TUNABLE = ("history_limit", "ema_span", "rsi_period", "ema_mode", "rsi_mode",
+           "rsi_buy_below", "rsi_sell_above", "stop_loss", "take_profit")
+
+DEFAULT_GRID = {
+    "risk_level": ["aggressive", "moderate", "conservative"],
+    "rsi_buy_below": [30, 35, 40],
+    "rsi_sell_above": [60, 65, 70],
+    "stop_loss": [0.95, 0.97],
+    "take_profit": [1.05, 1.10],
+}
+
+_shared = {}
+
+
+def expand_grid(grid):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+def build_ai(params):
+    ai = TradingAI(params.get("risk_level", "moderate"))
+    for name in TUNABLE:
+        if name in params:
+            setattr(ai, name, params[name])
+    if "max_position" in params:
+        ai.current_params["max_pos"] = params["max_position"]
+    return ai
+
+
+def share_arrays(arrays, directory):
+    # Written once as .npy files; workers memory-map them read-only, so the
+    # history is never pickled per task and pages are shared by the OS.
+    for field in SHARED_FIELDS:
+        np.save(os.path.join(directory, f"{field}.npy"), arrays[field])
+
+
+def _init_worker(directory, symbols, initial_balance):
+    # Per-trade warnings from thousands of runs would drown the results.
+    logging.getLogger().setLevel(logging.ERROR)
+    _shared["arrays"] = {field: np.load(os.path.join(directory, f"{field}.npy"), mmap_mode="r") for field in SHARED_FIELDS}
+    _shared["symbols"] = symbols
+    _shared["initial_balance"] = initial_balance
+
+
+def evaluate(params):
+    started = time.perf_counter()
+    result = run_backtest(_shared["arrays"], _shared["symbols"], initial_balance=_shared["initial_balance"], ai=build_ai(params))
+    return {
+        **params,
+        "profit_loss": result.profit_loss,
+        "max_drawdown": result.max_drawdown,
+        "trades": result.trade_log.total,
+        "runtime_sec": time.perf_counter() - started,
+    }
+
+
+def run_sweep(csv_path, grid=None, symbols=None, initial_balance=INITIAL_BALANCE, workers=None):
+    combos = expand_grid(grid or DEFAULT_GRID)
+    symbols = list(symbols or DEFAULT_SYMBOLS)
+    arrays = load_ticks(csv_path).aligned(symbols)
+
+    directory = tempfile.mkdtemp(prefix="sweep_")
+    rows = []
+    try:
+        share_arrays(arrays, directory)
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                                 initargs=(directory, symbols, initial_balance)) as pool:
+            futures = [pool.submit(evaluate, params) for params in combos]
+            for done, future in enumerate(as_completed(futures), 1):
+                rows.append(future.result())
+                logging.info(f"Sweep progress: {done}/{len(combos)}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    table = pd.DataFrame(rows).sort_values(["profit_loss", "max_drawdown"], ascending=[False, True])
+    return table.reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grid-search TradingAI parameters over a backtest CSV on all cores.")
+    parser.add_argument("csv")
+    parser.add_argument("--grid", help="JSON object (or path to a JSON file) mapping parameter names to value lists")
+    parser.add_argument("--symbols", help="Comma-separated symbols (default: config.DEFAULT_SYMBOLS)")
+    parser.add_argument("--balance", type=float, default=INITIAL_BALANCE)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", help="Write the full ranked table to this CSV file")
+    parser.add_argument("--verbose", action="store_true", help="Log sweep progress")
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    grid = None
+    if args.grid:
+        if os.path.exists(args.grid):
+            with open(args.grid) as f:
+                grid = json.load(f)
+        else:
+            grid = json.loads(args.grid)
+    symbols = args.symbols.split(",") if args.symbols else None
+
+    started = time.perf_counter()
+    table = run_sweep(args.csv, grid, symbols, args.balance, args.workers)
+    print(table.head(args.top).to_string(index=False))
+    print(f"\n{len(table)} combinations in {time.perf_counter() - started:.1f}s")
+    if args.out:
+        table.to_csv(args.out, index=False)
+
+
+if __name__ == "__main__":
+    main()
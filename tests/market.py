@@ -0,0 +1,11 @@
+from benchmarks.synthetic import random_walk
+
+
+def walk(symbols, ticks, seed=0, volatility=0.004):
+    # benchmarks.synthetic.random_walk() rescaled to start near $10, so the
+    # AI's position sizes clear the minimum notional and it actually trades.
+    arrays = random_walk(symbols, ticks, seed, volatility)
+    scale = 10.0 / arrays["price"][0]
+    for field in ("price", "bid", "ask"):
+        arrays[field] = arrays[field] * scale
+    return arrays
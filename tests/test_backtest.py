@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from backtest import frames_to_arrays, run_backtest
+from benchmarks.synthetic import snapshots, symbol_names
+from market import walk
+from portfolio import Portfolio
+from trading_ai import TradingAI
+
+SYMBOLS = symbol_names(5)
+
+
+def replay(frames, risk_level):
+    # The tick-by-tick loop the UI ran before the vectorised backtest: one
+    # decide() per symbol and snapshot, filled straight away.
+    ai, portfolio = TradingAI(risk_level), Portfolio()
+    decisions = []
+    for prices in frames:
+        for symbol in SYMBOLS:
+            data = prices.get(symbol)
+            if data is None:
+                continue
+            decision, pos_size = ai.decide(symbol, data["price"], data["volume"], data["ask"] - data["bid"],
+                                           portfolio.avg_buy_price.get(symbol))
+            decisions.append(decision)
+            if decision == "BUY" and pos_size > 0:
+                portfolio.buy(symbol, data["price"], pos_size)
+            elif decision == "SELL" and pos_size > 0:
+                held = portfolio.holdings.get(symbol, 0)
+                if held > 0:
+                    portfolio.sell(symbol, data["price"], held * pos_size)
+    return portfolio, decisions
+
+
+@pytest.fixture(scope="module")
+def frames():
+    arrays = walk(SYMBOLS, 4_000, seed=3)
+    frames = snapshots(arrays, SYMBOLS)
+    # Gaps and bad ticks, as real feeds have.
+    rng = np.random.default_rng(4)
+    for prices in frames:
+        for symbol in SYMBOLS:
+            roll = rng.random()
+            if roll < 0.05:
+                del prices[symbol]
+            elif roll < 0.06:
+                prices[symbol] = {**prices[symbol], "volume": 0.0}
+    return frames
+
+
+@pytest.mark.parametrize("risk_level", ["aggressive", "moderate", "conservative"])
+def test_backtest_matches_the_tick_by_tick_loop(frames, risk_level):
+    portfolio, decisions = replay(frames, risk_level)
+    result = run_backtest(frames, SYMBOLS, risk_level)
+
+    assert result.trade_log.total == portfolio.trade_log.total > 0
+    assert [{**t, "time": 0} for t in result.trade_log] == [{**t, "time": 0} for t in portfolio.trade_log]
+    assert result.portfolio.balance == portfolio.balance
+    assert result.portfolio.holdings == portfolio.holdings
+    present = frames_to_arrays(frames, SYMBOLS)["present"]
+    assert list(result.decision_names()[present]) == decisions
+
+
+def test_frames_and_arrays_give_the_same_result(frames):
+    from_frames = run_backtest(frames, SYMBOLS, "aggressive")
+    from_arrays = run_backtest(frames_to_arrays(frames, SYMBOLS), SYMBOLS, "aggressive")
+    np.testing.assert_array_equal(from_frames.decisions, from_arrays.decisions)
+    np.testing.assert_array_equal(from_frames.equity, from_arrays.equity)
@@ -0,0 +1,56 @@
+import numpy as np
+from bars import CLOSE, HIGH, LOW, OPEN, TICKS, BarAggregator, close_events
+from benchmarks.synthetic import snapshots, symbol_names
+from indicators import IndicatorSet
+from market import walk
+
+SYMBOLS = symbol_names(4)
+TIMEFRAMES = ("1s", "7s", "1m")
+
+
+def ticks(n=3_000, seed=5):
+    # Irregular timestamps, several ticks per second, with some symbols
+    # missing from some ticks.
+    arrays = walk(SYMBOLS, n, seed=seed)
+    rng = np.random.default_rng(seed)
+    arrays["present"] = rng.random(arrays["price"].shape) < 0.9
+    times = 1_700_000_000 + np.cumsum(rng.exponential(0.4, n))
+    frames = [{symbol: data for j, (symbol, data) in enumerate(prices.items()) if arrays["present"][t, j]}
+              for t, prices in enumerate(snapshots(arrays, SYMBOLS))]
+    return arrays, times, frames
+
+
+def test_close_events_match_the_aggregator_tick_by_tick():
+    arrays, times, frames = ticks()
+    bars = BarAggregator(TIMEFRAMES)
+    events = {timeframe: close_events(arrays, times, timeframe) for timeframe in TIMEFRAMES}
+    for t, prices in enumerate(frames):
+        closed = bars.update(float(times[t]), prices)
+        for timeframe, grids in events.items():
+            js = np.flatnonzero(grids["present"][t])
+            symbols, closes = closed.get(timeframe, ([], np.zeros((TICKS + 1, 0))))
+            assert symbols == [SYMBOLS[j] for j in js]
+            for name, field in (("price", CLOSE), ("open", OPEN), ("high", HIGH), ("low", LOW), ("ticks", TICKS)):
+                np.testing.assert_array_equal(closes[field], grids[name][t, js])
+    assert all(grids["present"].any() for grids in events.values())
+
+
+def test_indicators_stream_over_closed_bars():
+    _, times, frames = ticks()
+    settings = (3, 5, 6, "exponential", "wilder")
+    bars = BarAggregator(TIMEFRAMES, 8, *settings)
+    reference = {(timeframe, symbol): IndicatorSet(*settings) for timeframe in TIMEFRAMES for symbol in SYMBOLS}
+    for t, prices in enumerate(frames):
+        if t == 1_500:
+            bars.remove_symbol(SYMBOLS[0])
+            for timeframe in TIMEFRAMES:
+                reference[timeframe, SYMBOLS[0]] = IndicatorSet(*settings)
+        for timeframe, (symbols, closes) in bars.update(float(times[t]), prices).items():
+            for symbol, close in zip(symbols, closes[CLOSE].tolist()):
+                reference[timeframe, symbol].update(close)
+
+    for timeframe in TIMEFRAMES:
+        expected = np.array([reference[timeframe, symbol].values() for symbol in SYMBOLS]).T
+        np.testing.assert_array_equal(np.array(bars.indicators(timeframe, SYMBOLS)), expected)
+    ema, rsi, volatility = bars.indicators("1m", ["UNKNOWN/USDT"])
+    assert np.isnan(ema[0]) and np.isnan(rsi[0]) and np.isnan(volatility[0])
@@ -0,0 +1,48 @@
+import numpy as np
+from benchmarks.synthetic import snapshots, symbol_names
+from checkpoint import capture, load, restore, write
+from market import walk
+from portfolio import Portfolio
+from trading_ai import TradingAI
+from trading_engine import TradingEngine, bars_for
+
+SYMBOLS = symbol_names(4)
+
+
+def make_engine(bars=None, ai=None, portfolio=None):
+    ai = ai or TradingAI("aggressive")
+    ai.timeframe = "7s"
+    engine = TradingEngine(ai, portfolio or Portfolio(), symbols=SYMBOLS, bars=bars)
+    engine.trading_active = True
+    return engine
+
+
+def test_resumed_engine_continues_like_an_uninterrupted_one(tmp_path):
+    frames = snapshots(walk(SYMBOLS, 3_000, seed=11), SYMBOLS)
+    # Mid-bar for 7s bars, and late enough that the bar rings still hold
+    # bars from before the restart at the end.
+    cut = 2_803
+    straight = make_engine()
+    for t, prices in enumerate(frames):
+        straight.process_tick(prices, t)
+
+    first = make_engine()
+    for t, prices in enumerate(frames[:cut]):
+        first.process_tick(prices, t)
+    path = str(tmp_path / "session.npz")
+    write(capture(first.ai, first.portfolio, bars=first.bars), path)
+
+    ai, portfolio = TradingAI("aggressive"), Portfolio()
+    ai.timeframe = "7s"
+    bars = bars_for(ai)
+    assert restore(load(path), ai, portfolio, bars)
+    resumed = make_engine(bars, ai, portfolio)
+    np.testing.assert_array_equal(resumed.bars.current, first.bars.current)
+    for t, prices in enumerate(frames[cut:], cut):
+        resumed.process_tick(prices, t)
+
+    assert resumed.portfolio.trade_log.total == straight.portfolio.trade_log.total > 0
+    assert resumed.portfolio.balance == straight.portfolio.balance
+    for symbol in SYMBOLS:
+        np.testing.assert_array_equal(resumed.bars.bars("7s", symbol), straight.bars.bars("7s", symbol))
+    np.testing.assert_array_equal(resumed.bars.indicators("7s", SYMBOLS), straight.bars.indicators("7s", SYMBOLS))
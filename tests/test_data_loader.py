@@ -0,0 +1,50 @@
+import csv
+import os
+import numpy as np
+import data_loader
+from data_loader import FIELDS, load_ticks, parse_ticks
+
+ROWS = [
+    ("1700000002", "ETH/USDT", "2000.5", "10", "2000.4", "2000.6"),
+    ("1700000001", "BTC/USDT", "35000.25", "3", "35000", "35000.5"),
+    ("", "BTC/USDT", "1", "1", "1", "1"),
+    ("1700000002", "BTC/USDT", "35001", "", "35000.9", "35001.1"),
+    ("1700000003", "", "1", "1", "1", "1"),
+    ("1700000003", "ETH/USDT", "2001", "11", "2000.9", "2001.1"),
+]
+
+
+def write_csv(path):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp", "symbol", *FIELDS])
+        writer.writerows(ROWS)
+
+
+def test_chunked_parse_skips_unplaceable_rows(tmp_path):
+    path = tmp_path / "ticks.csv"
+    write_csv(path)
+    data = parse_ticks(str(path), chunk_rows=2)
+    assert list(data.timestamps) == ["1700000001", "1700000002", "1700000003"]
+    assert data.symbols == ["ETH/USDT", "BTC/USDT"]
+    kept = [row for row in ROWS if row[0] and row[1]]
+    assert data.time_index.tolist() == [1, 0, 1, 2]
+    for k, field in enumerate(FIELDS):
+        expected = [float(row[2 + k] or 0.0) for row in kept]
+        np.testing.assert_array_equal(data.columns[field], expected)
+
+
+def test_touched_file_restamps_the_cache(tmp_path, monkeypatch):
+    path = tmp_path / "ticks.csv"
+    write_csv(path)
+    load_ticks(str(path), cache_dir=str(tmp_path / "cache"))
+    os.utime(path, ns=(1, 1))
+
+    hashed = []
+    digest = data_loader.file_digest
+    monkeypatch.setattr(data_loader, "file_digest", lambda p: hashed.append(p) or digest(p))
+    first = load_ticks(str(path), cache_dir=str(tmp_path / "cache"))
+    second = load_ticks(str(path), cache_dir=str(tmp_path / "cache"))
+    # Only the first load after the touch has to hash the file.
+    assert len(hashed) == 1
+    np.testing.assert_array_equal(first.columns["price"], second.columns["price"])
@@ -0,0 +1,40 @@
+import csv
+import pytest
+from decision_log import DecisionLog, INSUFFICIENT_HISTORY, NO_SIGNAL
+
+
+def read_rows(path):
+    with open(path, newline='') as f:
+        return list(csv.reader(f))
+
+
+def test_spill_file_keeps_earlier_sessions(tmp_path):
+    spill = tmp_path / "decisions.csv"
+    first = DecisionLog(spill_path=str(spill), spill_chunk=2)
+    for k in range(3):
+        first.append("BTC/USDT", 0, 100.0 + k, 0.0, INSUFFICIENT_HISTORY)
+    first.flush()
+
+    # A new session, e.g. the next TradingAI, appends instead of truncating.
+    second = DecisionLog(spill_path=str(spill), spill_chunk=2)
+    second.append("ETH/USDT", 1, 50.0, 0.5, NO_SIGNAL)
+    second.flush()
+
+    rows = read_rows(spill)
+    assert rows[0] == ["time", "symbol", "action", "price", "position_size_fraction", "reason"]
+    assert [row[1] for row in rows[1:]] == ["BTC/USDT"] * 3 + ["ETH/USDT"]
+    assert sum(row[0] == "time" for row in rows) == 1
+
+    out = tmp_path / "export.csv"
+    assert second.export(str(out)) == 4
+    assert read_rows(out) == rows
+
+
+def test_export_refuses_the_spill_file(tmp_path):
+    spill = tmp_path / "decisions.csv"
+    log = DecisionLog(spill_path=str(spill))
+    log.append("BTC/USDT", 0, 100.0, 0.0, NO_SIGNAL)
+    with pytest.raises(ValueError):
+        log.export(str(spill))
+    log.flush()
+    assert len(read_rows(spill)) == 2
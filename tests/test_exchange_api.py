@@ -0,0 +1,71 @@
+import pytest
+import exchange_api
+from config import DEFAULT_SYMBOLS
+from exchange_api import get_prices
+
+
+def ticker(price):
+    return {"last": price, "quoteVolume": 1e6, "bid": price - 0.01, "ask": price + 0.01}
+
+
+class FakeClient:
+    # fetch_tickers() leaves out MISSING, returns a malformed ticker for
+    # BROKEN, or raises outright when `bulk_fails`; fetch_ticker() raises for
+    # DOWN. Every call is recorded.
+    def __init__(self, bulk_fails=False):
+        self.bulk_fails = bulk_fails
+        self.bulk_calls = []
+        self.single_calls = []
+
+    def fetch_tickers(self, symbols):
+        self.bulk_calls.append(list(symbols))
+        if self.bulk_fails:
+            raise RuntimeError("exchange unavailable")
+        tickers = {symbol: ticker(10.0 + k) for k, symbol in enumerate(symbols) if symbol != "MISSING/USDT"}
+        if "BROKEN/USDT" in tickers:
+            tickers["BROKEN/USDT"] = {"last": 1.0}
+        return tickers
+
+    def fetch_ticker(self, symbol):
+        self.single_calls.append(symbol)
+        if symbol == "DOWN/USDT":
+            raise RuntimeError("timed out")
+        return ticker(1.0)
+
+
+SYMBOLS = ["BTC/USDT", "MISSING/USDT", "BROKEN/USDT", "ETH/USDT", "DOWN/USDT"]
+
+
+def test_only_symbols_the_bulk_fetch_misses_fall_back():
+    client = FakeClient()
+    prices = get_prices(SYMBOLS, client)
+    assert client.bulk_calls == [SYMBOLS]
+    assert client.single_calls == ["MISSING/USDT", "BROKEN/USDT"]
+    assert prices["BTC/USDT"] == {"price": 10.0, "volume": 1e6, "bid": 9.99, "ask": 10.01}
+    assert prices["ETH/USDT"]["price"] == 13.0
+    assert prices["MISSING/USDT"]["price"] == prices["BROKEN/USDT"]["price"] == 1.0
+
+    stats = exchange_api.last_fetch_stats
+    assert stats["bulk_latency"] >= 0
+    assert set(stats["fallback_latency"]) == {"MISSING/USDT", "BROKEN/USDT"}
+    assert stats["failed"] == []
+    assert stats["total_latency"] >= stats["bulk_latency"]
+
+
+def test_a_failed_bulk_fetch_falls_back_for_every_symbol():
+    client = FakeClient(bulk_fails=True)
+    prices = get_prices(SYMBOLS, client)
+    assert client.single_calls == SYMBOLS
+    assert sorted(prices) == sorted(set(SYMBOLS) - {"DOWN/USDT"})
+    stats = exchange_api.last_fetch_stats
+    assert set(stats["fallback_latency"]) == set(SYMBOLS)
+    assert stats["failed"] == ["DOWN/USDT"]
+
+
+@pytest.mark.parametrize("symbols, expected", [(None, list(DEFAULT_SYMBOLS)), ([], [])])
+def test_none_means_the_default_symbols_but_empty_means_none(symbols, expected):
+    client = FakeClient()
+    prices = get_prices(symbols, client)
+    assert list(prices) == expected
+    assert client.bulk_calls == ([expected] if len(expected) > 1 else [])
+    assert exchange_api.last_fetch_stats["fallback_latency"] == {}
@@ -0,0 +1,95 @@
+import json
+import pytest
+from execution import BUY, SELL, BookExecution, QuoteExecution
+from market_rules import rule_for
+from portfolio import Portfolio
+
+QUOTE = {"price": 100.0, "volume": 1e6, "bid": 99.9, "ask": 100.1}
+
+
+def test_quotes_fill_buys_at_the_ask_and_sells_at_the_bid():
+    execution = QuoteExecution(taker_fee=0.001, impact=0.0)
+    assert execution.fill(BUY, "BTC/USDT", 100.0, 2.0, QUOTE) == (100.1, pytest.approx(100.1 * 2.0 * 0.001))
+    assert execution.fill(SELL, "BTC/USDT", 100.0, 2.0, QUOTE) == (99.9, pytest.approx(99.9 * 2.0 * 0.001))
+    assert execution.estimate(BUY, "BTC/USDT", 100.0, QUOTE) == pytest.approx(100.1 * 1.001)
+    assert execution.estimate(SELL, "BTC/USDT", 100.0, QUOTE) == pytest.approx(99.9 * 0.999)
+    # Passive fills are the other way round; a missing or crossed quote
+    # fills at the last price.
+    maker = QuoteExecution(liquidity="maker")
+    assert maker.fill(BUY, "BTC/USDT", 100.0, 2.0, QUOTE)[0] == 99.9
+    assert maker.fill(SELL, "BTC/USDT", 100.0, 2.0, QUOTE)[0] == 100.1
+    assert execution.fill(BUY, "BTC/USDT", 100.0, 2.0, None)[0] == 100.0
+    assert execution.fill(BUY, "BTC/USDT", 100.0, 2.0, {**QUOTE, "bid": 101.0})[0] == 100.0
+
+
+def test_slippage_grows_with_the_square_root_of_size_up_to_the_cap():
+    execution = QuoteExecution(taker_fee=0.0, impact=0.1, max_slippage=0.05)
+    small, _ = execution.fill(BUY, "BTC/USDT", 100.0, 10.0, QUOTE)
+    assert small == pytest.approx(100.1 * (1 + 0.1 * (100.1 * 10.0 / 1e6) ** 0.5))
+    larger, _ = execution.fill(BUY, "BTC/USDT", 100.0, 40.0, QUOTE)
+    assert (larger / 100.1 - 1) == pytest.approx(2 * (small / 100.1 - 1))
+    sold, _ = execution.fill(SELL, "BTC/USDT", 100.0, 10.0, QUOTE)
+    assert sold == pytest.approx(99.9 * (1 - 0.1 * (99.9 * 10.0 / 1e6) ** 0.5))
+    # 0.1 * sqrt(notional / volume) passes 5% once notional exceeds a
+    # quarter of the quoted volume.
+    huge, _ = execution.fill(BUY, "BTC/USDT", 100.0, 5_000.0, QUOTE)
+    assert huge == pytest.approx(100.1 * 1.05)
+    assert execution.fill(BUY, "BTC/USDT", 100.0, 5_000.0, {**QUOTE, "volume": 0.0})[0] == 100.1
+
+
+def test_fees_come_out_of_cash_and_into_the_average_cost():
+    portfolio = Portfolio(10_000.0, QuoteExecution(taker_fee=0.001, impact=0.0))
+    rule = rule_for("BTC/USDT")
+    assert portfolio.buy("BTC/USDT", 100.0, 0.5, QUOTE)
+    qty = portfolio.holdings["BTC/USDT"]
+    # Sized on the fee-inclusive ask, at the symbol's tick size.
+    assert qty == rule.quantize_quantity(5_000.0 / rule.quantize_price(100.1 * 1.001))
+    buy = portfolio.trade_log.records()[-1]
+    assert buy["price"] == 100.1 and buy["fee"] == pytest.approx(100.1 * qty * 0.001)
+    assert buy["cash"] == pytest.approx(-(100.1 * qty + buy["fee"]))
+    assert portfolio.balance == pytest.approx(10_000.0 + buy["cash"])
+    assert portfolio.avg_buy_price["BTC/USDT"] == pytest.approx(100.1 * 1.001)
+
+    assert portfolio.sell("BTC/USDT", 100.0, qty, QUOTE)
+    sell = portfolio.trade_log.records()[-1]
+    assert sell["price"] == 99.9 and sell["cash"] == pytest.approx(99.9 * qty * 0.999)
+    assert portfolio.realized_pnl == pytest.approx(sell["cash"] + buy["cash"])
+    assert portfolio.trade_log.total_fees == pytest.approx(buy["fee"] + sell["fee"])
+
+
+@pytest.fixture
+def books(tmp_path):
+    path = tmp_path / "books.jsonl"
+    snapshots = [
+        {"time": 10.0, "symbol": "BTC/USDT", "bids": [[99.0, 1.0]], "asks": [[101.0, 1.0]]},
+        {"time": 20.0, "symbol": "BTC/USDT", "bids": [[99.5, 1.0], [99.0, 2.0]],
+         "asks": [[100.5, 1.0], [101.0, 2.0], [102.0, 1.0]]},
+        {"time": 30.0, "symbol": "BTC/USDT", "bids": [[98.0, 1.0]], "asks": [[103.0, 1.0]]},
+    ]
+    # Written out of order; load_books() sorts each symbol by time.
+    path.write_text("\n".join(json.dumps(snapshot) for snapshot in reversed(snapshots)) + "\n")
+    return str(path)
+
+
+def test_book_walks_the_latest_snapshot_at_or_before_the_quote(books):
+    execution = BookExecution(books, taker_fee=0.0, impact=0.0)
+    at = lambda t: {**QUOTE, "time": t}
+    assert execution.fill(BUY, "BTC/USDT", 100.0, 1.0, at(25.0))[0] == 100.5
+    assert execution.fill(BUY, "BTC/USDT", 100.0, 1.0, at(20.0))[0] == 100.5
+    assert execution.fill(BUY, "BTC/USDT", 100.0, 1.0, at(19.9))[0] == 101.0
+    assert execution.fill(BUY, "BTC/USDT", 100.0, 1.0, None)[0] == 103.0
+    assert execution.estimate(BUY, "BTC/USDT", 100.0, at(25.0)) == 100.5
+    assert execution.estimate(SELL, "BTC/USDT", 100.0, at(25.0)) == 99.5
+
+    # Walking the levels: 1 @ 100.5 + 2 @ 101.0 + 0.5 @ 102.0.
+    assert execution.fill(BUY, "BTC/USDT", 100.0, 3.5, at(25.0))[0] == pytest.approx((100.5 + 202.0 + 51.0) / 3.5)
+    assert execution.fill(SELL, "BTC/USDT", 100.0, 2.0, at(25.0))[0] == pytest.approx((99.5 + 99.0) / 2.0)
+    # Past the book's depth the rest fills at the last level.
+    assert execution.fill(BUY, "BTC/USDT", 100.0, 6.0, at(25.0))[0] == pytest.approx((100.5 + 202.0 + 102.0 * 3) / 6.0)
+
+
+def test_book_falls_back_to_the_quote(books):
+    execution = BookExecution(books, taker_fee=0.0, impact=0.0)
+    assert execution.fill(BUY, "BTC/USDT", 100.0, 1.0, {**QUOTE, "time": 5.0})[0] == 100.1
+    assert execution.fill(BUY, "ETH/USDT", 100.0, 1.0, {**QUOTE, "time": 25.0})[0] == 100.1
+    assert execution.estimate(SELL, "ETH/USDT", 100.0, QUOTE) == 99.9
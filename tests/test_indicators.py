@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+from numpy.lib.stride_tricks import sliding_window_view
+from indicators import RESYNC_PERIODS, BatchIndicatorSet, IndicatorSet, RollingSum, indicator_series
+
+STEPS = 100_000
+SPAN, PERIOD, WINDOW = 5, 14, 14
+
+
+def random_walk(steps, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, steps)))
+
+
+def baseline_rsi(prices, period=PERIOD):
+    # TradingAI.calculate_rsi before the streaming indicators replaced it.
+    if len(prices) < period:
+        return None
+    deltas = np.diff(prices[-period:])
+    gains = deltas[deltas > 0].sum()
+    losses = -deltas[deltas < 0].sum()
+    if losses == 0:
+        return 100
+    rs = gains / losses
+    return 100 - (100 / (1 + rs))
+
+
+def reference_recursive(prices, span=SPAN, period=PERIOD):
+    # Textbook EMA (SMA seed, then alpha smoothing) and Wilder RSI (mean
+    # seed over `period` moves, then (p - 1) / p smoothing).
+    alpha = 2.0 / (span + 1)
+    ema = np.full(len(prices), np.nan)
+    ema[span - 1] = np.mean(prices[:span])
+    for t in range(span, len(prices)):
+        ema[t] = ema[t - 1] + alpha * (prices[t] - ema[t - 1])
+    deltas = np.diff(prices)
+    gains, losses = np.maximum(deltas, 0.0), np.maximum(-deltas, 0.0)
+    rsi = np.full(len(prices), np.nan)
+    avg_gain, avg_loss = np.mean(gains[:period]), np.mean(losses[:period])
+    for t in range(period, len(prices)):
+        if t > period:
+            avg_gain = (avg_gain * (period - 1) + gains[t - 1]) / period
+            avg_loss = (avg_loss * (period - 1) + losses[t - 1]) / period
+        rsi[t] = 100 - 100 / (1 + avg_gain / avg_loss)
+    return ema, rsi
+
+
+def stream(prices, ema_mode="simple", rsi_mode="simple"):
+    indicators = IndicatorSet(SPAN, PERIOD, WINDOW, ema_mode, rsi_mode)
+    out = np.full((3, len(prices)), np.nan)
+    for t, price in enumerate(prices.tolist()):
+        indicators.update(price)
+        for k, value in enumerate(indicators.values()):
+            if value is not None:
+                out[k, t] = value
+    return out
+
+
+@pytest.fixture(scope="module")
+def prices():
+    return random_walk(STEPS)
+
+
+@pytest.fixture(scope="module")
+def streamed(prices):
+    return stream(prices)
+
+
+def test_simple_mode_matches_recomputing_each_window(prices, streamed):
+    ema, rsi, volatility = streamed
+    mean = np.mean(sliding_window_view(prices, SPAN), axis=1)
+    std = np.std(sliding_window_view(prices, WINDOW), axis=1)
+    np.testing.assert_allclose(ema[SPAN - 1:], mean, rtol=1e-12)
+    np.testing.assert_allclose(volatility[WINDOW - 1:], std, rtol=1e-9)
+    assert np.isnan(ema[:SPAN - 1]).all() and np.isnan(volatility[:WINDOW - 1]).all()
+
+    # The baseline loop is slow; every 7th window still covers every
+    # position relative to the resync period.
+    checked = range(PERIOD - 1, STEPS, 7)
+    expected = np.array([baseline_rsi(prices[t - PERIOD + 1:t + 1]) for t in checked])
+    np.testing.assert_allclose(rsi[list(checked)], expected, rtol=1e-9)
+
+
+def test_running_sums_do_not_drift_across_resyncs(prices):
+    # Compare right before and right after every fsum resync, including the
+    # last one, against an exact sum of the same window.
+    window = RollingSum(WINDOW)
+    every = WINDOW * RESYNC_PERIODS
+    worst = 0.0
+    for t, price in enumerate(prices.tolist()):
+        window.push(price)
+        if t >= WINDOW and window.pushes % every in (every - 1, 0, 1):
+            exact = np.sum(prices[t - WINDOW + 1:t + 1])
+            worst = max(worst, abs(window.total - exact) / exact)
+            if window.pushes % every == 0:
+                assert window.total == pytest.approx(exact, rel=1e-15)
+    assert STEPS // every > 100
+    assert worst < 1e-12
+
+
+def test_series_match_streaming_bit_for_bit(prices, streamed):
+    # The backtester's vectorised series must equal the live path exactly.
+    np.testing.assert_array_equal(np.array(indicator_series(prices, SPAN, PERIOD, WINDOW)), streamed)
+
+
+def test_recursive_modes_match_their_textbook_definitions(prices):
+    ema, rsi, volatility = stream(prices, "exponential", "wilder")
+    expected_ema, expected_rsi = reference_recursive(prices)
+    np.testing.assert_allclose(ema, expected_ema, rtol=1e-12)
+    np.testing.assert_allclose(rsi, expected_rsi, rtol=1e-9)
+    np.testing.assert_allclose(volatility[WINDOW - 1:], np.std(sliding_window_view(prices, WINDOW), axis=1), rtol=1e-9)
+
+
+@pytest.mark.parametrize("ema_mode, rsi_mode", [("simple", "simple"), ("exponential", "wilder")])
+def test_batch_lanes_match_the_scalar_indicators(ema_mode, rsi_mode):
+    # Four lanes with gaps, updated in varying subsets as symbols would be,
+    # must each equal a scalar IndicatorSet fed the same prices.
+    lanes = 4
+    walks = np.stack([random_walk(STEPS, seed) for seed in range(1, lanes + 1)], axis=1)
+    present = np.random.default_rng(9).random(walks.shape) > 0.1
+    batch = BatchIndicatorSet(SPAN, PERIOD, WINDOW, ema_mode, rsi_mode)
+    batch.resize(lanes)
+    scalars = [IndicatorSet(SPAN, PERIOD, WINDOW, ema_mode, rsi_mode) for _ in range(lanes)]
+    every = np.arange(lanes)
+    for t in range(STEPS):
+        active = every[present[t]]
+        batch.update(active, walks[t, active])
+        for lane in active.tolist():
+            scalars[lane].update(float(walks[t, lane]))
+        if t % 97 == 0 or t == STEPS - 1:
+            expected = np.array([[np.nan if v is None else v for v in s.values()] for s in scalars]).T
+            np.testing.assert_array_equal(np.array(batch.values(every)), expected)
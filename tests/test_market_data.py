@@ -0,0 +1,67 @@
+import queue
+import threading
+import pytest
+from benchmarks.synthetic import random_walk, snapshots, symbol_names, write_csv
+from market_data import AsyncPollingSource, MarketDataSource, ReplayServer, RestPollingSource, StreamingSource, \
+    create_source, measure_throughput
+
+SYMBOLS = symbol_names(3)
+
+
+def test_sources_must_implement_snapshots():
+    with pytest.raises(TypeError):
+        MarketDataSource()
+
+
+def test_queue_stream_yields_each_snapshot_until_stopped():
+    frames = snapshots(random_walk(SYMBOLS, 50, seed=3), SYMBOLS)
+    ticks = queue.Queue()
+    source = StreamingSource(tick_queue=ticks)
+    for prices in frames:
+        for symbol, data in prices.items():
+            ticks.put({symbol: data})
+
+    received = []
+    reader = threading.Thread(target=lambda: received.extend(source))
+    reader.start()
+    for _ in range(500):
+        if len(received) == 3 * 50:
+            break
+        reader.join(0.01)
+    # stop() wakes a reader blocked on the empty queue.
+    source.stop()
+    reader.join(5)
+    assert not reader.is_alive()
+    assert received == [{symbol: data} for prices in frames for symbol, data in prices.items()]
+    assert source.ticks == 150 and source.throughput() > 0
+
+
+def test_socket_stream_reads_a_replay(tmp_path):
+    arrays = random_walk(SYMBOLS, 40, seed=4)
+    path = tmp_path / "ticks.csv"
+    write_csv(path, arrays, SYMBOLS)
+    server = ReplayServer(str(path)).start()
+    try:
+        received = []
+        count, _ = measure_throughput(StreamingSource(address=server.address), 3 * 40, received.append)
+    finally:
+        server.stop()
+    assert count == 120
+    expected = [{symbol: data} for prices in server.frames for symbol, data in prices.items()]
+    assert received == expected
+
+
+def test_create_source_picks_the_configured_kind():
+    stream = create_source("stream", address=["127.0.0.1", 9999])
+    assert isinstance(stream, StreamingSource) and stream.address == ("127.0.0.1", 9999)
+    rest = create_source("rest", ["BTC/USDT"])
+    assert isinstance(rest, RestPollingSource) and rest.symbols == ["BTC/USDT"]
+    polling = create_source("async", ["BTC/USDT"])
+    try:
+        assert isinstance(polling, AsyncPollingSource)
+    finally:
+        polling.stop()
+    with pytest.raises(ValueError):
+        create_source("carrier-pigeon")
+    with pytest.raises(ValueError):
+        StreamingSource()
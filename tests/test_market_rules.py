@@ -0,0 +1,74 @@
+from decimal import Decimal
+import numpy as np
+import pytest
+from market_rules import STEP_TOLERANCE, MarketRule, RuleTable, compile_rules, parse_exchange_info
+
+RULES = {
+    **compile_rules(),
+    "COARSE/USDT": MarketRule("COARSE/USDT", "0.05", "10", 10, 5.0),
+    "FINE/USDT": MarketRule("FINE/USDT", "0.00000001", "0.1", 0.1, 1.0),
+}
+DEFAULT = MarketRule(None, "0.0001", "0.000001", 0.00001, 10.0)
+
+
+@pytest.fixture(scope="module")
+def orders():
+    rng = np.random.default_rng(6)
+    symbols = list(RULES) + ["UNKNOWN/USDT"]
+    n = 50_000
+    picked = [symbols[i] for i in rng.integers(0, len(symbols), n).tolist()]
+    prices = np.exp(rng.uniform(np.log(1e-4), np.log(1e5), n))
+    quantities = np.exp(rng.uniform(np.log(1e-7), np.log(1e4), n))
+    # Exact multiples of the step, which naive division can floor one short.
+    quantities[::10] = [float(Decimal(k) * Decimal(str(RULES.get(s, DEFAULT).step_size)))
+                        for k, s in zip(rng.integers(1, 1000, n // 10).tolist(), picked[::10])]
+    return picked, prices, quantities
+
+
+def test_table_matches_the_scalar_rules(orders):
+    symbols, prices, quantities = orders
+    table = RuleTable(RULES, DEFAULT)
+    rules = [table[symbol] for symbol in symbols]
+    np.testing.assert_array_equal(table.quantize_prices(symbols, prices),
+                                  [r.quantize_price(p) for r, p in zip(rules, prices.tolist())])
+    np.testing.assert_array_equal(table.quantize_quantities(symbols, quantities),
+                                  [r.quantize_quantity(q) for r, q in zip(rules, quantities.tolist())])
+    np.testing.assert_array_equal(table.validate(symbols, prices, quantities),
+                                  [r.validate(p, q) for r, p, q in zip(rules, prices.tolist(), quantities.tolist())])
+
+
+def test_quantities_floor_to_exact_steps(orders):
+    symbols, _, quantities = orders
+    for symbol, quantity in zip(symbols, quantities.tolist()):
+        rule = RULES.get(symbol, DEFAULT)
+        step = Decimal(str(rule.step_size))
+        result = rule.quantize_quantity(quantity)
+        steps = Decimal(str(result)) / step
+        # A whole number of steps, written exactly, never above the request
+        # beyond the float-noise tolerance, and less than a step below it.
+        assert steps == steps.to_integral_value()
+        assert result == float(steps * step)
+        assert result <= quantity + rule.step_size * STEP_TOLERANCE
+        assert quantity - result < rule.step_size
+
+
+def test_prices_round_to_the_nearest_tick(orders):
+    symbols, prices, _ = orders
+    for symbol, price in zip(symbols, prices.tolist()):
+        rule = RULES.get(symbol, DEFAULT)
+        tick = Decimal(str(rule.tick_size))
+        result = rule.quantize_price(price)
+        assert Decimal(str(result)) % tick == 0
+        assert abs(result - price) <= rule.tick_size / 2 * (1 + 1e-9)
+
+
+def test_exchange_info_filters_become_rules():
+    info = {"symbols": [{
+        "baseAsset": "BTC", "quoteAsset": "USDT",
+        "filters": [{"filterType": "PRICE_FILTER", "tickSize": "0.01000000"},
+                    {"filterType": "LOT_SIZE", "stepSize": "0.00001000", "minQty": "0.00001000"},
+                    {"filterType": "NOTIONAL", "minNotional": "5.00000000"}],
+    }]}
+    rule = parse_exchange_info(info)["BTC/USDT"]
+    assert (rule.tick_size, rule.step_size, rule.min_qty, rule.min_notional) == (0.01, 0.00001, 0.00001, 5.0)
+    assert rule.quantize_quantity(0.29) == 0.29
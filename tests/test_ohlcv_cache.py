@@ -0,0 +1,110 @@
+import time
+import numpy as np
+from ohlcv_cache import CLOSE, TIME, VOLUME, load_histories, read_bars, refresh, write_bars
+from trading_ai import TradingAI
+
+STEP = 60
+
+
+def candles(start, stop, volume=1.0):
+    # Closed 1m candles with open times in [start, stop), as the cache holds
+    # them (seconds).
+    times = np.arange(start, stop, STEP, dtype=np.float64)
+    closes = 10.0 + np.sin(times / 600.0)
+    return np.column_stack((times, closes, closes + 0.1, closes - 0.1, closes, np.full(len(times), volume)))
+
+
+class FakeClient:
+    # fetch_ohlcv() in ccxt's shape: ms open times, from a little before
+    # `since` up to and including the candle still forming now. Symbols in
+    # `failing` raise.
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls.append((symbol, timeframe, since, limit))
+        if symbol in self.failing:
+            raise RuntimeError("rate limited")
+        now = time.time() // STEP * STEP
+        rows = candles(since / 1000.0 - 2 * STEP, now + STEP, volume=2.0)
+        rows[:, TIME] *= 1000.0
+        return rows[-limit:].tolist()
+
+
+def minute():
+    return time.time() // STEP * STEP
+
+
+def test_refresh_tops_up_the_cache_without_the_forming_candle(tmp_path):
+    now = minute()
+    cached = candles(now - 60 * STEP, now - 20 * STEP)
+    write_bars("BTC/USDT", cached, "1m", str(tmp_path))
+    client = FakeClient()
+
+    bars = refresh(["BTC/USDT", "ETH/USDT"], "1m", client, str(tmp_path), keep=100)
+    calls = {call[0]: call for call in client.calls}
+    assert calls["BTC/USDT"][2] == int((cached[-1, TIME] + STEP) * 1000)
+    assert calls["ETH/USDT"][2] <= int((now - 99 * STEP) * 1000)
+
+    btc = bars["BTC/USDT"]
+    # The last cached candles are replaced by the fetched ones with the same
+    # open time, and the candle still forming is left out.
+    assert btc[-1, TIME] + STEP <= time.time()
+    assert btc[-1, TIME] >= now - STEP
+    np.testing.assert_array_equal(np.diff(btc[:, TIME]), STEP)
+    assert btc[0, TIME] == cached[0, TIME]
+    assert (btc[btc[:, TIME] < cached[-1, TIME] - STEP, VOLUME] == 1.0).all()
+    assert (btc[btc[:, TIME] >= cached[-1, TIME] - STEP, VOLUME] == 2.0).all()
+    for symbol, rows in bars.items():
+        np.testing.assert_array_equal(read_bars(symbol, "1m", str(tmp_path)), rows)
+    assert len(bars["ETH/USDT"]) <= 100
+
+
+def test_a_failed_fetch_keeps_the_cached_candles(tmp_path):
+    cached = candles(minute() - 30 * STEP, minute() - 10 * STEP)
+    write_bars("BTC/USDT", cached, "1m", str(tmp_path))
+    bars = refresh(["BTC/USDT"], "1m", FakeClient(failing={"BTC/USDT"}), str(tmp_path))
+    np.testing.assert_array_equal(bars["BTC/USDT"], cached)
+
+
+def test_histories_skip_stale_caches(tmp_path):
+    now = minute()
+    write_bars("BTC/USDT", candles(now - 50 * STEP, now - 10 * STEP), "1m", str(tmp_path))
+    write_bars("ETH/USDT", candles(now - 200 * STEP, now - 100 * STEP), "1m", str(tmp_path))
+
+    histories = load_histories(["BTC/USDT", "ETH/USDT", "SOL/USDT"], limit=14, timeframe="1m", online=False,
+                               cache_dir=str(tmp_path), max_age=30 * STEP)
+    assert list(histories) == ["BTC/USDT"]
+    closes, volumes = histories["BTC/USDT"]
+    cached = read_bars("BTC/USDT", "1m", str(tmp_path))
+    np.testing.assert_array_equal(closes, cached[-14:, CLOSE])
+    np.testing.assert_array_equal(volumes, cached[-14:, CLOSE] * cached[-14:, VOLUME])
+
+    # With a longer max_age the older cache counts too.
+    assert sorted(load_histories(["BTC/USDT", "ETH/USDT"], online=False, cache_dir=str(tmp_path),
+                                 max_age=200 * STEP, timeframe="1m")) == ["BTC/USDT", "ETH/USDT"]
+
+
+def test_offline_histories_never_touch_the_client(tmp_path):
+    write_bars("BTC/USDT", candles(minute() - 20 * STEP, minute() - STEP), "1m", str(tmp_path))
+    client = FakeClient()
+    histories = load_histories(["BTC/USDT"], timeframe="1m", online=False, client=client, cache_dir=str(tmp_path))
+    assert client.calls == [] and list(histories) == ["BTC/USDT"]
+
+
+def test_seeded_ai_decides_on_the_first_live_tick(tmp_path):
+    histories = load_histories(["BTC/USDT", "ETH/USDT"], timeframe="1m", client=FakeClient(),
+                               cache_dir=str(tmp_path))
+    assert sorted(histories) == ["BTC/USDT", "ETH/USDT"]
+    tick = {symbol: {"price": 10.0, "volume": 1e6, "bid": 9.99, "ask": 10.01} for symbol in histories}
+
+    cold = TradingAI("aggressive")
+    cold.decide_batch(tick)
+    assert {r["reason"] for r in cold.decision_log.records()} == {"Insufficient history"}
+
+    warm = TradingAI("aggressive")
+    assert sorted(warm.seed_history(histories)) == ["BTC/USDT", "ETH/USDT"]
+    warm.decide_batch(tick)
+    records = warm.decision_log.records()
+    assert len(records) == 2 and "Insufficient history" not in {r["reason"] for r in records}
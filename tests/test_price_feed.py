@@ -0,0 +1,47 @@
+import asyncio
+import threading
+import time
+from price_feed import AsyncPriceFeed
+
+
+class SlowClient:
+    # A blocking client whose first symbol hangs well past the timeout.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+
+    def fetch_ticker(self, symbol):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(0.2 if symbol == "HANG/USDT" else 0.01)
+            return {"last": 1.0, "quoteVolume": 1.0, "bid": 1.0, "ask": 1.0}
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+def test_timed_out_fetches_keep_their_thread():
+    client = SlowClient()
+    symbols = ["HANG/USDT"] + [f"S{k}/USDT" for k in range(7)]
+    feed = AsyncPriceFeed(symbols, client=client, max_concurrency=2, request_timeout=0.05)
+
+    try:
+        first = asyncio.run(feed.fetch_all())
+        for _ in range(2):
+            asyncio.run(feed.fetch_all())
+        # Once the hung calls return, their threads serve the pool again.
+        time.sleep(0.3)
+        feed.symbols = symbols[1:]
+        second = asyncio.run(feed.fetch_all())
+    finally:
+        feed.close()
+    assert client.peak <= 2
+    assert "HANG/USDT" not in first
+    assert list(second) == symbols[1:]
+
+
+def test_empty_symbol_list_stays_empty():
+    assert AsyncPriceFeed([], client=SlowClient()).symbols == []
@@ -0,0 +1,42 @@
+import pytest
+from backtest import run_backtest
+from benchmarks.synthetic import snapshots, symbol_names, write_csv
+from market import walk
+import simulation
+from simulation import SimulationHost
+from trading_ai import TradingAI
+
+SYMBOLS = symbol_names(4)
+
+
+def test_strategies_trade_like_the_backtest():
+    arrays = walk(SYMBOLS, 3_000, seed=1)
+    host = SimulationHost(SYMBOLS)
+    for risk in simulation.RISK_LEVELS:
+        host.add_strategy(risk, risk_level=risk)
+    for prices in snapshots(arrays, SYMBOLS):
+        host.on_prices(prices)
+
+    assert host.ticks == 3_000
+    for risk in simulation.RISK_LEVELS:
+        expected = run_backtest(arrays, SYMBOLS, risk)
+        strategy = host.strategies[risk]
+        assert strategy.portfolio.trade_log.total == expected.trade_log.total > 0
+        assert strategy.portfolio.balance == expected.portfolio.balance
+
+
+def test_main_replays_a_csv(tmp_path, capsys):
+    path = tmp_path / "prices.csv"
+    write_csv(path, walk(SYMBOLS, 500, seed=2), SYMBOLS)
+    simulation.main(["--csv", str(path), "--symbols", ",".join(SYMBOLS), "--copies", "2"])
+    out = capsys.readouterr().out
+    assert "6 strategies, 500 ticks" in out
+
+
+def test_strategies_with_a_timeframe_are_refused():
+    ai = TradingAI("moderate")
+    ai.timeframe = "1m"
+    host = SimulationHost(SYMBOLS)
+    with pytest.raises(ValueError):
+        host.add_strategy("bars", ai)
+    assert not host.strategies
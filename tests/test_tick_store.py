@@ -0,0 +1,37 @@
+import numpy as np
+from tick_store import TickStore
+
+SYMBOLS = ["BTC/USDT", "BTC-USDT", "1000SATS/USDT:USDT"]
+
+
+def fill(store, ticks=500):
+    rng = np.random.default_rng(2)
+    for k, symbol in enumerate(SYMBOLS):
+        times = np.sort(rng.uniform(0, 10_000, ticks))
+        prices = 100.0 + k + rng.normal(0, 1, ticks)
+        store.append(symbol, times, prices, np.ones(ticks), prices - 0.01, prices + 0.01)
+    store.flush()
+
+
+def test_symbols_round_trip_through_file_names(tmp_path):
+    store = TickStore(str(tmp_path))
+    fill(store)
+    assert TickStore(str(tmp_path)).symbols() == sorted(SYMBOLS)
+    assert len(store) == 3 * 500
+
+
+def test_iter_slices_cover_the_range_once(tmp_path):
+    store = TickStore(str(tmp_path))
+    fill(store)
+    pieces = {symbol: [] for symbol in SYMBOLS}
+    for window in store.iter_slices(SYMBOLS, span=700.0):
+        for symbol, records in window.items():
+            pieces[symbol].append(np.array(records))
+    for symbol in SYMBOLS:
+        np.testing.assert_array_equal(np.concatenate(pieces[symbol]), store.slice(symbol))
+
+    arrays = store.aligned(SYMBOLS, 2_000.0, 3_000.0)
+    for j, symbol in enumerate(SYMBOLS):
+        records = store.slice(symbol, 2_000.0, 3_000.0)
+        np.testing.assert_array_equal(arrays["timestamps"][arrays["present"][:, j]], records["time"])
+        np.testing.assert_array_equal(arrays["price"][arrays["present"][:, j], j], records["price"])
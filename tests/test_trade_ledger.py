@@ -0,0 +1,85 @@
+import csv
+import numpy as np
+from portfolio import Portfolio
+from trade_ledger import BUY_SIDE, FIELDS, INITIAL_ROWS, SELL_SIDE, TradeLedger
+
+
+def fill(ledger, count, start=0):
+    for k in range(start, start + count):
+        side = BUY_SIDE if k % 2 == 0 else SELL_SIDE
+        ledger.append(side, f"SYM{k % 3}/USDT", 10.0 + k, 1.0, 10.0 + k, 0.01, -(10.01 + k), 1_000.0 - k,
+                      timestamp=1_700_000_000 + k)
+
+
+def saved_records(saved):
+    rows, symbols, _, _ = saved
+    return list(TradeLedger._format_rows(rows, symbols))
+
+
+def test_rows_double_up_to_capacity_then_wrap():
+    capacity = 3 * INITIAL_ROWS
+    ledger = TradeLedger(capacity)
+    sizes = []
+    for _ in range(4 * INITIAL_ROWS // 256):
+        fill(ledger, 256, ledger.total)
+        sizes.append(len(ledger.rows))
+    assert sorted(set(sizes)) == [INITIAL_ROWS, 2 * INITIAL_ROWS, capacity]
+    assert ledger.total == 4 * INITIAL_ROWS and len(ledger) == capacity
+
+    # Only the newest `capacity` fills are held, oldest first.
+    np.testing.assert_array_equal(ledger.tail(5)["price"], 10.0 + np.arange(ledger.total - 5, ledger.total))
+    np.testing.assert_array_equal(ledger.tail(10 * capacity)["price"],
+                                  10.0 + np.arange(ledger.total - capacity, ledger.total))
+    records = ledger.records(ledger.total - 3)
+    assert [r["price"] for r in records] == [10.0 + k for k in range(ledger.total - 3, ledger.total)]
+    assert [r["action"] for r in records] == ["SELL", "BUY", "SELL"]
+    assert len(ledger.records(0)) == capacity
+    assert ledger.records(0)[0]["price"] == 10.0 + ledger.total - capacity
+
+
+def test_journal_has_every_fill_after_flush(tmp_path):
+    path = tmp_path / "trades.csv"
+    ledger = TradeLedger(capacity=50, journal_path=str(path), journal_chunk=16)
+    fill(ledger, 120)
+    ledger.flush()
+    with open(path, newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == FIELDS
+    assert len(rows) == 121
+    assert [float(row[3]) for row in rows[1:]] == [10.0 + k for k in range(120)]
+    assert rows[1][:3] == ["2023-11-14T22:13:20.000", "BUY", "SYM0/USDT"]
+
+    # A second ledger on the same file appends below the one header.
+    again = TradeLedger(journal_path=str(path))
+    fill(again, 1)
+    again.flush()
+    with open(path, newline='') as f:
+        rows = list(csv.reader(f))
+    assert len(rows) == 122 and sum(row == FIELDS for row in rows) == 1
+
+
+def test_clear_and_restore_start_new_generations(tmp_path):
+    path = tmp_path / "trades.csv"
+    ledger = TradeLedger(capacity=64, journal_path=str(path), journal_chunk=1_000)
+    fill(ledger, 100)
+    generation = ledger.generation
+    saved = ledger.tail(len(ledger)).copy(), list(ledger.symbols), ledger.total, ledger.total_fees
+
+    ledger.clear()
+    assert ledger.generation == generation + 1
+    assert ledger.total == len(ledger) == 0 and ledger.records() == [] and ledger.total_fees == 0.0
+    # clear() flushes first: the journal keeps what was cleared.
+    with open(path, newline='') as f:
+        assert len(list(csv.reader(f))) == 101
+
+    restored = TradeLedger(capacity=64)
+    restored.restore(*saved)
+    assert restored.generation == 1
+    assert restored.total == 100 and len(restored) == 64
+    assert restored.records(90) == [r for r in saved_records(saved) if r["price"] >= 100.0]
+    fill(restored, 1, 100)
+    assert restored.records(99)[-1]["price"] == 110.0
+
+
+def test_portfolio_ledger_does_not_journal_by_default():
+    assert Portfolio().trade_log.journal_path is None
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from benchmarks.synthetic import snapshots, symbol_names
+from market import walk
+from trading_ai import ACTION_CODES, TradingAI
+
+SYMBOLS = symbol_names(6)
+
+
+def make_ai(ema_mode, rsi_mode):
+    ai = TradingAI("aggressive")
+    ai.ema_mode, ai.rsi_mode = ema_mode, rsi_mode
+    return ai
+
+
+def feed(seed=5, ticks=10_000):
+    # Snapshots with gaps and invalid ticks; the last symbol joins halfway
+    # and the first one is dropped for good at 3/4.
+    frames = snapshots(walk(SYMBOLS, ticks, seed=seed, volatility=0.01), SYMBOLS)
+    rng = np.random.default_rng(seed)
+    for t, prices in enumerate(frames):
+        for symbol in list(prices):
+            roll = rng.random()
+            if roll < 0.05:
+                del prices[symbol]
+            elif roll < 0.07:
+                prices[symbol] = {**prices[symbol], "price": 0.0}
+        if t < ticks // 2:
+            prices.pop(SYMBOLS[-1], None)
+        if t >= 3 * ticks // 4:
+            prices.pop(SYMBOLS[0], None)
+    return frames
+
+
+# 0 always vectorizes, 100 always steps lanes one by one, and 5 switches
+# between the two from tick to tick as symbols drop in and out.
+@pytest.mark.parametrize("batch_min_symbols", [0, 5, 100])
+@pytest.mark.parametrize("ema_mode, rsi_mode", [("simple", "simple"), ("exponential", "wilder")])
+def test_decide_batch_matches_decide(ema_mode, rsi_mode, batch_min_symbols):
+    scalar, batch = make_ai(ema_mode, rsi_mode), make_ai(ema_mode, rsi_mode)
+    batch.batch_min_symbols = batch_min_symbols
+    # Entry prices for some symbols so stop-loss/take-profit exits fire.
+    avg_buy = {SYMBOLS[1]: 10.0, SYMBOLS[2]: 9.0}
+    removed = False
+    actions_seen = set()
+    for t, prices in enumerate(feed()):
+        if not removed and SYMBOLS[0] not in prices and t >= 7_500:
+            scalar.remove_symbol(SYMBOLS[0])
+            batch.remove_symbol(SYMBOLS[0])
+            removed = True
+        expected = [scalar.decide(symbol, data["price"], data["volume"], data["ask"] - data["bid"],
+                                  avg_buy.get(symbol))
+                    for symbol, data in prices.items()]
+        symbols, actions, sizes = batch.decide_batch(prices, avg_buy)
+        assert symbols == list(prices)
+        assert actions.tolist() == [ACTION_CODES[action] for action, _ in expected]
+        assert sizes.tolist() == [float(size) for _, size in expected]
+        actions_seen.update(actions.tolist())
+    assert removed and actions_seen == {0, 1, 2}
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from backtest import run_backtest
+from benchmarks.synthetic import snapshots, symbol_names
+from market import walk
+from trading_ai import TradingAI
+from trading_engine import TradingEngine
+
+SYMBOLS = symbol_names(5)
+
+
+@pytest.fixture(scope="module")
+def frames():
+    frames = snapshots(walk(SYMBOLS, 3_000, seed=8), SYMBOLS)
+    rng = np.random.default_rng(8)
+    for prices in frames:
+        for symbol in SYMBOLS:
+            if rng.random() < 0.05:
+                del prices[symbol]
+    return frames
+
+
+def replay(ticks, batch_min_symbols):
+    ai = TradingAI("aggressive")
+    ai.batch_min_symbols = batch_min_symbols
+    engine = TradingEngine(ai, symbols=SYMBOLS)
+    engine.start()
+    engine.set_trading(True)
+    for t, prices in ticks:
+        engine.submit_tick(prices, t)
+    engine.stop()
+    return engine.portfolio
+
+
+# The engine decides on each tick as it comes, through whichever decide_batch
+# path the snapshot size picks; single-symbol ticks are what a streaming feed
+# delivers.
+@pytest.mark.parametrize("batch_min_symbols", [0, 100])
+@pytest.mark.parametrize("split", [False, True])
+def test_engine_matches_the_backtest(frames, batch_min_symbols, split):
+    if split:
+        ticks = [(t, {symbol: data}) for t, prices in enumerate(frames) for symbol, data in prices.items()]
+    else:
+        ticks = list(enumerate(frames))
+    portfolio = replay(ticks, batch_min_symbols)
+    result = run_backtest(frames, SYMBOLS, "aggressive")
+
+    assert portfolio.trade_log.total == result.trade_log.total > 0
+    assert [{**t, "time": 0} for t in portfolio.trade_log] == [{**t, "time": 0} for t in result.trade_log]
+    assert portfolio.balance == result.portfolio.balance
+    assert portfolio.holdings == result.portfolio.holdings
+
+
+def test_engine_bars_match_the_backtest(frames):
+    # Snapshots one second apart, as run_backtest assumes for frames
+    # without timestamps.
+    ai = TradingAI("aggressive")
+    ai.timeframe = "5s"
+    engine = TradingEngine(ai, symbols=SYMBOLS)
+    assert engine.bars.timeframes == ["5s"]
+    engine.start()
+    engine.set_trading(True)
+    for t, prices in enumerate(frames):
+        engine.submit_tick(prices, t)
+    engine.stop()
+    result = run_backtest(frames, SYMBOLS, "aggressive", timeframe="5s")
+
+    assert engine.portfolio.trade_log.total == result.trade_log.total > 0
+    assert [{**t, "time": 0} for t in engine.portfolio.trade_log] == [{**t, "time": 0} for t in result.trade_log]
@@ -0,0 +1,192 @@
+import argparse
+import logging
+import os
+import time
+from urllib.parse import quote, unquote
+import numpy as np
+from config import TICK_STORE_DIR
+
+# One fixed-width 40-byte record per tick; "time" is epoch seconds.
+TICK_DTYPE = np.dtype([("time", "<f8"), ("price", "<f8"), ("volume", "<f8"), ("bid", "<f8"), ("ask", "<f8")])
+FIELDS = TICK_DTYPE.names[1:]
+INDEX_STRIDE = 4096
+
+
+class SymbolFile:
+    # Append-only file of TICK_DTYPE records in time order. Reads go through
+    # a read-only memmap that is re-opened only after the file has grown, and
+    # a sparse in-memory index (every INDEX_STRIDE-th time) narrows each range
+    # lookup to one block before the binary search touches the mapped pages.
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+        self.map = None
+        self.index = np.zeros(0)
+        self.count = os.path.getsize(path) // TICK_DTYPE.itemsize if os.path.exists(path) else 0
+        self.last_time = float(self.records()["time"][-1]) if self.count else -np.inf
+
+    def records(self):
+        if self.writer is not None:
+            self.writer.flush()
+        if self.map is None or len(self.map) != self.count:
+            self.map = np.memmap(self.path, dtype=TICK_DTYPE, mode="r", shape=(self.count,)) if self.count else \
+                np.zeros(0, dtype=TICK_DTYPE)
+            self.index = np.concatenate((self.index, self.map["time"][len(self.index) * INDEX_STRIDE::INDEX_STRIDE]))
+        return self.map
+
+    def append(self, records):
+        if not len(records):
+            return
+        times = records["time"]
+        if times[0] < self.last_time or np.any(np.diff(times) < 0):
+            raise ValueError(f"Ticks for {self.path} must be appended in time order")
+        if self.writer is None:
+            self.writer = open(self.path, "ab")
+        self.writer.write(np.ascontiguousarray(records, dtype=TICK_DTYPE).tobytes())
+        self.count += len(records)
+        self.last_time = float(times[-1])
+
+    def locate(self, t, side="left"):
+        records = self.records()
+        block = max(int(np.searchsorted(self.index, t, side)) - 1, 0)
+        lo, hi = block * INDEX_STRIDE, min((block + 1) * INDEX_STRIDE, len(records))
+        # Past the end of this block the answer is the block boundary itself.
+        return lo + int(np.searchsorted(records["time"][lo:hi], t, side)) if hi > lo else lo
+
+    def slice(self, start=None, end=None):
+        records = self.records()
+        lo = 0 if start is None else self.locate(start, "left")
+        hi = len(records) if end is None else self.locate(end, "left")
+        return records[lo:hi]
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        self.map = None
+
+
+class TickStore:
+    """Directory of per-symbol tick files. Recording appends fixed-width
+    records; reading hands out memmap slices, so a year of ticks costs no RAM
+    until it is touched. Ranges are half-open: start <= time < end."""
+
+    def __init__(self, root=TICK_STORE_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.files = {}
+
+    @staticmethod
+    def file_name(symbol):
+        # Percent-encoded, so "BTC/USDT" and "BTC-USDT" get distinct files
+        # and symbols() can recover either exactly.
+        return quote(symbol, safe="") + ".ticks"
+
+    def symbols(self):
+        return sorted(unquote(name[:-len(".ticks")]) for name in os.listdir(self.root) if name.endswith(".ticks"))
+
+    def _file(self, symbol):
+        handle = self.files.get(symbol)
+        if handle is None:
+            handle = self.files[symbol] = SymbolFile(os.path.join(self.root, self.file_name(symbol)))
+        return handle
+
+    def __len__(self):
+        return sum(self._file(symbol).count for symbol in self.symbols())
+
+    def append(self, symbol, times, prices, volumes, bids, asks):
+        records = np.empty(len(times), dtype=TICK_DTYPE)
+        records["time"], records["price"], records["volume"] = times, prices, volumes
+        records["bid"], records["ask"] = bids, asks
+        self._file(symbol).append(records)
+
+    def append_snapshot(self, prices, timestamp=None):
+        # Records one get_prices()-style snapshot ({symbol: {price, volume,
+        # bid, ask}}); symbols missing a field are stored with 0.
+        timestamp = time.time() if timestamp is None else timestamp
+        for symbol, data in prices.items():
+            record = np.array([(timestamp, *(float(data.get(field) or 0.0) for field in FIELDS))], dtype=TICK_DTYPE)
+            self._file(symbol).append(record)
+        self.flush()
+
+    def import_ticks(self, ticks):
+        # Bulk-loads a data_loader.TickData, e.g. from a backtest CSV.
+        times = ticks.times()
+        for symbol in ticks.symbols:
+            arrays = ticks.symbol_arrays(symbol)
+            self.append(symbol, times[arrays["time_index"]], *(arrays[field] for field in FIELDS))
+        self.flush()
+
+    def slice(self, symbol, start=None, end=None):
+        # Zero-copy: a view into the memory-mapped file.
+        return self._file(symbol).slice(start, end)
+
+    def time_range(self, symbols=None):
+        spans = [self.slice(symbol)["time"] for symbol in symbols or self.symbols()]
+        spans = [span for span in spans if len(span)]
+        if not spans:
+            return None
+        return min(float(span[0]) for span in spans), max(float(span[-1]) for span in spans)
+
+    def iter_slices(self, symbols=None, start=None, end=None, span=86400.0):
+        # Walks [start, end) in windows of `span` seconds, yielding
+        # {symbol: memmap slice} so a long range never has to be resident.
+        symbols = list(symbols or self.symbols())
+        bounds = self.time_range(symbols)
+        if bounds is None:
+            return
+        t = bounds[0] if start is None else start
+        stop = np.nextafter(bounds[1], np.inf) if end is None else end
+        while t < stop:
+            upper = min(t + span, stop)
+            yield {symbol: self.slice(symbol, t, upper) for symbol in symbols}
+            t = upper
+
+    def aligned(self, symbols=None, start=None, end=None):
+        # (time, symbol) grids shaped like TickData.aligned() for run_backtest;
+        # the grids are the only copy made of the mapped records. They are
+        # dense and in memory, so backtests read ranges that fit in RAM; use
+        # iter_slices() to walk longer ones.
+        symbols = list(symbols or self.symbols())
+        slices = [self.slice(symbol, start, end) for symbol in symbols]
+        times = np.unique(np.concatenate([s["time"] for s in slices])) if slices else np.zeros(0)
+        shape = (len(times), len(symbols))
+        arrays = {field: np.zeros(shape) for field in FIELDS}
+        arrays["present"] = np.zeros(shape, dtype=bool)
+        for j, records in enumerate(slices):
+            t = np.searchsorted(times, records["time"])
+            arrays["present"][t, j] = True
+            for field in FIELDS:
+                arrays[field][t, j] = records[field]
+        arrays["timestamps"] = times
+        return arrays
+
+    def flush(self):
+        for handle in self.files.values():
+            if handle.writer is not None:
+                handle.writer.flush()
+
+    def close(self):
+        for handle in self.files.values():
+            handle.close()
+        self.files.clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import a backtest CSV into a memory-mapped tick store.")
+    parser.add_argument("csv")
+    parser.add_argument("--store", default=TICK_STORE_DIR)
+    args = parser.parse_args(argv)
+    from data_loader import load_ticks  # pandas; recording live ticks does not need it
+
+    started = time.perf_counter()
+    ticks = load_ticks(args.csv)
+    store = TickStore(args.store)
+    store.import_ticks(ticks)
+    store.close()
+    logging.info(f"Imported {len(ticks)} ticks for {len(ticks.symbols)} symbols into {args.store} "
+                 f"in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
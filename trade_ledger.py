@@ -0,0 +1,178 @@
+import csv
+import logging
+import queue
+import threading
+import time
+import numpy as np
+from config import TRADE_JOURNAL_CHUNK, TRADE_LEDGER_CAPACITY
+
+SIDES = ("BUY", "SELL")
+BUY_SIDE, SELL_SIDE = range(2)
+
+# cash is the signed change in balance: -(notional + fee) for a buy,
+# notional - fee for a sell.
+TRADE_DTYPE = np.dtype([("time", "<f8"), ("symbol", "<i4"), ("side", "i1"), ("price", "<f8"), ("quantity", "<f8"),
+                        ("notional", "<f8"), ("fee", "<f8"), ("cash", "<f8"), ("balance_after", "<f8")])
+FIELDS = ["time", "action", "symbol", "price", "quantity", "notional", "fee", "cash", "balance_after"]
+INITIAL_ROWS = 1024
+JOURNAL_BACKLOG = 4
+
+
+class TradeLedger:
+    # Columnar fill history: one structured array that starts small, doubles
+    # up to `capacity` rows and then wraps as a ring, so memory stops growing
+    # however long the session runs. `total` counts every fill since the last
+    # clear(); the newest min(total, capacity) are held in memory. With a
+    # journal path, fills are also appended to a CSV in batches of
+    # `journal_chunk` by a background thread, so the file has all of them.
+    def __init__(self, capacity=TRADE_LEDGER_CAPACITY, journal_path=None, journal_chunk=TRADE_JOURNAL_CHUNK):
+        self.capacity = capacity
+        self.rows = np.zeros(min(INITIAL_ROWS, capacity), dtype=TRADE_DTYPE)
+        self.symbols = []
+        self.symbol_ids = {}
+        self.total = 0
+        self.generation = 0
+        self.total_fees = 0.0
+        self.journal_path = journal_path
+        self.journal_chunk = min(journal_chunk, capacity)
+        self.journaled = 0
+        self.writer = None
+        # A few batches in flight at most: if the disk falls behind, append()
+        # waits rather than queueing copies without bound.
+        self.pending = queue.Queue(maxsize=JOURNAL_BACKLOG)
+        if journal_path:
+            with open(journal_path, "a", newline='') as f:
+                if f.tell() == 0:
+                    csv.writer(f).writerow(FIELDS)
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def __iter__(self):
+        return iter(self.records())
+
+    def symbol_id(self, symbol):
+        sid = self.symbol_ids.get(symbol)
+        if sid is None:
+            sid = self.symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return sid
+
+    def append(self, side, symbol, price, quantity, notional, fee, cash, balance_after, timestamp=None):
+        size = len(self.rows)
+        if self.total >= size and size < self.capacity:
+            # Not wrapped yet, so rows[:total] is in order and copies as is.
+            grown = np.zeros(min(size * 2, self.capacity), dtype=TRADE_DTYPE)
+            grown[:size] = self.rows
+            self.rows = grown
+        self.rows[self.total % len(self.rows)] = (timestamp if timestamp is not None else time.time(),
+                                                  self.symbol_id(symbol), side, price, quantity, notional, fee, cash,
+                                                  balance_after)
+        self.total += 1
+        self.total_fees += fee
+        if self.journal_path and self.total - self.journaled >= self.journal_chunk:
+            self._journal()
+
+    def _positions(self, start, stop):
+        return np.arange(start, stop) % len(self.rows)
+
+    def tail(self, count):
+        # The newest `count` fills as a structured array, oldest first.
+        count = min(count, len(self))
+        return self.rows[self._positions(self.total - count, self.total)]
+
+    def records(self, start=0):
+        # Fills from index `start` (0 = first since clear()) as dicts, as far
+        # back as memory holds.
+        start = max(start, self.total - len(self))
+        return list(self._format_rows(self.rows[self._positions(start, self.total)], self.symbols))
+
+    @staticmethod
+    def _format_rows(rows, symbols):
+        columns = {name: rows[name].tolist() for name in TRADE_DTYPE.names}
+        for k in range(len(rows)):
+            yield {
+                "time": columns["time"][k],
+                "action": SIDES[columns["side"][k]],
+                "symbol": symbols[columns["symbol"][k]],
+                "price": columns["price"][k],
+                "quantity": columns["quantity"][k],
+                "notional": columns["notional"][k],
+                "fee": columns["fee"][k],
+                "cash": columns["cash"][k],
+                "balance_after": columns["balance_after"][k],
+            }
+
+    @staticmethod
+    def _csv_rows(rows, symbols):
+        # Column-at-a-time formatting for the CSV; times are written in UTC.
+        times = np.datetime_as_string((rows["time"] * 1e6).astype("datetime64[us]"), unit="ms")
+        names = np.array(symbols + [""], dtype=object)
+        columns = [times.tolist(), np.array(SIDES)[rows["side"]].tolist(), names[rows["symbol"]].tolist()]
+        columns += [rows[name].tolist() for name in ("price", "quantity", "notional", "fee", "cash", "balance_after")]
+        return zip(*columns)
+
+    def _journal(self):
+        # Hands a copy of the unjournaled rows to the writer thread; the ring
+        # may overwrite them afterwards.
+        rows = self.rows[self._positions(max(self.journaled, self.total - len(self)), self.total)]
+        self.journaled = self.total
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._write_loop, daemon=True, name="TradeJournal")
+            self.writer.start()
+        self.pending.put((rows, list(self.symbols)))
+
+    def _write_loop(self):
+        while True:
+            rows, symbols = self.pending.get()
+            try:
+                with open(self.journal_path, "a", newline='') as f:
+                    csv.writer(f).writerows(self._csv_rows(rows, symbols))
+            except OSError as e:
+                logging.error(f"Could not write trade journal {self.journal_path}: {e}")
+            finally:
+                self.pending.task_done()
+
+    def flush(self):
+        # Writes out everything appended so far and waits for the file.
+        if self.journal_path:
+            if self.total > self.journaled:
+                self._journal()
+            self.pending.join()
+
+    def export(self, path):
+        # With a journal the whole session is on disk already; otherwise only
+        # the fills still held in memory can be exported.
+        if self.journal_path:
+            self.flush()
+            with open(self.journal_path, newline='') as src, open(path, "w", newline='') as dst:
+                for line in src:
+                    dst.write(line)
+            return
+        with open(path, "w", newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(FIELDS)
+            writer.writerows(self._csv_rows(self.tail(len(self)), self.symbols))
+
+    def restore(self, rows, symbols, total, total_fees):
+        # Loads a checkpoint: `rows` are the newest fills, oldest first, out
+        # of `total`. They count as journaled, since the journal (if any) got
+        # them in the session that made the checkpoint.
+        rows = rows[-self.capacity:]
+        wrapped = total > len(rows)
+        size = self.capacity if wrapped else min(self.capacity, max(INITIAL_ROWS, len(rows)))
+        self.rows = np.zeros(size, dtype=TRADE_DTYPE)
+        self.rows[np.arange(total - len(rows), total) % size] = rows
+        self.symbols = list(symbols)
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.total = self.journaled = total
+        self.total_fees = total_fees
+        self.generation += 1
+
+    def clear(self):
+        # The journal keeps the cleared fills; only memory is reset.
+        self.flush()
+        self.total = 0
+        self.journaled = 0
+        self.total_fees = 0.0
+        self.generation += 1
@@ -1,17 +1,47 @@
-import numpy as np
-import datetime
 import logging
-from config import AI_HISTORY_LIMIT, AI_RISK_LEVEL_THRESHOLDS, AI_RISK_POSITION_LIMITS
+import math
+import numpy as np
+from decision_log import (
+    ACTION_NAMES, DecisionLog, format_reason,
+    INVALID_TICK, INSUFFICIENT_HISTORY, NO_SIGNAL, RSI_OVERSOLD, RSI_OVERBOUGHT
+)
+from indicators import BatchIndicatorSet, IndicatorSet, indicator_series
+from metrics import DECISIONS, STAGE_SECONDS
+from ring_buffer import BatchRingBuffer, RingBuffer
+from config import (
+    AI_HISTORY_LIMIT, AI_RISK_LEVEL_THRESHOLDS, AI_RISK_POSITION_LIMITS,
+    AI_EMA_SPAN, AI_EMA_MODE, AI_RSI_PERIOD, AI_RSI_MODE, AI_RSI_BUY_BELOW, AI_RSI_SELL_ABOVE,
+    AI_STOP_LOSS, AI_TAKE_PROFIT, AI_TIMEFRAME, AI_BATCH_MIN_SYMBOLS, DECISION_LOG_SPILL_PATH
+)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+PRICE, VOLUME, SPREAD = 0, 1, 2
+
+HOLD, BUY, SELL = 0, 1, 2
+ACTIONS = ACTION_NAMES
+ACTION_CODES = {name: code for code, name in enumerate(ACTIONS)}
+
 class TradingAI:
     def __init__(self, risk_level="moderate"):
-        self.price_history = {}
-        self.volume_history = {}
-        self.spread_history = {}
-        self.decision_log = []
+        self.history = {}
+        self.indicators = {}
+        self.lanes = {}
+        self.batch_history = None
+        self.batch_indicators = None
+        self.free_lanes = []
+        self.decision_log = DecisionLog(spill_path=DECISION_LOG_SPILL_PATH)
         self.history_limit = AI_HISTORY_LIMIT
+        self.ema_span = AI_EMA_SPAN
+        self.ema_mode = AI_EMA_MODE
+        self.rsi_period = AI_RSI_PERIOD
+        self.rsi_mode = AI_RSI_MODE
+        self.rsi_buy_below = AI_RSI_BUY_BELOW
+        self.rsi_sell_above = AI_RSI_SELL_ABOVE
+        self.stop_loss = AI_STOP_LOSS
+        self.take_profit = AI_TAKE_PROFIT
+        self.timeframe = AI_TIMEFRAME
+        self.batch_min_symbols = AI_BATCH_MIN_SYMBOLS
         self.thresholds = AI_RISK_LEVEL_THRESHOLDS
         self.risk_position_limits = AI_RISK_POSITION_LIMITS
         self.current_params = {}
@@ -28,88 +58,273 @@ class TradingAI:
         }
         logging.info(f"AI risk level set to '{self.risk}'. Threshold: {self.threshold}, Max Position: {self.max_position_size}")
 
+    @property
+    def price_history(self):
+        return {symbol: buffer.column(PRICE) for symbol, buffer in self.history.items()}
+
+    @property
+    def volume_history(self):
+        return {symbol: buffer.column(VOLUME) for symbol, buffer in self.history.items()}
+
+    @property
+    def spread_history(self):
+        return {symbol: buffer.column(SPREAD) for symbol, buffer in self.history.items()}
+
     def update_history(self, symbol, price, volume, spread):
-        self.price_history.setdefault(symbol, []).append(price)
-        self.volume_history.setdefault(symbol, []).append(volume)
-        self.spread_history.setdefault(symbol, []).append(spread)
-        for history in [self.price_history, self.volume_history, self.spread_history]:
-            if len(history[symbol]) > self.history_limit:
-                history[symbol].pop(0)
-
-    def calculate_ema(self, data, span=5):
-        if len(data) < span:
-            return None
-        return np.mean(data[-span:])
-
-    def calculate_rsi(self, prices, period=14):
-        if len(prices) < period:
-            return None
-        deltas = np.diff(prices[-period:])
-        gains = deltas[deltas > 0].sum()
-        losses = -deltas[deltas < 0].sum()
-        if losses == 0:
-            return 100
-        rs = gains / losses
-        return 100 - (100 / (1 + rs))
-
-    def log_decision(self, symbol, action, price, pos_size, reason=""):
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.decision_log.append({
-            "time": timestamp,
-            "symbol": symbol,
-            "action": action,
-            "price": price,
-            "position_size_fraction": pos_size,
-            "reason": reason
-        })
-        if action in ("BUY", "SELL"):
-            logging.info(f"[{timestamp}] AI {action} {symbol} @ ${price:.2f}, pos={pos_size:.2f} - {reason}")
-        else:
-            logging.debug(f"[{timestamp}] AI {action} {symbol} @ ${price:.2f} - {reason}")
+        buffer = self.history.get(symbol)
+        if buffer is None:
+            buffer = self.history[symbol] = RingBuffer(self.history_limit, 3)
+            self.indicators[symbol] = self.create_indicators()
+        buffer.append((price, volume, spread))
+        self.indicators[symbol].update(price)
+        return buffer
+
+    def remove_symbol(self, symbol):
+        self.history.pop(symbol, None)
+        self.indicators.pop(symbol, None)
+        lane = self.lanes.pop(symbol, None)
+        if lane is not None:
+            lanes = np.array([lane])
+            self.batch_history.reset(lanes)
+            self.batch_indicators.reset(lanes)
+            self.free_lanes.append(lane)
+
+    def lanes_for(self, symbols):
+        if self.batch_history is None:
+            self.batch_history = BatchRingBuffer(self.history_limit, 3)
+            self.batch_indicators = BatchIndicatorSet(self.ema_span, self.rsi_period, self.history_limit, self.ema_mode, self.rsi_mode)
+        new = [symbol for symbol in symbols if symbol not in self.lanes]
+        if new:
+            needed = self.batch_history.lanes + max(0, len(new) - len(self.free_lanes))
+            if needed > self.batch_history.lanes:
+                lanes = max(needed, 2 * self.batch_history.lanes)
+                self.free_lanes.extend(range(self.batch_history.lanes, lanes))
+                self.batch_history.resize(lanes)
+                self.batch_indicators.resize(lanes)
+            for symbol in new:
+                self.lanes[symbol] = self.free_lanes.pop(0)
+        return np.array([self.lanes[symbol] for symbol in symbols], dtype=np.int64)
+
+    def seed_history(self, histories):
+        # Warm start for decide_batch(): {symbol: (prices, volumes)}, oldest
+        # first, e.g. recent candle closes. Only lanes still short of
+        # history_limit are seeded; live ticks they already hold are
+        # replayed after the seed, so the result is the same as if the seed
+        # had arrived first. Returns the symbols seeded.
+        symbols = [symbol for symbol in histories if symbol not in self.lanes
+                   or self.batch_history.size[self.lanes[symbol]] < self.history_limit]
+        if not symbols:
+            return []
+        lanes = self.lanes_for(symbols)
+        sequences = []
+        for symbol, lane in zip(symbols, lanes.tolist()):
+            prices, volumes = (np.asarray(values, dtype=np.float64)[-self.history_limit:] for values in histories[symbol])
+            valid = (prices > 0) & (volumes > 0)
+            seed = np.vstack((prices[valid], volumes[valid], np.zeros(int(valid.sum()))))
+            sequences.append(np.hstack((seed, self.batch_history.window(lane))))
+        self.batch_history.reset(lanes)
+        self.batch_indicators.reset(lanes)
+
+        # Step t pushes the t-th row of every sequence that long, so all
+        # lanes advance together.
+        lengths = np.array([sequence.shape[1] for sequence in sequences], dtype=np.int64)
+        rows = np.zeros((3, len(sequences), lengths.max(initial=0)))
+        for i, sequence in enumerate(sequences):
+            rows[:, i, :sequence.shape[1]] = sequence
+        for t in range(rows.shape[2]):
+            active = lengths > t
+            self.batch_history.append(lanes[active], rows[:, active, t])
+            self.batch_indicators.update(lanes[active], rows[PRICE, active, t])
+        return symbols
+
+    def create_indicators(self):
+        return IndicatorSet(self.ema_span, self.rsi_period, self.history_limit, self.ema_mode, self.rsi_mode)
+
+    def indicator_series(self, prices):
+        return indicator_series(prices, self.ema_span, self.rsi_period, self.history_limit, self.ema_mode, self.rsi_mode)
+
+    def log_decision(self, symbol, action, price, pos_size, reason=NO_SIGNAL, value=math.nan):
+        code = ACTION_CODES[action]
+        self.decision_log.append(symbol, code, price, pos_size, reason, value)
+        if code != HOLD:
+            logging.info(f"AI {action} {symbol} @ ${price:.2f}, pos={pos_size:.2f} - {format_reason(reason, value)}")
+        elif logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(f"AI {action} {symbol} @ ${price:.2f} - {format_reason(reason, value)}")
 
     def decide(self, symbol, current_price, current_volume, current_spread, avg_buy_price=None):
+        decision, pos_size = self._decide(symbol, current_price, current_volume, current_spread, avg_buy_price)
+        DECISIONS.inc(label=decision)
+        return decision, pos_size
+
+    def _decide(self, symbol, current_price, current_volume, current_spread, avg_buy_price):
         if current_price <= 0 or current_volume <= 0:
-            self.log_decision(symbol, "HOLD", current_price, 0, "Invalid price/volume")
+            self.log_decision(symbol, "HOLD", current_price, 0, INVALID_TICK)
             return "HOLD", 0
 
-        self.update_history(symbol, current_price, current_volume, current_spread)
-        prices = self.price_history.get(symbol, [])
-        volumes = self.volume_history.get(symbol, [])
+        buffer = self.update_history(symbol, current_price, current_volume, current_spread)
 
-        if len(prices) < self.history_limit:
-            self.log_decision(symbol, "HOLD", current_price, 0, "Insufficient history")
+        if len(buffer) < self.history_limit:
+            self.log_decision(symbol, "HOLD", current_price, 0, INSUFFICIENT_HISTORY)
             return "HOLD", 0
 
-        ema = self.calculate_ema(prices)
-        rsi = self.calculate_rsi(prices)
-        momentum = prices[-1] - prices[0]
-        volatility = np.std(prices)
-        avg_volume = np.mean(volumes)
+        if avg_buy_price and avg_buy_price > 0 and self.should_exit(current_price, avg_buy_price):
+            return "SELL", 1.0
+
+        ema, rsi, volatility = self.indicators[symbol].values()
+        decision, pos_size, reason = self.evaluate_signal(current_price, ema, rsi, volatility)
+        self.log_decision(symbol, decision, current_price, pos_size, reason, rsi if rsi is not None else math.nan)
+        return decision, pos_size
 
+    def decide_batch(self, prices_snapshot, avg_buy_prices=None):
+        # Vectorized decide() over a whole snapshot. Histories and indicator
+        # state live in lane arrays separate from the per-symbol scalar state,
+        # so an instance should use either decide() or decide_batch().
+        # Snapshots smaller than batch_min_symbols step the same lanes one
+        # symbol at a time instead; the decisions are identical either way.
+        with STAGE_SECONDS.time("decide"):
+            if len(prices_snapshot) < self.batch_min_symbols:
+                return self.decide_lanes(prices_snapshot, avg_buy_prices)
+            return self.decide_from(self.observe_batch(prices_snapshot), avg_buy_prices)
+
+    def decide_lanes(self, prices_snapshot, avg_buy_prices=None):
+        symbols = list(prices_snapshot)
+        lanes = self.lanes_for(symbols).tolist()
+        actions = np.zeros(len(symbols), dtype=np.int8)
+        sizes = np.zeros(len(symbols))
+        for i, (symbol, lane) in enumerate(zip(symbols, lanes)):
+            data = prices_snapshot[symbol]
+            avg_buy_price = avg_buy_prices.get(symbol) if avg_buy_prices else None
+            actions[i], sizes[i] = self._decide_lane(symbol, lane, float(data["price"]), float(data["volume"]),
+                                                     float(data["ask"] - data["bid"]), avg_buy_price)
+        DECISIONS.inc_codes(actions, ACTIONS)
+        return symbols, actions, sizes
+
+    def _decide_lane(self, symbol, lane, price, volume, spread, avg_buy_price):
+        # decide_from(observe_batch()) for one symbol, in the same order of
+        # floating-point operations.
+        if not (price > 0 and volume > 0):
+            self.decision_log.append(symbol, HOLD, price, 0.0, INVALID_TICK)
+            return HOLD, 0.0
+        self.batch_history.append_one(lane, (price, volume, spread))
+        self.batch_indicators.update_one(lane, price)
+        if self.batch_history.size.item(lane) < self.history_limit:
+            self.decision_log.append(symbol, HOLD, price, 0.0, INSUFFICIENT_HISTORY)
+            return HOLD, 0.0
+        if avg_buy_price and avg_buy_price > 0 and self.should_exit(price, avg_buy_price):
+            return SELL, 1.0
+
+        ema, rsi, volatility = self.batch_indicators.values_one(lane)
+        action, size, reason = HOLD, 0.0, NO_SIGNAL
+        if ema != 0 and rsi != 0:
+            if rsi < self.rsi_buy_below and price > ema:
+                action, reason = BUY, RSI_OVERSOLD
+            elif rsi > self.rsi_sell_above and price < ema:
+                action, reason = SELL, RSI_OVERBOUGHT
+        if action != HOLD:
+            size = min(self.current_params["max_pos"], 1.0 / (1.0 + volatility * 10 + 1e-9))
+        self.decision_log.append(symbol, action, price, size, reason, rsi)
+        if action != HOLD:
+            logging.info(f"AI {ACTIONS[action]} {symbol} @ ${price:.2f}, pos={size:.2f} - {format_reason(reason, rsi)}")
+        return action, size
+
+    def indicator_key(self):
+        # Instances with equal keys compute identical indicators from the same
+        # ticks, so one observe_batch() can serve all of them. The timeframe
+        # is part of it because bar closes and ticks give different histories.
+        return self.history_limit, self.ema_span, self.ema_mode, self.rsi_period, self.rsi_mode, self.timeframe
+
+    def observe_batch(self, prices_snapshot):
+        # First half of decide_batch: push the snapshot into the lane
+        # histories and indicators and return what the rules need.
+        symbols = list(prices_snapshot)
+        lanes = self.lanes_for(symbols)
+        fields = np.array([
+            (data["price"], data["volume"], data["ask"] - data["bid"]) for data in prices_snapshot.values()
+        ], dtype=np.float64).reshape(len(symbols), 3).T
+        price, volume = fields[PRICE], fields[VOLUME]
+
+        valid = (price > 0) & (volume > 0)
+        if valid.all():
+            self.batch_history.append(lanes, fields)
+            self.batch_indicators.update(lanes, price)
+        else:
+            self.batch_history.append(lanes[valid], fields[:, valid])
+            self.batch_indicators.update(lanes[valid], price[valid])
+        ready = valid & (self.batch_history.size[lanes] >= self.history_limit)
+
+        ema, rsi, volatility = self.batch_indicators.values(lanes)
+        # Everything below is independent of risk settings and positions, so
+        # it is worked out once here rather than in every decide_from().
+        reasons = np.full(len(symbols), NO_SIGNAL, dtype=np.int8)
+        reasons[~valid] = INVALID_TICK
+        reasons[valid & ~ready] = INSUFFICIENT_HISTORY
+        with np.errstate(invalid="ignore"):
+            return {
+                "symbols": symbols, "price": price, "valid": valid, "ready": ready,
+                "ema": ema, "rsi": rsi, "volatility": volatility,
+                "position_adjustment": 1.0 / (1.0 + volatility * 10 + 1e-9),
+                "signal": ready & (ema != 0) & (rsi != 0),
+                "above_ema": price > ema, "below_ema": price < ema,
+                "reasons": reasons, "logged_rsi": np.where(ready, rsi, np.nan),
+            }
+
+    def decide_from(self, view, avg_buy_prices=None):
+        # Second half of decide_batch: this instance's thresholds, risk and
+        # exits applied to an observe_batch() result, which may come from
+        # another instance with the same indicator_key().
+        symbols, price, ready, rsi = view["symbols"], view["price"], view["ready"], view["rsi"]
+        dynamic_position_size = np.minimum(self.current_params["max_pos"], view["position_adjustment"])
+
+        exit_now = np.zeros(len(symbols), dtype=bool)
+        if avg_buy_prices:
+            avg = np.array([avg_buy_prices.get(symbol) or 0.0 for symbol in symbols], dtype=np.float64)
+            exit_now = ready & (avg > 0) & ((price <= avg * self.stop_loss) | (price >= avg * self.take_profit))
+        with np.errstate(invalid="ignore"):
+            signal = view["signal"] & ~exit_now
+            buy = signal & (rsi < self.rsi_buy_below) & view["above_ema"]
+            sell = signal & ~buy & (rsi > self.rsi_sell_above) & view["below_ema"]
+
+        actions = np.zeros(len(symbols), dtype=np.int8)
+        actions[buy] = BUY
+        actions[sell | exit_now] = SELL
+        sizes = np.where(buy | sell, dynamic_position_size, 0.0)
+        sizes[exit_now] = 1.0
+
+        reasons = view["reasons"].copy()
+        reasons[buy] = RSI_OVERSOLD
+        reasons[sell] = RSI_OVERBOUGHT
+        if exit_now.any():
+            logged = ~exit_now
+            self.decision_log.append_many([symbols[i] for i in np.flatnonzero(logged).tolist()], actions[logged],
+                                          price[logged], sizes[logged], reasons[logged], view["logged_rsi"][logged])
+        else:
+            self.decision_log.append_many(symbols, actions, price, sizes, reasons, view["logged_rsi"])
+        for i in np.flatnonzero(buy | sell).tolist():
+            logging.info(f"AI {ACTIONS[actions[i]]} {symbols[i]} @ ${price[i]:.2f}, pos={sizes[i]:.2f} - {format_reason(reasons[i], rsi[i])}")
+        DECISIONS.inc_codes(actions, ACTIONS)
+        return symbols, actions, sizes
+
+    def should_exit(self, current_price, avg_buy_price):
+        stop_loss_price = avg_buy_price * self.stop_loss
+        take_profit_price = avg_buy_price * self.take_profit
+        return current_price <= stop_loss_price or current_price >= take_profit_price
+
+    def evaluate_signal(self, current_price, ema, rsi, volatility):
         position_adjustment = 1.0 / (1.0 + volatility * 10 + 1e-9)
         dynamic_position_size = min(self.current_params["max_pos"], position_adjustment)
 
         decision = "HOLD"
         pos_size = 0
-        reason = "No strong signal."
-
-        if avg_buy_price and avg_buy_price > 0:
-            stop_loss_price = avg_buy_price * 0.95
-            take_profit_price = avg_buy_price * 1.10
-            if current_price <= stop_loss_price:
-                return "SELL", 1.0
-            elif current_price >= take_profit_price:
-                return "SELL", 1.0
+        reason = NO_SIGNAL
 
         if ema and rsi:
-            if rsi < 35 and current_price > ema:
+            if rsi < self.rsi_buy_below and current_price > ema:
                 decision = "BUY"
                 pos_size = dynamic_position_size
-                reason = f"RSI={rsi:.1f} (<35), price > EMA"
-            elif rsi > 65 and current_price < ema:
+                reason = RSI_OVERSOLD
+            elif rsi > self.rsi_sell_above and current_price < ema:
                 decision = "SELL"
                 pos_size = dynamic_position_size
-                reason = f"RSI={rsi:.1f} (>65), price < EMA"
+                reason = RSI_OVERBOUGHT
 
-        self.log_decision(symbol, decision, current_price, pos_size, reason)
-        return decision, pos_size
\ No newline at end of file
+        return decision, pos_size, reason
\ No newline at end of file
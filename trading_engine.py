@@ -0,0 +1,294 @@
+import logging
+import queue
+import threading
+import time
+from types import MappingProxyType
+import numpy as np
+from bars import BarAggregator, bar_snapshot
+from config import BAR_TIMEFRAMES, ENGINE_LATENCY_WINDOW, ENGINE_MAX_BATCH, INITIAL_BALANCE, TRADE_JOURNAL_PATH
+from metrics import STAGE_SECONDS, TICK_LATENCY, TICKS
+from portfolio import Portfolio
+from ring_buffer import RingBuffer
+from trade_ledger import TradeLedger
+from trading_ai import ACTIONS, BUY, HOLD, TradingAI
+
+class EngineState:
+    """Published after every batch of ticks. Nothing in it is shared with the
+    engine's live objects: containers are tuples or read-only mappings over
+    dicts the engine never mutates again, and attributes cannot be set.
+
+    seq             increases by one per published state
+    prices          latest known {symbol: {price, volume, bid, ask}}
+    previous_prices the same, one tick earlier
+    balance, profit
+    realized_pnl    profit locked in by sells so far
+    holdings        ((symbol, qty, value, gain, gain_pct), ...) as get_holdings_detail
+    avg_buy_price
+    points          ((balance, profit, prices), ...) one per tick in the batch
+    new_trades      trade log entries since the previous state
+    trades_reset    True if the trade log was cleared since the previous state
+    status          last decision / command message, or None
+    queue_depth     ticks and commands still waiting when this was published
+    latency         seconds from submit_tick to decisions, last tick of the batch
+    """
+
+    __slots__ = ("seq", "prices", "previous_prices", "balance", "profit", "realized_pnl", "holdings", "avg_buy_price",
+                 "points", "new_trades", "trades_reset", "status", "queue_depth", "latency")
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("EngineState is immutable")
+
+
+_STOP = object()
+
+
+def execute_decisions(portfolio, snapshot, symbols, actions, sizes):
+    # Applies decide_batch() output to a portfolio: BUY spends a fraction of
+    # the balance, SELL sells a fraction of the holding.
+    for symbol, action, pos_size in zip(symbols, actions.tolist(), sizes.tolist()):
+        if pos_size <= 0 or action == HOLD:
+            continue
+        quote = snapshot[symbol]
+        if action == BUY:
+            portfolio.buy(symbol, quote["price"], pos_size, quote)
+        else:
+            qty_held = portfolio.holdings.get(symbol, 0)
+            if qty_held > 0:
+                portfolio.sell(symbol, quote["price"], qty_held * pos_size, quote)
+
+
+def bars_for(ai):
+    # The BarAggregator a TradingEngine for `ai` uses; built ahead of the
+    # engine when a checkpoint is to be restored into it.
+    return BarAggregator(tuple(BAR_TIMEFRAMES) + ((ai.timeframe,) if ai.timeframe else ()))
+
+
+def live_portfolio(initial_balance=INITIAL_BALANCE):
+    # A Portfolio whose fills also go to TRADE_JOURNAL_PATH. Only live
+    # trading journals; backtests and simulations keep fills in memory.
+    return Portfolio(initial_balance, trade_log=TradeLedger(journal_path=TRADE_JOURNAL_PATH))
+
+
+class TradingEngine(threading.Thread):
+    """Owns TradingAI and Portfolio on a worker thread. Ticks and commands go
+    in through one FIFO queue, so they are applied in the order submitted;
+    after each batch the engine calls on_state(EngineState) from its own
+    thread. With a checkpoint.Checkpointer, state is also saved every
+    checkpoint interval and once more on stop().
+
+    Ticks also go through a bars.BarAggregator for the AI's timeframe and
+    any BAR_TIMEFRAMES; with neither, it does nothing. If the AI has a
+    timeframe, it decides on that timeframe's bars as they close instead of
+    on the ticks, and orders fill at the closing tick's quote."""
+
+    def __init__(self, ai=None, portfolio=None, on_state=None, symbols=None, max_batch=ENGINE_MAX_BATCH,
+                 checkpointer=None, bars=None):
+        super().__init__(daemon=True, name="TradingEngine")
+        self.ai = ai or TradingAI()
+        self.portfolio = portfolio or live_portfolio()
+        self.on_state = on_state
+        self.symbols = list(symbols) if symbols is not None else None
+        self.max_batch = max_batch
+        self.checkpointer = checkpointer
+        self.bars = bars if bars is not None else bars_for(self.ai)
+        self.queue = queue.Queue()
+        self.trading_active = False
+        self.latest_prices = {}
+        self.previous_prices = {}
+        self.seq = 0
+        self.ticks = 0
+        self.published_trades = 0
+        self.ledger_generation = self.portfolio.get_trade_log().generation
+        self.trades_reset = False
+        self.status = None
+        self.latencies = RingBuffer(ENGINE_LATENCY_WINDOW)
+
+    # -- producer side (any thread) ------------------------------------
+
+    def submit_tick(self, prices, timestamp=None):
+        # `timestamp` (epoch seconds) places the tick in its bars; replays
+        # pass the recorded time, live feeds default to now.
+        self.queue.put((time.perf_counter(), (prices, time.time() if timestamp is None else timestamp)))
+
+    def _command(self, func, *args):
+        self.queue.put((None, (func, args)))
+
+    def set_trading(self, active):
+        self._command(self._set_trading, active)
+
+    def set_risk_level(self, level):
+        self._command(self.ai.set_risk_level, level)
+
+    def seed_history(self, histories):
+        # Applied in order with ticks, so it can be queued while live.
+        self._command(self._seed_history, histories)
+
+    def set_symbols(self, symbols):
+        self._command(self._set_symbols, list(symbols))
+
+    def remove_symbol(self, symbol):
+        self._command(self._remove_symbol, symbol)
+
+    def sell_all(self):
+        self._command(self._sell_all)
+
+    def reset(self):
+        self._command(self._reset)
+
+    def stop(self, timeout=None):
+        self.queue.put(_STOP)
+        if self.is_alive():
+            self.join(timeout)
+        self.portfolio.get_trade_log().flush()
+        if self.checkpointer is not None:
+            self.checkpointer.flush()
+
+    def metrics(self):
+        latencies = self.latencies.column(0)
+        summary = {"queue_depth": self.queue.qsize(), "ticks": self.ticks}
+        if len(latencies):
+            p50, p99 = np.percentile(latencies, (50, 99))
+            summary.update(latency_p50_ms=float(p50) * 1000, latency_p99_ms=float(p99) * 1000,
+                           latency_max_ms=float(latencies.max()) * 1000)
+        return summary
+
+    # -- engine thread -------------------------------------------------
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            batch = [item]
+            # Drain whatever else is already waiting, so a burst is handled
+            # as one batch with one published state.
+            while item is not _STOP and len(batch) < self.max_batch:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+
+            points = []
+            latency = None
+            for item in batch:
+                if item is _STOP:
+                    break
+                submitted, payload = item
+                try:
+                    if submitted is None:
+                        func, args = payload
+                        func(*args)
+                    else:
+                        points.append(self.process_tick(*payload))
+                        latency = time.perf_counter() - submitted
+                        self.latencies.append(latency)
+                        TICK_LATENCY.observe(latency)
+                except Exception:
+                    logging.exception("Trading engine failed to process an update")
+            with STAGE_SECONDS.time("publish"):
+                self.publish(points, latency)
+            if self.checkpointer is not None and (item is _STOP or self.checkpointer.due()):
+                try:
+                    self.checkpointer.save(self.ai, self.portfolio, self.bars)
+                except Exception:
+                    logging.exception("Could not checkpoint the trading engine")
+            if item is _STOP:
+                return
+
+    def process_tick(self, prices, timestamp=None):
+        # Same flow as the UI used to run on the GUI thread: decisions only
+        # for symbols in this (possibly partial) snapshot, or for those whose
+        # bar just closed, and valuation on the latest known price of every
+        # symbol. decide_batch() steps small snapshots, such as a streaming
+        # feed's single-symbol ticks, lane by lane, so a tick costs about
+        # what per-symbol decide() calls would.
+        self.previous_prices = self.latest_prices
+        self.latest_prices = {**self.latest_prices, **prices}
+        self.ticks += 1
+        TICKS.inc()
+        with STAGE_SECONDS.time("mark"):
+            self.portfolio.mark(prices)
+        with STAGE_SECONDS.time("bars"):
+            closed = self.bars.update(time.time() if timestamp is None else timestamp, prices)
+
+        if self.trading_active:
+            if self.ai.timeframe:
+                prices = bar_snapshot(*closed[self.ai.timeframe]) if self.ai.timeframe in closed else {}
+            symbols = self.symbols if self.symbols is not None else list(prices)
+            snapshot = {symbol: prices[symbol] for symbol in symbols if symbol in prices}
+            decided, actions, sizes = self.ai.decide_batch(snapshot, self.portfolio.avg_buy_price)
+            decisions = [f"{symbol}={ACTIONS[action]}" for symbol, action in zip(decided, actions.tolist())]
+            with STAGE_SECONDS.time("fill"):
+                execute_decisions(self.portfolio, snapshot, decided, actions, sizes)
+            if decisions:
+                self.status = " | ".join(decisions)
+
+        return self.portfolio.balance, self.portfolio.profit_loss, self.latest_prices
+
+    def publish(self, points, latency):
+        ledger = self.portfolio.get_trade_log()
+        if ledger.generation != self.ledger_generation:
+            self.ledger_generation = ledger.generation
+            self.published_trades = 0
+            self.trades_reset = True
+        new_trades = tuple(ledger.records(self.published_trades))
+        self.published_trades = ledger.total
+
+        self.seq += 1
+        state = EngineState(
+            seq=self.seq,
+            prices=MappingProxyType(self.latest_prices),
+            previous_prices=MappingProxyType(self.previous_prices),
+            balance=self.portfolio.balance,
+            profit=self.portfolio.profit_loss,
+            realized_pnl=self.portfolio.realized_pnl,
+            holdings=tuple(self.portfolio.get_holdings_detail()),
+            avg_buy_price=MappingProxyType(dict(self.portfolio.avg_buy_price)),
+            points=tuple(points),
+            new_trades=new_trades,
+            trades_reset=self.trades_reset,
+            status=self.status,
+            queue_depth=self.queue.qsize(),
+            latency=latency,
+        )
+        self.trades_reset = False
+        self.status = None
+        if self.on_state is not None:
+            self.on_state(state)
+        return state
+
+    def _set_trading(self, active):
+        self.trading_active = active
+
+    def _seed_history(self, histories):
+        seeded = self.ai.seed_history(histories)
+        if seeded:
+            logging.info(f"Warm-started {len(seeded)} symbols from candle history")
+
+    def _set_symbols(self, symbols):
+        self.symbols = symbols
+
+    def _remove_symbol(self, symbol):
+        if self.symbols is not None and symbol in self.symbols:
+            self.symbols.remove(symbol)
+        self.portfolio.remove_symbol(symbol)
+        self.ai.remove_symbol(symbol)
+        self.bars.remove_symbol(symbol)
+
+    def _sell_all(self):
+        sold_anything = False
+        for symbol, quantity in list(self.portfolio.holdings.items()):
+            if quantity > 0 and symbol in self.latest_prices:
+                quote = self.latest_prices[symbol]
+                if self.portfolio.sell(symbol, quote['price'], quantity, quote):
+                    sold_anything = True
+        self.status = "All holdings sold." if sold_anything else "No holdings to sell."
+
+    def _reset(self):
+        self.portfolio.reset()
+        self.bars.reset()
+        self.latest_prices = {}
+        self.previous_prices = {}
@@ -1,20 +1,30 @@
 import sys
 import os
-import csv
+import logging
+import threading
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QLabel, QVBoxLayout, QWidget,
-    QHBoxLayout, QComboBox, QPushButton, QFileDialog, QListWidget, QListWidgetItem, QInputDialog
+    QHBoxLayout, QComboBox, QPushButton, QFileDialog, QListWidget, QListWidgetItem, QInputDialog, QListView
 )
-from PyQt5.QtCore import QTimer, QThread, pyqtSignal, Qt
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, QObject, QTimer, QThread, pyqtSignal, Qt
 from PyQt5.QtGui import QPixmap, QPalette, QBrush, QColor
 
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
+import numpy as np
 
-from exchange_api import get_prices
-from portfolio import Portfolio
+from market_data import create_source
+from data_loader import load_ticks
 from trading_ai import TradingAI
+from trading_engine import TradingEngine, bars_for, live_portfolio
+from ring_buffer import RingBuffer
+from tick_store import TickStore
+from checkpoint import Checkpointer, resume
+from ohlcv_cache import load_histories
+import metrics
+from metrics import STAGE_SECONDS
 from pathlib import Path
+from config import BACKTEST_TICK_INTERVAL_MS, CHECKPOINT_PATH, BACKTEST_TICKS_PER_STEP, CHART_HISTORY, CHART_REFRESH_MS, MARKET_DATA_SOURCE, MARKET_DATA_STREAM_ADDRESS, OHLCV_TIMEFRAME, TICK_STORE_DIR, TICK_STORE_RECORD, UI_REFRESH_HZ, UI_TRADE_LOG_ROWS, WARM_START
 
 DEFAULT_SYMBOLS = ["BTC/USDT", "ETH/USDT", "BNB/USDT", "ADA/USDT", "SOL/USDT"]
 
@@ -24,84 +34,208 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 class PriceFetcherThread(QThread):
-    prices_fetched = pyqtSignal(dict)
-
-    def __init__(self, symbols):
+    # Hands every snapshot straight to `sink` (the trading engine's queue)
+    # without a hop through the GUI thread.
+    def __init__(self, source, sink, store=None):
         super().__init__()
-        self.symbols = symbols
-        self.running = True
+        self.source = source
+        self.sink = sink
+        self.store = store
 
     def run(self):
-        while self.running:
-            try:
-                prices = get_prices(self.symbols)
-                if prices:
-                    self.prices_fetched.emit(prices)
-            except Exception:
-                self.prices_fetched.emit({})
-            self.msleep(1000)
+        for prices in self.source:
+            if self.store is not None:
+                try:
+                    self.store.append_snapshot(prices)
+                except (OSError, ValueError) as e:
+                    logging.warning(f"Could not record price snapshot: {e}")
+            self.sink(prices)
 
     def stop(self):
-        self.running = False
+        self.source.stop()
         self.wait()
 
 class LiveChart(FigureCanvas):
+    # Retained-mode chart: one Line2D per series, created once and fed from
+    # fixed-size ring buffers. update_plot only records data; a timer redraws
+    # at most every CHART_REFRESH_MS, blitting the lines over a cached
+    # background and doing a full draw only when an axis has to rescale.
     def __init__(self, parent=None):
         self.fig = Figure(figsize=(6, 4), dpi=100, facecolor='black')
         self.ax_price = self.fig.add_subplot(211)
         self.ax_balance = self.fig.add_subplot(212)
         super().__init__(self.fig)
-        self.x_data = []
+        self.capacity = CHART_HISTORY
+        self.x = np.arange(self.capacity)
         self.price_history = {}
-        self.balance_data = []
-        self.profit_data = []
-
-    def reset(self, symbols):
-        self.x_data.clear()
-        self.balance_data.clear()
-        self.profit_data.clear()
-        self.price_history = {sym: [] for sym in symbols}
-        self.draw()
-
-    def update_plot(self, x, prices, portfolio, profit):
-        self.x_data.append(x)
-        self.balance_data.append(portfolio.balance)
-        self.profit_data.append(profit)
-        for symbol, data in prices.items():
-            self.price_history.setdefault(symbol, []).append(data["price"])
+        self.price_lines = {}
+        self.account_history = RingBuffer(self.capacity, width=2)
+        self.background = None
+        self.dirty = False
 
-        for history in self.price_history.values():
-            while len(history) > 100:
-                history.pop(0)
-
-        self.ax_price.clear()
-        self.ax_balance.clear()
-
-        for ax in (self.ax_price, self.ax_balance):
+        for ax, title in ((self.ax_price, "Crypto Prices"), (self.ax_balance, "Balance & Profit")):
             ax.set_facecolor('black')
-            ax.spines['bottom'].set_color('white')
-            ax.spines['top'].set_color('white')
-            ax.spines['left'].set_color('white')
-            ax.spines['right'].set_color('white')
+            for spine in ax.spines.values():
+                spine.set_color('white')
             ax.tick_params(axis='x', colors='white')
             ax.tick_params(axis='y', colors='white')
-            ax.title.set_color('white')
+            ax.set_title(title, color='white')
+            ax.set_xlim(0, self.capacity - 1)
+        self.balance_line, = self.ax_balance.plot([], [], label='Balance ($)', color='lime', animated=True)
+        self.profit_line, = self.ax_balance.plot([], [], label='Profit ($)', color='cyan', animated=True)
+        self._legend(self.ax_balance)
+        self.fig.tight_layout()
 
-        for symbol, prices_list in self.price_history.items():
-            if prices_list:
-                self.ax_price.plot(range(len(prices_list)), prices_list, label=symbol)
+        self.mpl_connect('draw_event', self._on_draw)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.on_timer)
+        self.timer.start(CHART_REFRESH_MS)
 
-        if self.balance_data:
-            self.ax_balance.plot(range(len(self.balance_data)), self.balance_data, label='Balance ($)', color='lime')
-        if self.profit_data:
-            self.ax_balance.plot(range(len(self.profit_data)), self.profit_data, label='Profit ($)', color='cyan')
+    def _legend(self, ax):
+        ax.legend(loc='upper left', facecolor='black', edgecolor='white', labelcolor='white')
 
-        self.ax_price.set_title("Crypto Prices")
-        self.ax_balance.set_title("Balance & Profit")
-        self.ax_price.legend(loc='upper left', facecolor='black', edgecolor='white', labelcolor='white')
-        self.ax_balance.legend(loc='upper left', facecolor='black', edgecolor='white', labelcolor='white')
-        self.fig.tight_layout()
-        self.draw()
+    def _add_symbol(self, symbol):
+        self.price_history[symbol] = RingBuffer(self.capacity)
+        self.price_lines[symbol], = self.ax_price.plot([], [], label=symbol, animated=True)
+
+    def reset(self, symbols):
+        for line in self.price_lines.values():
+            line.remove()
+        self.price_history = {}
+        self.price_lines = {}
+        for symbol in symbols:
+            self._add_symbol(symbol)
+        self.account_history.clear()
+        self._legend(self.ax_price)
+        self.dirty = True
+        self.refresh(full=True)
+
+    def update_plot(self, x, prices, balance, profit):
+        self.account_history.append((balance, profit))
+        added = False
+        for symbol, data in prices.items():
+            if symbol not in self.price_history:
+                self._add_symbol(symbol)
+                added = True
+            self.price_history[symbol].append(data["price"])
+        if added:
+            self._legend(self.ax_price)
+            self.background = None
+        self.dirty = True
+
+    def _lines(self):
+        return [*self.price_lines.values(), self.balance_line, self.profit_line]
+
+    def _rescale(self, ax, series):
+        series = [values for values in series if len(values)]
+        if not series:
+            return False
+        lo = min(float(values.min()) for values in series)
+        hi = max(float(values.max()) for values in series)
+        bottom, top = ax.get_ylim()
+        # Grow when data leaves the view, shrink when it uses under half of it.
+        if bottom <= lo and hi <= top and hi - lo >= 0.5 * (top - bottom):
+            return False
+        pad = (hi - lo) * 0.05 or abs(hi) * 0.01 or 1.0
+        ax.set_ylim(lo - pad, hi + pad)
+        return True
+
+    def on_timer(self):
+        if self.dirty:
+            with STAGE_SECONDS.time("render_chart"):
+                self.refresh()
+
+    def refresh(self, full=False):
+        if not self.dirty:
+            return
+        self.dirty = False
+        for symbol, line in self.price_lines.items():
+            values = self.price_history[symbol].column(0)
+            line.set_data(self.x[:len(values)], values)
+        account = self.account_history.window()
+        self.balance_line.set_data(self.x[:account.shape[1]], account[0])
+        self.profit_line.set_data(self.x[:account.shape[1]], account[1])
+
+        rescaled = self._rescale(self.ax_price, [line.get_ydata() for line in self.price_lines.values()])
+        rescaled = self._rescale(self.ax_balance, [account[0], account[1]]) or rescaled
+        if full or rescaled or self.background is None:
+            self.draw()
+            return
+        self.restore_region(self.background)
+        self._draw_lines()
+        self.blit(self.fig.bbox)
+
+    def _draw_lines(self):
+        for line in self._lines():
+            line.axes.draw_artist(line)
+
+    def _on_draw(self, event):
+        self.background = self.copy_from_bbox(self.fig.bbox)
+        self._draw_lines()
+
+class RenderScheduler:
+    # Coalesces repaint requests: mark() records which parts of the window are
+    # stale, and at most UI_REFRESH_HZ times a second each stale part is
+    # rendered once, however many ticks arrived in between.
+    def __init__(self, parent, renderers, hz=UI_REFRESH_HZ):
+        self.renderers = renderers
+        self.stages = {name: f"render_{name}" for name in renderers}
+        self.dirty = set()
+        self.timer = QTimer(parent)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(int(1000 / hz))
+        self.timer.timeout.connect(self.flush)
+
+    def mark(self, *parts):
+        self.dirty.update(parts)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        dirty, self.dirty = self.dirty, set()
+        for name, render in self.renderers.items():
+            if name in dirty:
+                with STAGE_SECONDS.time(self.stages[name]):
+                    render()
+
+class TradeLogModel(QAbstractListModel):
+    # Newest-first list of trade log entries. New trades are inserted as rows
+    # at the top; rows are only formatted when painted. Only the newest
+    # `limit` are kept; the ledger (and its journal) has the rest.
+    def __init__(self, parent=None, limit=UI_TRADE_LOG_ROWS):
+        super().__init__(parent)
+        self.trades = []
+        self.limit = limit
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.trades)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        log = self.trades[len(self.trades) - 1 - index.row()]
+        return f"{log['action']} {log['symbol']} {log['quantity']:.4f} @ ${log['price']:,.2f} | Bal: ${log['balance_after']:,.2f}"
+
+    def append(self, trades):
+        if trades:
+            self.beginInsertRows(QModelIndex(), 0, len(trades) - 1)
+            self.trades.extend(trades)
+            self.endInsertRows()
+        excess = len(self.trades) - self.limit
+        if excess > 0:
+            # The oldest trades are the bottom rows.
+            self.beginRemoveRows(QModelIndex(), self.limit, len(self.trades) - 1)
+            del self.trades[:excess]
+            self.endRemoveRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.trades = []
+        self.endResetModel()
+
+class EngineBridge(QObject):
+    # Emitted from the engine thread; Qt queues delivery to the GUI thread.
+    state_published = pyqtSignal(object)
 
 class SciFiUI(QMainWindow):
     def __init__(self):
@@ -112,11 +246,35 @@ class SciFiUI(QMainWindow):
         self.set_background("assets/background.jpg")
 
         self.symbols = DEFAULT_SYMBOLS.copy()
-        self.portfolio = Portfolio()
-        self.ai = TradingAI("aggressive")
+        self.bridge = EngineBridge(self)
+        self.bridge.state_published.connect(self.apply_state)
+        ai, portfolio = TradingAI("aggressive"), live_portfolio()
+        bars = bars_for(ai)
+        checkpointer = None
+        if CHECKPOINT_PATH:
+            resume(CHECKPOINT_PATH, ai, portfolio, bars)
+            checkpointer = Checkpointer(CHECKPOINT_PATH)
+        self.engine = TradingEngine(ai, portfolio, self.bridge.state_published.emit, self.symbols,
+                                    checkpointer=checkpointer, bars=bars)
+        self.engine.start()
+        # The reporter idles while metrics are off, so they can be switched
+        # on later (e.g. POST /enable on the endpoint) without a restart.
+        self.metrics_reporter, self.metrics_server = metrics.start()
+        self.state = None
+        self.tick_store = TickStore(TICK_STORE_DIR) if TICK_STORE_RECORD else None
 
         self.trading_active = False
         self.latest_prices = {}
+        self.previous_prices = {}
+        self.pending_trades = []
+        self.status_text = ""
+        self.item_states = {}
+        self.render = RenderScheduler(self, {
+            "status": self.render_status,
+            "prices": self.render_prices,
+            "account": self.render_account,
+            "trades": self.render_trades,
+        })
 
         self.label_prices = QLabel("Prices: ")
         self.label_balance = QLabel("Balance: ")
@@ -139,6 +297,7 @@ class SciFiUI(QMainWindow):
 
         self.backtest_mode = False
         self.backtest_data = []
+        self.backtest_times = []
         self.backtest_index = 0
 
         self.btn_toggle_mode = QPushButton("Switch to Backtest Mode")
@@ -189,14 +348,17 @@ class SciFiUI(QMainWindow):
         self.crypto_list.setFixedWidth(200)
         self.crypto_list.setStyleSheet("background-color: black; color: #00ffcc;")
 
-        self.trade_log_list = QListWidget()
+        self.trade_log_model = TradeLogModel(self)
+        self.trade_log_list = QListView()
+        self.trade_log_list.setModel(self.trade_log_model)
+        self.trade_log_list.setUniformItemSizes(True)
         self.trade_log_list.setFixedHeight(150)
 
         bg_path = resource_path("assets/background.jpg")
         bg_url = Path(bg_path).resolve().as_posix()
 
         self.trade_log_list.setStyleSheet(f"""
-            QListWidget {{
+            QListView {{
                 background-image: url("{bg_url}");
                 background-repeat: no-repeat;
                 background-position: center;
@@ -254,11 +416,27 @@ class SciFiUI(QMainWindow):
         self.setCentralWidget(container)
 
         self.counter = 0
-        self.price_fetcher_thread = PriceFetcherThread(self.symbols)
-        self.price_fetcher_thread.prices_fetched.connect(self.process_prices)
-        self.price_fetcher_thread.start()
+        self.warm_start(self.symbols)
+        self.start_price_feed()
         self.stop_trading()
 
+    def create_market_data_source(self):
+        return create_source(MARKET_DATA_SOURCE, self.symbols, MARKET_DATA_STREAM_ADDRESS)
+
+    def warm_start(self, symbols):
+        # Candles are fetched off the GUI thread; seed_history() then queues
+        # behind whatever ticks are already in, and replays those after the
+        # seed.
+        if not WARM_START or self.backtest_mode:
+            return
+        limit, timeframe = self.engine.ai.history_limit, self.engine.ai.timeframe or OHLCV_TIMEFRAME
+        threading.Thread(target=lambda: self.engine.seed_history(load_histories(symbols, limit, timeframe)),
+                         daemon=True, name="WarmStart").start()
+
+    def start_price_feed(self):
+        self.price_fetcher_thread = PriceFetcherThread(self.create_market_data_source(), self.engine.submit_tick, self.tick_store)
+        self.price_fetcher_thread.start()
+
     def set_background(self, image_path):
         image_path = resource_path(image_path)
         if os.path.exists(image_path):
@@ -269,41 +447,32 @@ class SciFiUI(QMainWindow):
             self.setPalette(palette)
 
     def change_risk_level(self, level):
-        self.ai.set_risk_level(level)
+        self.engine.set_risk_level(level)
 
     def start_trading(self):
         if self.backtest_mode: return
         self.trading_active = True
+        self.engine.set_trading(True)
         self.btn_start_continue.setEnabled(False)
         self.btn_start_continue.setText("Continue Trading")
         self.btn_stop.setEnabled(True)
-        self.label_status.setText("AI trading is now ACTIVE.")
+        self.set_status("AI trading is now ACTIVE.")
 
     def stop_trading(self):
         self.trading_active = False
+        # Backtest replay always trades; live ticks only once started.
+        self.engine.set_trading(self.backtest_mode)
         self.btn_start_continue.setEnabled(True)
         self.btn_start_continue.setText("Start Trading")
         self.btn_stop.setEnabled(False)
-        self.label_status.setText("AI trading PAUSED.")
+        self.set_status("AI trading PAUSED.")
 
     def sell_all_holdings(self):
         if self.backtest_mode or not self.latest_prices:
-            self.label_status.setText("Cannot sell, waiting for live price data...")
+            self.set_status("Cannot sell, waiting for live price data...")
             return
 
-        holdings_to_sell = self.portfolio.holdings.copy()
-        sold_anything = False
-        for symbol, quantity in holdings_to_sell.items():
-            if quantity > 0 and symbol in self.latest_prices:
-                current_price = self.latest_prices[symbol]['price']
-                if self.portfolio.sell(symbol, current_price, quantity):
-                    sold_anything = True
-
-        if sold_anything:
-            self.process_prices(self.latest_prices)
-            self.label_status.setText("All holdings sold.")
-        else:
-            self.label_status.setText("No holdings to sell.")
+        self.engine.sell_all()
 
     def toggle_mode(self):
         self.backtest_mode = not self.backtest_mode
@@ -312,7 +481,7 @@ class SciFiUI(QMainWindow):
             self.stop_trading()
             self.btn_toggle_mode.setText("Switch to Live Mode")
             self.btn_load_csv.setEnabled(True)
-            self.label_status.setText("Backtest mode. Load CSV to start.")
+            self.set_status("Backtest mode. Load CSV to start.")
             self.btn_start_continue.setEnabled(False)
             self.btn_stop.setEnabled(False)
             self.btn_sell_all.setEnabled(False)
@@ -323,124 +492,121 @@ class SciFiUI(QMainWindow):
             self.btn_load_csv.setEnabled(False)
             self.btn_sell_all.setEnabled(True)
             self.stop_trading()
-            self.label_status.setText("Live mode. Trading is paused.")
-            self.price_fetcher_thread = PriceFetcherThread(self.symbols)
-            self.price_fetcher_thread.prices_fetched.connect(self.process_prices)
-            self.price_fetcher_thread.start()
+            self.set_status("Live mode. Trading is paused.")
+            self.start_price_feed()
 
     def load_backtest_csv(self):
         options = QFileDialog.Options()
         filename, _ = QFileDialog.getOpenFileName(self, "Open Backtest CSV", "", "CSV Files (*.csv);;All Files (*)", options=options)
         if filename:
-            self.backtest_data = self.parse_backtest_csv(filename)
+            self.backtest_data, self.backtest_times = self.parse_backtest_csv(filename)
             self.backtest_index = 0
-            self.portfolio.reset()
+            self.engine.reset()
             self.chart.reset(self.symbols)
-            self.label_status.setText(f"Loaded {len(self.backtest_data)} records. Starting backtest.")
+            self.set_status(f"Loaded {len(self.backtest_data)} records. Starting backtest.")
             self.run_backtest()
 
     def parse_backtest_csv(self, filename):
-        data, grouped = [], {}
-        with open(filename, newline='') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                ts = row.get("timestamp")
-                symbol = row.get("symbol")
-                if ts not in grouped: grouped[ts] = {}
-                grouped[ts][symbol] = {
-                    "price": float(row.get("price", 0)),
-                    "volume": float(row.get("volume", 0)),
-                    "bid": float(row.get("bid", 0)),
-                    "ask": float(row.get("ask", 0))
-                }
-        return [grouped[ts] for ts in sorted(grouped.keys())]
+        # Snapshots plus their times, so replayed ticks land in the right bars.
+        data = load_ticks(filename)
+        return data.frames(), data.times()
 
     def run_backtest(self):
         if not self.backtest_data: return
         self.timer = QTimer()
         self.timer.timeout.connect(self.backtest_tick)
-        self.timer.start(200)
+        self.timer.start(BACKTEST_TICK_INTERVAL_MS)
 
     def backtest_tick(self):
-        if self.backtest_index >= len(self.backtest_data):
-            self.label_status.setText("Backtest complete.")
-            self.timer.stop()
-            return
-        prices = self.backtest_data[self.backtest_index]
-        self.backtest_index += 1
-        self.process_prices(prices)
-
-    def process_prices(self, prices):
-        if not prices: return
-
-        self.latest_prices = prices
-        decisions = []
-
-        if self.backtest_mode or self.trading_active:
-            for symbol in self.symbols:
-                if symbol not in prices: continue
-                price_data = prices[symbol]
-                avg_buy_price = self.portfolio.avg_buy_price.get(symbol)
-
-                decision, pos_size = self.ai.decide(symbol, price_data["price"], price_data["volume"], price_data["ask"] - price_data["bid"], avg_buy_price)
-
-                if decision == "BUY" and pos_size > 0:
-                    self.portfolio.buy(symbol, price_data["price"], pos_size)
-                elif decision == "SELL" and pos_size > 0:
-                    qty_held = self.portfolio.holdings.get(symbol, 0)
-                    if qty_held > 0:
-                        self.portfolio.sell(symbol, price_data["price"], qty_held * pos_size)
-                decisions.append(f"{symbol}={decision}")
-            if decisions:
-                self.label_status.setText(" | ".join(decisions))
-
-        profit = self.portfolio.get_profit_loss(prices)
+        for _ in range(BACKTEST_TICKS_PER_STEP):
+            if self.backtest_index >= len(self.backtest_data):
+                self.set_status("Backtest complete.")
+                self.timer.stop()
+                return
+            prices = self.backtest_data[self.backtest_index]
+            timestamp = float(self.backtest_times[self.backtest_index])
+            self.backtest_index += 1
+            self.engine.submit_tick(prices, timestamp)
+
+    def apply_state(self, state):
+        # Runs on the GUI thread for every state the engine publishes; only
+        # the chart buffers are fed here, widgets wait for the scheduler.
+        self.state = state
+        self.latest_prices = state.prices
+        self.previous_prices = state.previous_prices
+        for balance, profit, prices in state.points:
+            self.counter += 1
+            self.chart.update_plot(self.counter, prices, balance, profit)
+        if state.status:
+            self.set_status(state.status)
+        if state.trades_reset:
+            self.pending_trades = []
+            self.trade_log_model.clear()
+        if state.new_trades:
+            self.pending_trades.extend(state.new_trades)
+            self.render.mark("trades")
+        self.render.mark("prices", "account")
+
+    def set_status(self, text):
+        self.status_text = text
+        self.render.mark("status")
+
+    def render_status(self):
+        self.label_status.setText(self.status_text)
+
+    def render_prices(self):
         price_texts = []
-        for sym, data in prices.items():
+        for sym, data in self.latest_prices.items():
             if sym not in self.symbols: continue
             current_price = data['price']
-            hist = self.chart.price_history.get(sym, [])
-            prev_price = hist[-1] if hist else current_price
+            prev_price = self.previous_prices.get(sym, data)['price']
             change_pct = ((current_price - prev_price) / prev_price * 100) if prev_price != 0 else 0
             color = "#00ff00" if change_pct >= 0 else "#ff4444"
             price_texts.append(f"{sym}: ${current_price:,.2f} <span style='color:{color}'>({change_pct:+.2f}%)</span>")
         self.label_prices.setText("Prices: " + " | ".join(price_texts))
         self.label_prices.setTextFormat(Qt.RichText)
 
-        holdings_data = self.portfolio.get_holdings_detail(prices)
+    def render_account(self):
+        state = self.state
+        if state is None: return
+        profit = state.profit
+        holdings_data = state.holdings
         holdings_map = {h[0]: h for h in holdings_data}
         holding_strings = []
-        for sym, qty, value, gain in holdings_data:
+        for sym, qty, value, gain, _ in holdings_data:
             if qty > 0:
-                profit_pct = (gain / (value - gain) * 100) if (value - gain) != 0 else 0
                 color = "#00ff00" if gain >= 0 else "#ff4444"
                 holding_strings.append(f"<span style='color:{color}'>{sym}: {qty:.4f} (${value:,.2f})</span>")
 
-        self.label_balance.setText(f"Balance: ${self.portfolio.balance:,.2f} | Holdings: {' | '.join(holding_strings) if holding_strings else 'None'}")
+        self.label_balance.setText(f"Balance: ${state.balance:,.2f} | Holdings: {' | '.join(holding_strings) if holding_strings else 'None'}")
         self.label_balance.setTextFormat(Qt.RichText)
 
         for i in range(self.crypto_list.count()):
             item = self.crypto_list.item(i)
             sym = item.text()
             if sym in holdings_map:
-                _, qty, value, gain = holdings_map[sym]
-                profit_pct = (gain / (value - gain) * 100) if (value - gain) != 0 else 0
-                item.setForeground(QColor("lime") if gain >= 0 else QColor("red"))
-                item.setToolTip(f"Status: Held\nQuantity: {qty:.4f}\nValue: ${value:,.2f}\nAvg Buy: ${self.portfolio.avg_buy_price.get(sym,0):,.2f}\nProfit: ${gain:,.2f} ({profit_pct:+.2f}%)")
+                _, qty, value, gain, profit_pct = holdings_map[sym]
+                look = ("lime" if gain >= 0 else "red",
+                         f"Status: Held\nQuantity: {qty:.4f}\nValue: ${value:,.2f}\nAvg Buy: ${state.avg_buy_price.get(sym,0):,.2f}\nProfit: ${gain:,.2f} ({profit_pct:+.2f}%)")
             else:
-                item.setForeground(QColor("#00ffcc"))
-                item.setToolTip(f"Status: Tracking (Not Held)")
-
-        self.label_profit.setText(f"Profit = ${profit:,.2f}")
-
-        self.trade_log_list.clear()
-        for log in reversed(self.portfolio.get_trade_log()[-50:]):
-            self.trade_log_list.addItem(f"{log['action']} {log['symbol']} {log['quantity']:.4f} @ ${log['price']:,.2f} | Bal: ${log['balance_after']:,.2f}")
-
-        self.counter += 1
-        self.chart.update_plot(self.counter, prices, self.portfolio, profit)
+                look = ("#00ffcc", "Status: Tracking (Not Held)")
+            # Untouched items keep their colour and tooltip; Qt repaints the
+            # list for every setter call otherwise.
+            if self.item_states.get(sym) != look:
+                self.item_states[sym] = look
+                item.setForeground(QColor(look[0]))
+                item.setToolTip(look[1])
+
+        self.label_profit.setText(f"Profit = ${profit:,.2f} (realized ${state.realized_pnl:,.2f})")
+        latency = f"{state.latency * 1000:.2f} ms" if state.latency is not None else "n/a"
+        self.label_profit.setToolTip(f"Engine queue depth: {state.queue_depth}\nTick-to-decision latency: {latency}")
+
+    def render_trades(self):
+        trades, self.pending_trades = self.pending_trades, []
+        self.trade_log_model.append(trades)
 
     def update_crypto_list_widget(self):
+        self.item_states = {}
         self.crypto_list.clear()
         for sym in self.symbols:
             self.crypto_list.addItem(QListWidgetItem(sym))
@@ -449,13 +615,13 @@ class SciFiUI(QMainWindow):
         text, ok = QInputDialog.getText(self, "Add Crypto Symbol", "Enter symbol (e.g. LTC/USDT):")
         if ok and text and (sym := text.strip().upper()) and sym not in self.symbols:
             self.symbols.append(sym)
+            self.engine.set_symbols(self.symbols)
+            self.warm_start([sym])
             self.update_crypto_list_widget()
             self.chart.reset(self.symbols)
             if not self.backtest_mode:
                 self.price_fetcher_thread.stop()
-                self.price_fetcher_thread = PriceFetcherThread(self.symbols)
-                self.price_fetcher_thread.prices_fetched.connect(self.process_prices)
-                self.price_fetcher_thread.start()
+                self.start_price_feed()
 
     def remove_selected_crypto(self):
         selected_items = self.crypto_list.selectedItems()
@@ -464,17 +630,19 @@ class SciFiUI(QMainWindow):
             sym = item.text()
             if sym in self.symbols:
                 self.symbols.remove(sym)
-                self.portfolio.holdings.pop(sym, None)
-                self.portfolio.avg_buy_price.pop(sym, None)
-                for history in [self.ai.price_history, self.ai.volume_history, self.ai.spread_history]:
-                    history.pop(sym, None)
+                self.engine.remove_symbol(sym)
         self.update_crypto_list_widget()
         self.chart.reset(self.symbols)
         if not self.backtest_mode:
             self.price_fetcher_thread.stop()
-            self.price_fetcher_thread = PriceFetcherThread(self.symbols)
-            self.price_fetcher_thread.prices_fetched.connect(self.process_prices)
-            self.price_fetcher_thread.start()
+            self.start_price_feed()
+
+    def closeEvent(self, event):
+        self.engine.stop(timeout=1.0)
+        self.metrics_reporter.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+        super().closeEvent(event)
 
 def launch_ui():
     app = QApplication(sys.argv)